@@ -1,14 +1,26 @@
+import json
+import sys
+
+import click
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Flask, jsonify, make_response, Response, request, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 
 from config import ProductionConfig
 
-from weather.db import db
-from weather.models.locations_model import Locations
-from weather.models.favoriteslist_model import FavoriteslistModel
+from weather.db import configure_sqlite, db, ensure_indexes
+from weather.models.locations_model import (EXPORT_COLUMNS, HISTORY_PAGE_SIZE, LOCATION_MATCH_RADIUS_KM, LatestWeather,
+                                            Locations, decode_cursor, encode_cursor, location_index,
+                                            parse_timestamp)
+from weather.models.compact_model import CompactSnapshot, CompactStore, LocationDim, WeatherCondition
+from weather.models.favoriteslist_model import Favorite, FavoriteslistModel
+from weather.models.forecast_model import ForecastModel
+from weather.models.geocoding_model import GeocodedCity
 from weather.models.user_model import Users
+from weather.utils import analytics_utils, api_utils, export_utils
 from weather.utils.logger import configure_logger
+from weather.utils.resilience_utils import UpstreamUnavailableError
+from weather.utils.scheduler import RefreshScheduler
 
 load_dotenv()
 
@@ -29,7 +41,9 @@ def create_app(config_class=ProductionConfig):
 
     db.init_app(app)  # Initialize db with app
     with app.app_context():
+        configure_sqlite(db.engine)  # WAL, busy_timeout, cache and mmap on every connection
         db.create_all()  # Recreate all tables
+        ensure_indexes()  # Add indexes missing from pre-existing tables
 
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -37,7 +51,7 @@ def create_app(config_class=ProductionConfig):
 
     @login_manager.user_loader
     def load_user(user_id):
-        return Users.query.filter_by(username=user_id).first()
+        return Users.load_cached_user(user_id)
 
     @login_manager.unauthorized_handler
     def unauthorized():
@@ -47,8 +61,13 @@ def create_app(config_class=ProductionConfig):
         }), 401)
 
 
-   # FavoritesModel = FavoritesModel()
-    app.favorites_model = FavoriteslistModel()
+    app.forecast_model = ForecastModel()
+
+    if app.config.get("WEATHER_REFRESH_IN_PROCESS"):
+        # Running in this process, the scheduler can also warm the forecast store the routes read
+        app.refresh_scheduler = RefreshScheduler(app, FavoriteslistModel.get_all_favorited_locations,
+                                                 forecast_model=app.forecast_model)
+        app.refresh_scheduler.start()
 
     ####################################################
     #
@@ -71,6 +90,25 @@ def create_app(config_class=ProductionConfig):
             'message': 'Service is running'
         }), 200)
 
+    @app.route('/api/cache-stats', methods=['GET'])
+    def cache_stats() -> Response:
+        """
+        Route to report the weather cache, upstream coalescing, circuit breaker, rate limiter and session user cache counters.
+
+        Returns:
+            JSON response containing the cache and single-flight counters.
+
+        """
+        app.logger.info("Cache stats endpoint hit")
+        return make_response(jsonify({
+            'status': 'success',
+            'weather_cache': api_utils.get_cache_stats(),
+            'upstream_coalescing': api_utils.get_coalescing_stats(),
+            'upstream_guards': api_utils.get_resilience_stats(),
+            'user_cache': Users.get_user_cache_stats(),
+            'forecast_store': app.forecast_model.stats()
+        }), 200)
+
 
     ##########################################################
     #
@@ -246,8 +284,12 @@ def create_app(config_class=ProductionConfig):
         try:
             app.logger.info("Received request to recreate Users table")
             with app.app_context():
+                Favorite.__table__.drop(db.engine)
                 Users.__table__.drop(db.engine)
                 Users.__table__.create(db.engine)
+                Favorite.__table__.create(db.engine)
+            FavoriteslistModel.invalidate_all()
+            Users.clear_user_cache()
             app.logger.info("Users table recreated successfully")
             return make_response(jsonify({
                 "status": "success",
@@ -280,8 +322,18 @@ def create_app(config_class=ProductionConfig):
         try:
             app.logger.info("Received request to recreate Locations table")
             with app.app_context():
+                LatestWeather.__table__.drop(db.engine)
                 Locations.__table__.drop(db.engine)
+                CompactSnapshot.__table__.drop(db.engine)
+                LocationDim.__table__.drop(db.engine)
+                WeatherCondition.__table__.drop(db.engine)
+                WeatherCondition.__table__.create(db.engine)
+                LocationDim.__table__.create(db.engine)
+                CompactSnapshot.__table__.create(db.engine)
                 Locations.__table__.create(db.engine)
+                LatestWeather.__table__.create(db.engine)
+            CompactStore.clear_cache()
+            location_index.clear()
             app.logger.info("Locations table recreated successfully")
             return make_response(jsonify({
                 "status":"success",
@@ -339,33 +391,190 @@ def create_app(config_class=ProductionConfig):
                 "details": str(e)
             }), 500)
     
-    @app.route('/api/get-weather-from-location-history/<string:city_name>/<int:latitude>/<int:longitude>', methods=['GET'])
+    @app.route('/api/get-nearest-location', methods=['GET'])
     @login_required
-    def get_weather_from_location_history(city_name: str, latitude: int, longitude: int) -> Response:
+    def get_nearest_location() -> Response:
+        """
+        Find the stored location closest to a point and return its latest snapshot.
+
+        Lets a request for coordinates near an already stored location reuse that
+        location's weather instead of requiring an exact coordinate match.
+
+        Query Parameters:
+            - latitude (float): Latitude of the point.
+            - longitude (float): Longitude of the point.
+            - radius_km (float, optional): Maximum distance in km (default 5).
+            - city_name (str, optional): Only match locations with this city name.
+
+        Returns:
+            JSON response with the matched location, its distance and its latest weather.
+
+        Raises:
+            400 error if the parameters are invalid or no stored location is within the radius.
+            500 error if there is an issue querying the locations.
         """
-        Get weather from location history using city name and coordinates.
+        try:
+            missing_fields = [field for field in ("latitude", "longitude") if field not in request.args]
+            if missing_fields:
+                app.logger.warning(f"Missing required fields: {missing_fields}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": f"Missing required fields: {', '.join(missing_fields)}"
+                }), 400)
+
+            try:
+                lat = float(request.args["latitude"])
+                long = float(request.args["longitude"])
+                radius_km = float(request.args.get("radius_km", LOCATION_MATCH_RADIUS_KM))
+                match = Locations.find_nearest(lat, long, radius_km, city_name=request.args.get("city_name"))
+                if match is None:
+                    raise ValueError(f"No stored location within {radius_km:g} km of ({lat}, {long})")
+                (city, match_lat, match_long), distance = match
+                snapshot = Locations.get_current_weather(city, match_lat, match_long)
+            except ValueError as e:
+                app.logger.warning(f"Nearest location lookup failed: {e}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": str(e)
+                }), 400)
+
+            weather = {column: getattr(snapshot, column) for column in EXPORT_COLUMNS}
+            weather["time"] = weather["time"].isoformat()
+
+            app.logger.info(f"Matched ({lat}, {long}) to {city} ({match_lat}, {match_long}), {distance:.3f} km away")
+            return make_response(jsonify({
+                "status": "success",
+                "city_name": city,
+                "latitude": match_lat,
+                "longitude": match_long,
+                "distance_km": round(distance, 3),
+                "weather": weather
+            }), 200)
+
+        except Exception as e:
+            app.logger.error(f"Error finding nearest location: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "Internal server error",
+                "details": str(e)
+            }), 500)
+
+    @app.route('/api/geocode', methods=['GET'])
+    @login_required
+    def geocode() -> Response:
+        """
+        Resolve a city name to coordinates through the persistent geocoding cache.
+
+        The geocoding API is called only the first time a name is seen; the
+        result can then be used as the (city_name, latitude, longitude) key of
+        the other routes, which query the weather API by coordinates.
+
+        Query Parameters:
+            - city_name (str): City name, optionally with state and country code (e.g. "Boston,MA,US").
+
+        Returns:
+            JSON response with the resolved name and coordinates.
+
+        Raises:
+            400 error if the name is missing or does not match any place.
+            500 error if there is an issue resolving the name.
+        """
+        try:
+            city = request.args.get("city_name")
+            if not city:
+                app.logger.warning("Missing required fields: ['city_name']")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "Missing required fields: city_name"
+                }), 400)
+
+            try:
+                name, lat, long = GeocodedCity.resolve(city)
+            except ValueError as e:
+                app.logger.warning(f"Geocoding failed for {city}: {e}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": str(e)
+                }), 400)
+
+            return make_response(jsonify({
+                "status": "success",
+                "query": city,
+                "city_name": name,
+                "latitude": lat,
+                "longitude": long
+            }), 200)
+
+        except Exception as e:
+            app.logger.error(f"Error geocoding {request.args.get('city_name')}: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "Internal server error",
+                "details": str(e)
+            }), 500)
+
+    @app.route('/api/get-weather-from-location-history/<string:city_name>/<latitude>/<longitude>', methods=['GET'])
+    @login_required
+    def get_weather_from_location_history(city_name: str, latitude: str, longitude: str) -> Response:
+        """
+        Get a page of weather history for a location, raw or downsampled.
 
         Args (via URL):
             city_name (str): The name of the city.
-            latitude (int): The integer latitude of the location.
-            longitude (int): The integer longitude of the location.
+            latitude (float): The latitude of the location.
+            longitude (float): The longitude of the location.
+
+        Query Parameters:
+            - start (str, optional): Inclusive ISO 8601 lower bound on time.
+            - end (str, optional): Exclusive ISO 8601 upper bound on time.
+            - limit (int, optional): Rows or buckets per page (default 100, max 1000).
+            - cursor (str, optional): next_cursor from the previous page of raw rows.
+            - interval (str, optional): "hour" or "day" to return min/mean/max buckets instead of rows.
 
         Returns:
-            JSON response with weather info or error message.
+            JSON response with the rows (and next_cursor) or buckets (and next_start).
         """
         try:
-            app.logger.info(f"Fetching weather for {city_name} at ({latitude}, {longitude})")
+            app.logger.info(f"Fetching weather history for {city_name} at ({latitude}, {longitude})")
 
-            loc = Locations.get_weather_from_history(city_name, latitude, longitude)
-            if not loc:
+            try:
+                lat = float(latitude)
+                long = float(longitude)
+                start = parse_timestamp(request.args["start"]) if "start" in request.args else None
+                end = parse_timestamp(request.args["end"]) if "end" in request.args else None
+                after = decode_cursor(request.args["cursor"]) if "cursor" in request.args else None
+                limit = int(request.args.get("limit", HISTORY_PAGE_SIZE))
+                interval = request.args.get("interval")
+
+                if interval:
+                    buckets, next_start = Locations.get_weather_aggregates(
+                        city_name, lat, long, interval, start=start, end=end, limit=limit)
+                else:
+                    rows, next_cursor = Locations.get_weather_range(
+                        city_name, lat, long, start=start, end=end, limit=limit, after=after)
+            except ValueError as e:
+                app.logger.warning(f"Invalid weather history request: {e}")
                 return make_response(jsonify({
                     "status": "error",
-                    "message": f"No weather history found for '{city_name}' at ({latitude}, {longitude})"
-                }), 404)
+                    "message": str(e)
+                }), 400)
+
+            if interval:
+                for bucket in buckets:
+                    bucket["time"] = bucket["time"].isoformat()
+                return make_response(jsonify({
+                    "status": "success",
+                    "interval": interval,
+                    "buckets": buckets,
+                    "next_start": next_start.isoformat() if next_start else None
+                }), 200)
 
+            for row in rows:
+                row["time"] = row["time"].isoformat()
             return make_response(jsonify({
                 "status": "success",
-                "weather": loc
+                "weather": rows,
+                "next_cursor": encode_cursor(next_cursor) if next_cursor else None
             }), 200)
 
         except Exception as e:
@@ -377,6 +586,52 @@ def create_app(config_class=ProductionConfig):
             }), 500)
 
         
+    @app.route('/api/export-weather', methods=['GET'])
+    @login_required
+    def export_weather() -> Response:
+        """
+        Stream weather_data rows as NDJSON or CSV.
+
+        Rows are read from the database in batches and written as they are
+        serialized (chunked transfer encoding), so memory use does not grow
+        with the number of rows exported.
+
+        Query Parameters:
+            - format (str, optional): "ndjson" (default) or "csv".
+            - city_name (str, optional): Only rows for this city.
+            - latitude (float, optional): Only rows at this latitude.
+            - longitude (float, optional): Only rows at this longitude.
+            - start (str, optional): Inclusive ISO 8601 lower bound on time.
+            - end (str, optional): Exclusive ISO 8601 upper bound on time.
+
+        Returns:
+            Streaming NDJSON or CSV response.
+        """
+        try:
+            fmt = request.args.get("format", "ndjson")
+            if fmt not in export_utils.EXPORT_FORMATS:
+                raise ValueError(f"format must be one of: {', '.join(export_utils.EXPORT_FORMATS)}")
+            filters = {
+                "city_name": request.args.get("city_name"),
+                "latitude": float(request.args["latitude"]) if "latitude" in request.args else None,
+                "longitude": float(request.args["longitude"]) if "longitude" in request.args else None,
+                "start": parse_timestamp(request.args["start"]) if "start" in request.args else None,
+                "end": parse_timestamp(request.args["end"]) if "end" in request.args else None,
+            }
+        except ValueError as e:
+            app.logger.warning(f"Invalid export request: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400)
+
+        app.logger.info(f"Streaming {fmt} export of weather_data with filters {filters}")
+        body = export_utils.serialize(Locations.iter_export(**filters), fmt, EXPORT_COLUMNS)
+        return Response(stream_with_context(body), mimetype=export_utils.EXPORT_FORMATS[fmt], headers={
+            "Content-Disposition": f"attachment; filename=weather_data.{fmt}"
+        })
+
+        
     @app.route('/api/clear-favorites', methods=['POST'])
     @login_required
     def clear_favorite() -> Response:
@@ -392,7 +647,7 @@ def create_app(config_class=ProductionConfig):
         try:
             app.logger.info("Clearing all locations...")
 
-            Locations.clear_favoriteslist()
+            FavoriteslistModel(current_user.id).clear_favoriteslist()
 
             app.logger.info("Location cleared from favorites successfully.")
             return make_response(jsonify({
@@ -428,7 +683,7 @@ def create_app(config_class=ProductionConfig):
         try:
             app.logger.info("Received request to retrieve all locations from the favorite.")
 
-            loc = Locations.get_all_locations()
+            loc = FavoriteslistModel(current_user.id).get_all_locations()
 
             app.logger.info(f"Successfully retrieved {len(loc)} locations from the favorites.")
             return make_response(jsonify({
@@ -445,11 +700,223 @@ def create_app(config_class=ProductionConfig):
             }), 500)
 
 
+    @app.route('/api/get-current-weather-for-favorites', methods=['GET'])
+    @login_required
+    def get_current_weather_for_favorites() -> Response:
+        """Retrieve the current weather for every favorite location in one request.
+
+        Upstream fetches run concurrently. Locations that fail or miss the
+        deadline are reported individually instead of failing the whole batch.
+
+        Query Parameters:
+            - units (str, optional): Units of measurement, defaults to "metric".
+
+        Returns:
+            JSON response containing one weather result per favorite location.
+
+        Raises:
+            500 error if there is an issue retrieving the favorites.
+
+        """
+        try:
+            app.logger.info("Received request to retrieve current weather for all favorites.")
+
+            units = request.args.get("units", "metric")
+            favorites = FavoriteslistModel(current_user.id).get_all_locations()
+            results = api_utils.get_current_weather_many(favorites, units=units)
+            failed = sum(1 for result in results if result["status"] == "error")
+
+            app.logger.info(f"Retrieved weather for {len(results) - failed} of {len(results)} favorites.")
+            return make_response(jsonify({
+                "status": "success",
+                "locations": results,
+                "failed": failed
+            }), 200)
+
+        except Exception as e:
+            app.logger.error(f"Failed to retrieve weather for favorites: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while retrieving weather for the favorites",
+                "details": str(e)
+            }), 500)
+
+
+    @app.route('/api/get-analytics-for-favorites', methods=['GET'])
+    @login_required
+    def get_analytics_for_favorites() -> Response:
+        """Compute history statistics for every favorite location in one batch.
+
+        Query Parameters:
+            - start (str, optional): Inclusive ISO 8601 lower bound on time.
+            - end (str, optional): Exclusive ISO 8601 upper bound on time.
+            - window (int, optional): Rolling window in days for the daily mean temperature (default 7).
+            - daily (bool, optional): "true" to include the per-day series.
+
+        Returns:
+            JSON response with the statistics per favorite location; favorites
+            without stored history are listed under "missing".
+
+        Raises:
+            400 error if a query parameter is invalid.
+            500 error if there is an issue computing the statistics.
+        """
+        try:
+            app.logger.info("Received request to compute analytics for all favorites.")
+            try:
+                start = parse_timestamp(request.args["start"]) if "start" in request.args else None
+                end = parse_timestamp(request.args["end"]) if "end" in request.args else None
+                window = int(request.args.get("window", analytics_utils.ANALYTICS_ROLLING_DAYS))
+                include_daily = request.args.get("daily", "false").lower() == "true"
+                favorites = FavoriteslistModel(current_user.id).get_all_locations()
+                stats = analytics_utils.get_location_stats(favorites, start=start, end=end, window=window,
+                                                           include_daily=include_daily)
+            except ValueError as e:
+                app.logger.warning(f"Invalid analytics request: {e}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": str(e)
+                }), 400)
+
+            locations = [
+                {"city_name": city, "latitude": lat, "longitude": long, "stats": stats[(city, lat, long)]}
+                for city, lat, long in favorites if (city, lat, long) in stats
+            ]
+            missing = [
+                {"city_name": city, "latitude": lat, "longitude": long}
+                for city, lat, long in favorites if (city, lat, long) not in stats
+            ]
+            app.logger.info(f"Computed analytics for {len(locations)} of {len(favorites)} favorites.")
+            return make_response(jsonify({
+                "status": "success",
+                "locations": locations,
+                "missing": missing
+            }), 200)
+
+        except Exception as e:
+            app.logger.error(f"Failed to compute analytics for favorites: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while computing analytics for the favorites",
+                "details": str(e)
+            }), 500)
+
+
+    @app.route('/api/get-forecast-from-favorite', methods=['POST'])
+    @login_required
+    def get_forecast_from_favorite() -> Response:
+        """Route to get the 5 day forecast for a favorite location.
+
+        Forecasts are served from a store that is refreshed from the weather API
+        at most once per forecast cycle (3 hours) per location.
+
+        Expected JSON Input:
+            - city_name (str): The city's name.
+            - latitude (float): The latitude of the location.
+            - longitude (float): The longitude of the location.
+            - day (int, optional): Only return UTC calendar day N (0 = today).
+            - hours (int, optional): Only return the next N hours.
+            - units (str, optional): Units of measurement, defaults to "metric".
+
+        Returns:
+            JSON response containing the forecast entries, grouped by day
+            unless a day or hours slice was requested.
+
+        Raises:
+            400 error if required fields are missing, invalid, or the location is not a favorite.
+            502 error if the weather API is unavailable and no earlier forecast is stored.
+            500 error for any other failure.
+        """
+        try:
+            app.logger.info("Received request to get forecast from favorites")
+
+            data = request.get_json()
+            required_fields = ["city_name", "latitude", "longitude"]
+            missing_fields = [field for field in required_fields if field not in data]
+
+            if missing_fields:
+                app.logger.warning(f"Missing required fields: {missing_fields}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": f"Missing required fields: {', '.join(missing_fields)}"
+                }), 400)
+
+            try:
+                city = str(data["city_name"]).strip()
+                lat = float(data["latitude"])
+                long = float(data["longitude"])
+                day = int(data["day"]) if data.get("day") is not None else None
+                hours = int(data["hours"]) if data.get("hours") is not None else None
+            except (TypeError, ValueError):
+                app.logger.warning(f"Invalid forecast request: {data}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "latitude and longitude must be numbers, day and hours must be integers"
+                }), 400)
+            units = data.get("units", "metric")
+            city, lat, long = Locations.match_location(city, lat, long)
+
+            if not FavoriteslistModel(current_user.id).contains(city, lat, long):
+                app.logger.warning(f"Location {(city, lat, long)} is not a favorite")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": f"Location with name {city} not found in the favoriteslist"
+                }), 400)
+
+            forecast = app.forecast_model.get_forecast(city, lat, long, units)
+            body = {
+                "status": "success",
+                "city_name": city,
+                "latitude": lat,
+                "longitude": long,
+                "issued_at": forecast.issued_at.isoformat()
+            }
+            if forecast.stale:
+                body["stale"] = True
+            now = app.forecast_model.now()
+            if day is not None:
+                body["day"] = day
+                body["forecast"] = forecast.day(now, day)
+            elif hours is not None:
+                body["hours"] = hours
+                body["forecast"] = forecast.next_hours(now, hours)
+            else:
+                body["forecast"] = forecast.by_day()
+
+            app.logger.info(f"Served forecast for {city} from cycle {body['issued_at']}")
+            return make_response(jsonify(body), 200)
+
+        except UpstreamUnavailableError as e:
+            app.logger.error(f"Weather API unavailable and no stored forecast: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "Failed to retrieve the forecast from the weather API",
+                "details": str(e)
+            }), 502)
+        except ValueError as e:
+            app.logger.warning(f"Could not retrieve forecast: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400)
+        except Exception as e:
+            app.logger.error(f"Failed to retrieve forecast: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while retrieving the forecast",
+                "details": str(e)
+            }), 500)
+
+
     @app.route('/api/get-weather-from-favorite', methods=['POST'])
     @login_required
     def add_weather_to_favorite() -> Response:
         '''Route to get weather from the the fav by compound key (city_name, lat, long).
 
+        A point within LOCATION_MATCH_RADIUS_KM of a stored location with the same
+        city name is favorited as that location, so it reuses its snapshots and
+        refreshes instead of becoming a new location upstream.
+
         Expected JSON Input:
             - City Name (str): The city's name.
             - latitude (float): the latitude of the location
@@ -477,19 +944,18 @@ def create_app(config_class=ProductionConfig):
                     "message": f"Missing required fields: {', '.join(missing_fields)}"
                 }), 400)
 
-            city = data["city_name"]
-            lat = data["latitude"]
-
             try:
-                long = int(data["longitude"])
-            except ValueError:
-                app.logger.warning(f"Invalid long format: {data['longitude']}")
+                lat = float(data["latitude"])
+                long = float(data["longitude"])
+            except (TypeError, ValueError):
+                app.logger.warning(f"Invalid coordinates: {data['latitude']}, {data['longitude']}")
                 return make_response(jsonify({
                     "status": "error",
-                    "message": "longitude must be a valid integer"
+                    "message": "latitude and longitude must be numbers"
                 }), 400)
 
-            app.logger.info(f"Looking up location: {city} - {lat} ({long})")
+            app.logger.info(f"Looking up location: {data['city_name']} - {lat} ({long})")
+            city, lat, long = Locations.match_location(str(data["city_name"]), lat, long)
             loc = Locations.get_current_weather(city,lat,long)
 
             if not loc:
@@ -499,14 +965,23 @@ def create_app(config_class=ProductionConfig):
                     "message": f"Location '{city}' by {lat} ({long}) not found in catalog"
                 }), 400)
 
-            Locations.add_location_to_favoriteslist(city,lat,long)
+            FavoriteslistModel(current_user.id).add_location_to_favoriteslist(city,lat,long)
             app.logger.info(f"Successfully added location to favorites: {city} - {lat} ({long})")
 
             return make_response(jsonify({
                 "status": "success",
-                "message": f"Location '{city}' by {lat} ({long}) added to favorites"
+                "message": f"Location '{city}' by {lat} ({long}) added to favorites",
+                "city_name": city,
+                "latitude": lat,
+                "longitude": long
             }), 201)
 
+        except ValueError as e:
+            app.logger.warning(f"Could not add location to favorites: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400)
         except Exception as e:
             app.logger.error(f"Failed to add location to favorites: {e}")
             return make_response(jsonify({
@@ -518,6 +993,57 @@ def create_app(config_class=ProductionConfig):
         
 
     
+    ##########################################################
+    #
+    # CLI
+    #
+    ##########################################################
+
+    @app.cli.command("export-weather")
+    @click.option("--format", "fmt", type=click.Choice(list(export_utils.EXPORT_FORMATS)), default="ndjson",
+                  help="Output format.")
+    @click.option("--city-name", help="Only rows for this city.")
+    @click.option("--latitude", type=float, help="Only rows at this latitude.")
+    @click.option("--longitude", type=float, help="Only rows at this longitude.")
+    @click.option("--start", help="Inclusive ISO 8601 lower bound on time.")
+    @click.option("--end", help="Exclusive ISO 8601 upper bound on time.")
+    @click.option("--output", type=click.Path(dir_okay=False, writable=True), help="Write to this file instead of stdout.")
+    def export_weather_command(fmt, city_name, latitude, longitude, start, end, output):
+        """Stream weather_data rows as NDJSON or CSV."""
+        try:
+            start = parse_timestamp(start) if start else None
+            end = parse_timestamp(end) if end else None
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+
+        rows = Locations.iter_export(city_name=city_name, latitude=latitude, longitude=longitude, start=start, end=end)
+        out = open(output, "w", newline="") if output else sys.stdout
+        try:
+            for chunk in export_utils.serialize(rows, fmt, EXPORT_COLUMNS):
+                out.write(chunk)
+        finally:
+            if output:
+                out.close()
+
+    @app.cli.command("coord-dedup-report")
+    @click.option("--precisions", default="2,3,4,5", help="Comma-separated decimal places to evaluate.")
+    @click.option("--output", type=click.Path(dir_okay=False, writable=True), help="Also write the report as JSON.")
+    def coord_dedup_report_command(precisions, output):
+        """Report how many stored locations merge at each coordinate precision."""
+        try:
+            precisions = [int(p) for p in precisions.split(",") if p.strip()]
+            report = Locations.coordinate_dedup_report(precisions)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--precisions")
+
+        for entry in report:
+            click.echo(f"precision {entry['precision']}: {entry['locations']} locations -> "
+                       f"{entry['quantized_locations']} ({entry['merged_locations']} merged, "
+                       f"{entry['rows_rekeyed']} of {entry['rows']} rows re-keyed)")
+        if output:
+            with open(output, "w") as f:
+                json.dump(report, f, indent=2)
+
     return app
 
 if __name__ == '__main__':
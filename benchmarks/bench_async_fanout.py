@@ -0,0 +1,83 @@
+"""
+Fetching current weather for many locations at once: thread pool vs. asyncio client.
+
+Both modes fetch the same locations, by coordinates, from a stub API with a
+fixed response delay and an empty cache:
+
+    threads    api_utils.get_current_weather_many on the shared batch pool
+               (WEATHER_BATCH_POOL_SIZE threads)
+    async      AsyncWeatherClient.get_current_weather_many on one event loop
+               and one pooled session
+
+Wall time, throughput, errors and upstream calls are reported per mode and batch size.
+
+Usage:
+    python -m benchmarks.bench_async_fanout --locations 100,1000 --concurrency 100 --upstream-delay-ms 200
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.stub_weather_api import StubWeatherAPI
+from weather.utils import api_utils
+from weather.utils.async_api_utils import AsyncWeatherClient
+
+MODES = ("threads", "async")
+
+
+def fetch_async(locations: list, concurrency: int, deadline: float) -> list:
+    async def main():
+        async with AsyncWeatherClient(concurrency=concurrency, pool_size=concurrency) as client:
+            return await client.get_current_weather_many(locations, deadline=deadline)
+    return asyncio.run(main())
+
+
+def run(mode: str, count: int, concurrency: int, delay: float, deadline: float) -> dict:
+    locations = [(f"City{i}", round(-60 + (i // 360) * 0.5, 4), round(-180 + (i % 360), 4)) for i in range(count)]
+    with StubWeatherAPI(delay=delay) as stub:
+        began = time.perf_counter()
+        if mode == "threads":
+            results = api_utils.get_current_weather_many(locations, concurrency=concurrency, deadline=deadline)
+        else:
+            results = fetch_async(locations, concurrency, deadline)
+        wall = time.perf_counter() - began
+        upstream = stub.requests
+
+    return {
+        "mode": mode,
+        "locations": count,
+        "concurrency": concurrency,
+        "upstream_delay_ms": round(delay * 1000),
+        "wall_seconds": round(wall, 2),
+        "locations_per_second": round(count / wall, 1),
+        "errors": sum(1 for r in results if r["status"] != "success"),
+        "upstream_requests": upstream,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", default="100,1000", help="Comma-separated batch sizes (default: 100,1000)")
+    parser.add_argument("--concurrency", type=int, default=100,
+                        help="In-flight fetches per batch; the thread pool is also capped by "
+                             "WEATHER_BATCH_POOL_SIZE (default: 100)")
+    parser.add_argument("--upstream-delay-ms", type=float, default=200.0,
+                        help="Latency of the stub weather API (default: 200)")
+    parser.add_argument("--deadline", type=float, default=120.0, help="Seconds allowed per batch (default: 120)")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = []
+    for count in (int(size) for size in args.locations.split(",")):
+        for mode in MODES:
+            entry = run(mode, count, args.concurrency, args.upstream_delay_ms / 1000, args.deadline)
+            report.append(entry)
+            print(json.dumps(entry))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
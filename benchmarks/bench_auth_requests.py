@@ -0,0 +1,111 @@
+"""
+Benchmark authenticated-request throughput with and without the session user cache.
+
+A user logs in once, then a @login_required route is requested repeatedly
+from a pool of threads. SQL statements are counted on the engine, so the report
+shows the queries saved per request as well as throughput and latency.
+
+Usage:
+    python -m benchmarks.bench_auth_requests --requests 2000 --concurrency 8
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event
+
+from app import create_app
+from weather.db import db
+from weather.models import user_model
+from weather.models.user_model import Users
+
+ROUTE = "/api/get-all-locations-from-favorite"
+
+
+def make_config(db_path: str):
+    class BenchConfig:
+        TESTING = True
+        SECRET_KEY = "bench-secret-key"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+    return BenchConfig
+
+
+def percentile(samples: list, pct: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def run(use_cache: bool, requests: int, concurrency: int) -> dict:
+    user_model._user_cache.clear()
+    user_model._user_cache.ttl = user_model.USER_CACHE_TTL if use_cache else 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(make_config(os.path.join(tmp, "auth.db")))
+        with app.app_context():
+            Users.create_user("bench", "bench-password")
+            engine = db.engine
+
+        cookie_client = app.test_client()
+        assert cookie_client.post("/api/login", json={"username": "bench", "password": "bench-password"}).status_code == 200
+        session_cookie = cookie_client.get_cookie("session").value
+
+        statements = []
+        count_lock = threading.Lock()
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            with count_lock:
+                statements.append(statement)
+
+        local = threading.local()
+
+        def request(_):
+            if not hasattr(local, "client"):
+                local.client = app.test_client()
+                local.client.set_cookie("session", session_cookie)
+            began = time.perf_counter()
+            resp = local.client.get(ROUTE)
+            elapsed = (time.perf_counter() - began) * 1000
+            assert resp.status_code == 200, resp.json
+            return elapsed
+
+        event.listen(engine, "before_cursor_execute", count)
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = sorted(pool.map(request, range(requests)))
+        wall = time.perf_counter() - began
+        event.remove(engine, "before_cursor_execute", count)
+
+    return {
+        "user_cache": use_cache,
+        "requests": requests,
+        "concurrency": concurrency,
+        "requests_per_second": round(requests / wall, 1),
+        "p50_ms": round(percentile(samples, 0.50), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+        "queries_per_request": round(len(statements) / requests, 3),
+        "cache_stats": Users.get_user_cache_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Authenticated requests per run (default: 2000)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default: 8)")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = [run(use_cache, args.requests, args.concurrency) for use_cache in (False, True)]
+    for entry in report:
+        print(json.dumps(entry))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
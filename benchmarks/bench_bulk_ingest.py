@@ -0,0 +1,90 @@
+"""
+Benchmark bulk snapshot ingestion against one ORM object and commit per row.
+
+Loads a synthetic 40-entry /forecast payload per city through
+Locations.bulk_ingest and, for a smaller sample, through session.add/commit.
+
+Usage:
+    python -m benchmarks.bench_bulk_ingest --cities 1000 --entries 40
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app import create_app
+from weather.db import db
+from weather.models.locations_model import Locations
+
+
+def make_config(db_path: str):
+    class BenchConfig:
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+    return BenchConfig
+
+
+def forecast_payloads(cities: int, entries: int) -> list:
+    return [
+        {
+            "city": {"name": f"City{c}", "coord": {"lat": (c % 180) - 89.5, "lon": (c % 360) - 179.5}},
+            "list": [
+                {
+                    "dt": 1700000000 + 10800 * e,
+                    "main": {"temp": 280 + e % 10, "feels_like": 279 + e % 10, "pressure": 1012, "humidity": 60},
+                    "weather": [{"main": "Clouds", "description": "scattered clouds"}],
+                }
+                for e in range(entries)
+            ],
+        }
+        for c in range(cities)
+    ]
+
+
+def run(cities: int, entries: int, batch_size: int, orm_cities: int) -> dict:
+    payloads = forecast_payloads(cities, entries)
+    report = {"cities": cities, "entries": entries, "rows": cities * entries}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(make_config(os.path.join(tmp, "bulk.db")))
+        with app.app_context():
+            began = time.perf_counter()
+            Locations.bulk_ingest(payloads, batch_size=batch_size)
+            elapsed = time.perf_counter() - began
+            report["bulk"] = {"seconds": round(elapsed, 3), "rows_per_second": round(cities * entries / elapsed)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(make_config(os.path.join(tmp, "orm.db")))
+        with app.app_context():
+            rows = [row for payload in payloads[:orm_cities] for row in Locations.rows_from_forecast_payload(payload)]
+            began = time.perf_counter()
+            for row in rows:
+                db.session.add(Locations(**row))
+                db.session.commit()
+            elapsed = time.perf_counter() - began
+            report["orm_per_row"] = {"rows": len(rows), "seconds": round(elapsed, 3),
+                                     "rows_per_second": round(len(rows) / elapsed)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=1000, help="Number of cities (default: 1000)")
+    parser.add_argument("--entries", type=int, default=40, help="Forecast entries per city (default: 40)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per executemany batch (default: 1000)")
+    parser.add_argument("--orm-cities", type=int, default=25,
+                        help="Cities loaded through the per-row ORM path for comparison (default: 25)")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = run(args.cities, args.entries, args.batch_size, args.orm_cities)
+    print(json.dumps(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
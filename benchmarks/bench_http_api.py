@@ -0,0 +1,309 @@
+"""
+Load-test the HTTP API in-process against a stubbed OpenWeatherMap server.
+
+The app is built with create_app on a fresh SQLite file, weather_data is seeded
+with hourly snapshots for a set of locations, and each scenario sends requests
+from a pool of client threads, each logged in as its own user. Scenarios, in
+order:
+
+    login            POST /api/login
+    favorites_add    POST /api/get-weather-from-favorite (adds a seeded location)
+    favorites_list   GET  /api/get-all-locations-from-favorite
+    current_weather  GET  /api/get-current-weather-for-favorites (upstream is the stub)
+    history          GET  /api/get-weather-from-location-history/... (one page of rows)
+    history_daily    GET  the same route with interval=day
+    reset            DELETE /api/reset-locations (one at a time, reseeded before each run)
+
+Throughput, error count and p50/p95/p99 latency are reported per scenario. The
+JSON report records the git commit and settings, and --compare prints the change
+against an earlier report.
+
+Usage:
+    python -m benchmarks.bench_http_api --rows 100000 --concurrency 8 --output results/http_api.json
+    python -m benchmarks.bench_http_api --compare results/http_api.json
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+
+from app import create_app
+from benchmarks.stub_weather_api import StubWeatherAPI
+from weather.db import db
+from weather.models.locations_model import Locations
+from weather.models.user_model import Users
+
+SCENARIOS = ("login", "favorites_add", "favorites_list", "current_weather", "history", "history_daily", "reset")
+PASSWORD = "bench-password"
+
+
+def make_config(db_path: str):
+    class BenchConfig:
+        TESTING = True
+        SECRET_KEY = "bench-secret-key"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+    return BenchConfig
+
+
+def percentile(samples: list, pct: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def location_keys(locations: int) -> list:
+    # get-weather-from-favorite parses longitude as an integer, so seeded longitudes are whole degrees
+    rng = random.Random(42)
+    return [(f"City{i}", round(rng.uniform(-90, 90), 4), float(rng.randrange(-180, 181))) for i in range(locations)]
+
+
+def seed(rows: int, locations: int, batch: int = 20_000) -> None:
+    """Writes hourly snapshots round-robin over the locations, ending now."""
+    rng = random.Random(7)
+    keys = location_keys(locations)
+    hours = -(-rows // locations)
+    start = datetime.now(timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0) - timedelta(hours=hours)
+    chunk = []
+    for n in range(rows):
+        city, lat, lon = keys[n % locations]
+        chunk.append({"city_name": city, "latitude": lat, "longitude": lon,
+                      "time": start + timedelta(hours=n // locations),
+                      "temp": round(rng.uniform(-10, 35), 2), "feels_like": round(rng.uniform(-15, 35), 2),
+                      "pressure": 990 + rng.randrange(40), "humidity": rng.randrange(100),
+                      "weather_main": "Clear", "weather_description": "clear sky"})
+        if len(chunk) == batch:
+            Locations.ingest_rows(chunk)
+            chunk = []
+    if chunk:
+        Locations.ingest_rows(chunk)
+
+
+def git_commit() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def summarize(name: str, samples: list, errors: int, wall: float, concurrency: int) -> dict:
+    samples = sorted(samples)
+    total = len(samples) + errors
+    return {
+        "scenario": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "requests_per_second": round(total / wall, 1) if wall else None,
+        "errors": errors,
+        "p50_ms": round(percentile(samples, 0.50), 3) if samples else None,
+        "p95_ms": round(percentile(samples, 0.95), 3) if samples else None,
+        "p99_ms": round(percentile(samples, 0.99), 3) if samples else None,
+    }
+
+
+class LoadTest:
+    """Runs the scenarios against one app, with one logged-in client per worker thread."""
+
+    def __init__(self, app, users: list, keys: list, concurrency: int):
+        self.app = app
+        self.users = users
+        self.keys = keys
+        self.concurrency = concurrency
+        self._local = threading.local()
+        self._next_worker = 0
+        self._worker_lock = threading.Lock()
+
+    def worker(self):
+        """Returns this thread's state: its client, user, RNG and a per-scenario counter."""
+        local = self._local
+        if not hasattr(local, "client"):
+            with self._worker_lock:
+                index = self._next_worker
+                self._next_worker += 1
+            local.index = index
+            local.username = self.users[index]
+            local.rng = random.Random(index)
+            local.added = 0
+            local.client = self.app.test_client()
+            resp = local.client.post("/api/login", json={"username": local.username, "password": PASSWORD})
+            assert resp.status_code == 200, resp.json
+        return local
+
+    def run(self, name: str, send, requests: int) -> dict:
+        """Sends requests through send(worker) from the thread pool and summarises them."""
+        # Log every worker in before the clock starts
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            barrier = threading.Barrier(self.concurrency)
+
+            def warm(_):
+                self.worker()
+                barrier.wait()
+            list(pool.map(warm, range(self.concurrency)))
+
+            def request(_):
+                local = self.worker()
+                began = time.perf_counter()
+                status = send(local)
+                return (time.perf_counter() - began) * 1000, 200 <= status < 300
+
+            began = time.perf_counter()
+            results = list(pool.map(request, range(requests)))
+            wall = time.perf_counter() - began
+        self._local = threading.local()
+        self._next_worker = 0
+        samples = [elapsed for elapsed, ok in results if ok]
+        return summarize(name, samples, len(results) - len(samples), wall, self.concurrency)
+
+    # Scenarios: each takes the worker state and returns the response status
+
+    def login(self, local) -> int:
+        return local.client.post("/api/login", json={"username": local.username, "password": PASSWORD}).status_code
+
+    def favorites_add(self, local) -> int:
+        # Workers walk the locations from different offsets, so no user adds the same one twice
+        city, lat, lon = self.keys[(local.index * 7919 + local.added) % len(self.keys)]
+        local.added += 1
+        return local.client.post("/api/get-weather-from-favorite",
+                                 json={"city_name": city, "latitude": lat, "longitude": lon}).status_code
+
+    def favorites_list(self, local) -> int:
+        return local.client.get("/api/get-all-locations-from-favorite").status_code
+
+    def current_weather(self, local) -> int:
+        return local.client.get("/api/get-current-weather-for-favorites").status_code
+
+    def history(self, local) -> int:
+        city, lat, lon = self.keys[local.rng.randrange(len(self.keys))]
+        return local.client.get(f"/api/get-weather-from-location-history/{city}/{lat}/{lon}?limit=100").status_code
+
+    def history_daily(self, local) -> int:
+        city, lat, lon = self.keys[local.rng.randrange(len(self.keys))]
+        return local.client.get(
+            f"/api/get-weather-from-location-history/{city}/{lat}/{lon}?interval=day&limit=100").status_code
+
+
+def run_reset(app, rows: int, locations: int, runs: int) -> dict:
+    """Times reset-locations on a freshly seeded table, one request at a time."""
+    client = app.test_client()
+    samples = []
+    errors = 0
+    wall = 0.0
+    for _ in range(runs):
+        with app.app_context():
+            seed(rows, locations)
+        began = time.perf_counter()
+        status = client.delete("/api/reset-locations").status_code
+        elapsed = time.perf_counter() - began
+        wall += elapsed
+        if 200 <= status < 300:
+            samples.append(elapsed * 1000)
+        else:
+            errors += 1
+    return summarize("reset", samples, errors, wall, 1)
+
+
+def run(args) -> dict:
+    scenarios = args.scenarios.split(",")
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp, StubWeatherAPI(delay=args.upstream_delay_ms / 1000) as stub:
+        app = create_app(make_config(os.path.join(tmp, "http_api.db")))
+        users = [f"bench{i}" for i in range(args.concurrency)]
+        with app.app_context():
+            for username in users:
+                Users.create_user(username, PASSWORD)
+            began = time.perf_counter()
+            seed(args.rows, args.locations)
+            seed_seconds = time.perf_counter() - began
+
+        test = LoadTest(app, users, location_keys(args.locations), args.concurrency)
+        for name in scenarios:
+            if name == "reset":
+                continue
+            # Each user adds --favorites locations, which the later favorites scenarios read back
+            requests = args.concurrency * min(args.favorites, args.locations) if name == "favorites_add" else args.requests
+            upstream_before = stub.requests
+            result = test.run(name, getattr(test, name), requests)
+            if name == "current_weather":
+                result["upstream_requests"] = stub.requests - upstream_before
+            results.append(result)
+            print(json.dumps(result))
+
+        if "reset" in scenarios:
+            result = run_reset(app, args.rows, args.locations, args.reset_runs)
+            results.append(result)
+            print(json.dumps(result))
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+    return {
+        "benchmark": "http_api",
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"rows": args.rows, "locations": args.locations, "requests": args.requests,
+                     "concurrency": args.concurrency, "favorites": args.favorites,
+                     "upstream_delay_ms": args.upstream_delay_ms, "reset_runs": args.reset_runs},
+        "seed_seconds": round(seed_seconds, 2),
+        "scenarios": results,
+    }
+
+
+def compare(baseline: dict, report: dict) -> None:
+    """Prints throughput and p95 changes per scenario against a baseline report."""
+    previous = {entry["scenario"]: entry for entry in baseline.get("scenarios", [])}
+    print(f"Compared with {baseline.get('git', {}).get('commit')} ({baseline.get('created_at')}):")
+    if baseline.get("settings") != report["settings"]:
+        print(f"  Note: settings differ from the baseline's {baseline.get('settings')}")
+    for entry in report["scenarios"]:
+        before = previous.get(entry["scenario"])
+        if before is None:
+            continue
+        changes = []
+        for key in ("requests_per_second", "p95_ms"):
+            if before[key] and entry[key] is not None:
+                changes.append(f"{key} {before[key]} -> {entry[key]} ({(entry[key] / before[key] - 1) * 100:+.1f}%)")
+        print(f"  {entry['scenario']}: {', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000, help="Snapshots seeded in weather_data (default: 50000)")
+    parser.add_argument("--locations", type=int, default=100, help="Distinct seeded locations (default: 100)")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario (default: 2000)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients, one user each (default: 8)")
+    parser.add_argument("--favorites", type=int, default=10, help="Favorites added per user (default: 10)")
+    parser.add_argument("--upstream-delay-ms", type=float, default=20.0,
+                        help="Latency of the stub weather API (default: 20)")
+    parser.add_argument("--reset-runs", type=int, default=3, help="Timed reset-locations runs (default: 3)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    parser.add_argument("--compare", help="An earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark /api/login throughput and latency at different PBKDF2 costs.
+
+For each cost a fresh SQLite database is seeded with users, then logins are
+driven through the Flask test client from a pool of threads. Run with
+--no-verify-cache to measure the KDF on every login rather than the
+cached verification fast path.
+
+Usage:
+    python -m benchmarks.bench_login --costs 50000,100000,260000,600000 --concurrency 8
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import tempfile
+import threading
+import time
+
+from app import create_app
+from weather.models import user_model
+from weather.models.user_model import Users
+
+
+def make_config(db_path: str):
+    class BenchConfig:
+        TESTING = True
+        SECRET_KEY = "bench-secret-key"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+    return BenchConfig
+
+
+def percentile(samples: list, pct: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def run_cost(cost: int, users: int, requests: int, concurrency: int) -> dict:
+    user_model.PASSWORD_HASH_ITERATIONS = cost
+    user_model._verify_cache.clear()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(make_config(os.path.join(tmp, "login.db")))
+        with app.app_context():
+            for n in range(users):
+                Users.create_user(f"user{n}", f"password{n}")
+
+        local = threading.local()
+        counter = iter(range(requests))
+        lock = threading.Lock()
+
+        def login(_):
+            if not hasattr(local, "client"):
+                local.client = app.test_client()
+            with lock:
+                n = next(counter) % users
+            began = time.perf_counter()
+            resp = local.client.post("/api/login", json={"username": f"user{n}", "password": f"password{n}"})
+            elapsed = (time.perf_counter() - began) * 1000
+            assert resp.status_code == 200, resp.json
+            return elapsed
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = sorted(pool.map(login, range(requests)))
+        wall = time.perf_counter() - began
+
+    return {
+        "iterations": cost,
+        "requests": requests,
+        "concurrency": concurrency,
+        "logins_per_second": round(requests / wall, 1),
+        "p50_ms": round(percentile(samples, 0.50), 2),
+        "p95_ms": round(percentile(samples, 0.95), 2),
+        "p99_ms": round(percentile(samples, 0.99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--costs", default="50000,100000,260000",
+                        help="Comma-separated PBKDF2 iteration counts (default: 50000,100000,260000)")
+    parser.add_argument("--users", type=int, default=50, help="Distinct users logging in (default: 50)")
+    parser.add_argument("--requests", type=int, default=200, help="Logins per cost (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default: 8)")
+    parser.add_argument("--no-verify-cache", action="store_true", help="Disable the cached verification fast path")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    if args.no_verify_cache:
+        user_model.PASSWORD_VERIFY_CACHE_TTL = 0
+
+    report = []
+    for cost in (int(c) for c in args.costs.split(",")):
+        entry = run_cost(cost, args.users, args.requests, args.concurrency)
+        entry["verify_cache"] = not args.no_verify_cache
+        report.append(entry)
+        print(json.dumps(entry))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Measure nearest-location lookups on the grid index against a full scan.
+
+Locations are drawn half uniformly over the globe and half clustered around a
+few metro areas, to include dense cells. Each query point is a random stored
+location moved by up to --jitter-km, as a nearby request would be.
+
+Usage:
+    python -m benchmarks.bench_nearest --sizes 1000,10000,100000 --radius-km 5
+"""
+import argparse
+import json
+import math
+import random
+import time
+
+from weather.utils.geo_utils import KM_PER_DEGREE, GridIndex, haversine_km
+
+METROS = [(40.71, -74.01), (51.51, -0.13), (35.68, 139.69), (-23.55, -46.63), (28.61, 77.21), (42.36, -71.06)]
+
+
+def percentile(samples: list, pct: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def make_locations(size: int) -> list:
+    rng = random.Random(42)
+    locations = []
+    for i in range(size):
+        if i % 2:
+            lat, lon = METROS[i % len(METROS)]
+            lat, lon = lat + rng.gauss(0, 0.5), lon + rng.gauss(0, 0.5)
+        else:
+            lat, lon = math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+        locations.append((f"City{i}", round(max(-90, min(90, lat)), 4), round((lon + 180) % 360 - 180, 4)))
+    return locations
+
+
+def timed(fn, queries: list) -> list:
+    samples = []
+    for lat, lon in queries:
+        began = time.perf_counter()
+        fn(lat, lon)
+        samples.append((time.perf_counter() - began) * 1_000_000)
+    return sorted(samples)
+
+
+def run(size: int, queries: int, radius_km: float, jitter_km: float, cell_degrees: float, scan: bool) -> dict:
+    locations = make_locations(size)
+    rng = random.Random(7)
+    points = []
+    for _ in range(queries):
+        _, lat, lon = locations[rng.randrange(size)]
+        points.append((max(-90, min(90, lat + rng.uniform(-1, 1) * jitter_km / KM_PER_DEGREE)),
+                       max(-180, min(180, lon + rng.uniform(-1, 1) * jitter_km / KM_PER_DEGREE))))
+
+    index = GridIndex(cell_degrees)
+    began = time.perf_counter()
+    index.replace(locations)
+    build_ms = (time.perf_counter() - began) * 1000
+
+    samples = timed(lambda lat, lon: index.nearest(lat, lon, radius_km), points)
+    report = {
+        "locations": size,
+        "queries": queries,
+        "radius_km": radius_km,
+        "cell_degrees": cell_degrees,
+        "build_ms": round(build_ms, 1),
+        "grid_p50_us": round(percentile(samples, 0.50), 1),
+        "grid_p95_us": round(percentile(samples, 0.95), 1),
+        "grid_p99_us": round(percentile(samples, 0.99), 1),
+    }
+    if scan:
+        def full_scan(lat, lon):
+            return min(((haversine_km(lat, lon, loc[1], loc[2]), loc) for loc in locations), default=None)
+        scan_samples = timed(full_scan, points[:max(1, queries // 20)])
+        report["scan_p50_us"] = round(percentile(scan_samples, 0.50), 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated location counts")
+    parser.add_argument("--queries", type=int, default=10_000, help="Lookups per size (default: 10000)")
+    parser.add_argument("--radius-km", type=float, default=5.0, help="Search radius (default: 5)")
+    parser.add_argument("--jitter-km", type=float, default=3.0, help="Query offset from a stored location (default: 3)")
+    parser.add_argument("--cell-degrees", type=float, default=0.05, help="Grid cell size (default: 0.05)")
+    parser.add_argument("--no-scan", action="store_true", help="Skip the full-scan comparison")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = [run(int(size), args.queries, args.radius_km, args.jitter_km, args.cell_degrees, not args.no_scan)
+              for size in args.sizes.split(",")]
+    for entry in report:
+        print(json.dumps(entry))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
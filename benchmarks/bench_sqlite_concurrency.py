@@ -0,0 +1,177 @@
+"""
+Concurrent read/write throughput on SQLite with and without the pragma profile.
+
+Writer threads insert small batches of snapshots and commit while reader
+threads run a recent-history query for a random location, all for a fixed
+duration against the same database file.
+
+The "default" profile opens a plain sqlite3 connection per operation, as
+get_db_connection used to (rollback journal, synchronous=FULL). The "tuned"
+profile borrows connections from SQLiteConnectionPool, which applies the
+configured pragmas (WAL, synchronous=NORMAL, busy_timeout, mmap and cache size).
+
+Usage:
+    python -m benchmarks.bench_sqlite_concurrency --readers 8 --writers 2 --duration 10
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from weather.utils.sql_utils import SQLiteConnectionPool, pragma_profile
+
+SCHEMA = """
+CREATE TABLE weather_data (
+    id INTEGER PRIMARY KEY,
+    city_name TEXT NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    time TEXT NOT NULL,
+    temp REAL,
+    humidity INTEGER
+);
+CREATE INDEX ix_weather_data_location_time ON weather_data (city_name, latitude, longitude, time);
+"""
+
+INSERT = "INSERT INTO weather_data (city_name, latitude, longitude, time, temp, humidity) VALUES (?, ?, ?, ?, ?, ?)"
+QUERY = ("SELECT time, temp, humidity FROM weather_data WHERE city_name = ? AND latitude = ? AND longitude = ? "
+         "ORDER BY time DESC LIMIT 48")
+
+
+def percentile(samples: list, pct: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def location_keys(locations: int) -> list:
+    rng = random.Random(42)
+    return [(f"City{i}", round(rng.uniform(-90, 90), 4), round(rng.uniform(-180, 180), 4)) for i in range(locations)]
+
+
+def snapshot(rng: random.Random, key: tuple, when: datetime) -> tuple:
+    return (*key, when.isoformat(), round(rng.uniform(-10, 35), 2), rng.randrange(100))
+
+
+def seed(db_path: str, rows: int, locations: int) -> None:
+    rng = random.Random(7)
+    keys = location_keys(locations)
+    start = datetime(2024, 1, 1)
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(SCHEMA)
+        conn.executemany(INSERT, (snapshot(rng, keys[n % locations], start + timedelta(hours=n // locations))
+                                  for n in range(rows)))
+    conn.close()
+
+
+def make_connection(profile: str, db_path: str, pool_size: int):
+    """Returns a context manager factory handing out one connection per operation."""
+    if profile == "tuned":
+        pool = SQLiteConnectionPool(db_path, size=pool_size)
+        return pool.connection, pool.close
+
+    @contextmanager
+    def per_call():
+        conn = sqlite3.connect(db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    return per_call, lambda: None
+
+
+def run(profile: str, rows: int, locations: int, readers: int, writers: int, batch: int,
+        duration: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, f"{profile}.db")
+        seed(db_path, rows, locations)
+        connection, close = make_connection(profile, db_path, readers + writers)
+        keys = location_keys(locations)
+        stop = threading.Event()
+        lock = threading.Lock()
+        latencies = {"read": [], "write": []}
+        locked = {"read": 0, "write": 0}
+        other_errors = []
+
+        def worker(kind: str, seed_value: int):
+            rng = random.Random(seed_value)
+            samples = []
+            errors = 0
+            clock = datetime(2030, 1, 1) + timedelta(days=seed_value)
+            while not stop.is_set():
+                key = keys[rng.randrange(locations)]
+                began = time.perf_counter()
+                try:
+                    with connection() as conn:
+                        if kind == "write":
+                            clock += timedelta(seconds=batch)
+                            conn.executemany(INSERT, [snapshot(rng, key, clock + timedelta(seconds=i))
+                                                      for i in range(batch)])
+                            conn.commit()
+                        else:
+                            conn.execute(QUERY, key).fetchall()
+                except sqlite3.OperationalError as e:
+                    if "locked" not in str(e) and "busy" not in str(e):
+                        other_errors.append(str(e))
+                    errors += 1
+                    continue
+                samples.append((time.perf_counter() - began) * 1000)
+            with lock:
+                latencies[kind].extend(samples)
+                locked[kind] += errors
+
+        threads = [threading.Thread(target=worker, args=("write", n)) for n in range(writers)]
+        threads += [threading.Thread(target=worker, args=("read", 1000 + n)) for n in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        close()
+
+    report = {"profile": profile, "readers": readers, "writers": writers, "write_batch": batch,
+              "duration_seconds": duration}
+    if profile == "tuned":
+        report["pragmas"] = pragma_profile()
+    for kind in ("read", "write"):
+        samples = sorted(latencies[kind])
+        report[kind] = {
+            "ops": len(samples),
+            "ops_per_second": round(len(samples) / duration, 1),
+            "locked_errors": locked[kind],
+            "p50_ms": round(percentile(samples, 0.50), 2) if samples else None,
+            "p95_ms": round(percentile(samples, 0.95), 2) if samples else None,
+            "p99_ms": round(percentile(samples, 0.99), 2) if samples else None,
+        }
+    if other_errors:
+        report["other_errors"] = sorted(set(other_errors))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="Snapshots seeded before the run (default: 100000)")
+    parser.add_argument("--locations", type=int, default=100, help="Distinct locations (default: 100)")
+    parser.add_argument("--readers", type=int, default=8, help="Reader threads (default: 8)")
+    parser.add_argument("--writers", type=int, default=2, help="Writer threads (default: 2)")
+    parser.add_argument("--batch", type=int, default=10, help="Rows inserted per write transaction (default: 10)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per profile (default: 10)")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = [run(profile, args.rows, args.locations, args.readers, args.writers, args.batch, args.duration)
+              for profile in ("default", "tuned")]
+    for entry in report:
+        print(json.dumps(entry))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Compare database size and range-scan speed of row and compact weather storage.
+
+For each storage option a fresh SQLite file is filled through
+Locations.ingest_rows with hourly snapshots spread over a set of locations,
+then vacuumed and measured. Range scans page through one location's full
+history with get_weather_range, downsample it with get_weather_aggregates,
+and stream the whole table with iter_export.
+
+Usage:
+    python -m benchmarks.bench_storage --rows 1000000 --locations 100
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from app import create_app
+from weather.db import db
+from weather.models.compact_model import CompactStore
+from weather.models.locations_model import Locations
+
+CONDITIONS = [("Clear", "clear sky"), ("Clouds", "overcast clouds"), ("Rain", "light rain"),
+              ("Snow", "light snow"), ("Clouds", "scattered clouds")]
+
+
+def make_config(db_path: str, storage: str):
+    class BenchConfig:
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WEATHER_STORAGE = storage
+    return BenchConfig
+
+
+def location_keys(locations: int) -> list:
+    rng = random.Random(42)
+    return [(f"City{i}", round(rng.uniform(-90, 90), 4), round(rng.uniform(-180, 180), 4)) for i in range(locations)]
+
+
+def generate(rows: int, locations: int, batch: int = 20_000):
+    """Yields batches of rows, one hourly snapshot per location per hour."""
+    rng = random.Random(7)
+    keys = location_keys(locations)
+    start = datetime(2020, 1, 1)
+    chunk = []
+    for n in range(rows):
+        city, lat, lon = keys[n % locations]
+        main, description = CONDITIONS[rng.randrange(len(CONDITIONS))]
+        chunk.append({"city_name": city, "latitude": lat, "longitude": lon,
+                      "time": start + timedelta(hours=n // locations),
+                      "temp": round(rng.uniform(-10, 35), 2), "feels_like": round(rng.uniform(-15, 35), 2),
+                      "pressure": 990 + rng.randrange(40), "humidity": rng.randrange(100),
+                      "weather_main": main, "weather_description": description})
+        if len(chunk) == batch:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def timed(fn, repeat: int) -> float:
+    """Returns the best wall time of fn in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - began)
+    return round(best * 1000, 2)
+
+
+def run(storage: str, rows: int, locations: int, repeat: int) -> dict:
+    CompactStore.clear_cache()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, f"{storage}.db")
+        app = create_app(make_config(db_path, storage))
+        with app.app_context():
+            began = time.perf_counter()
+            for batch in generate(rows, locations):
+                Locations.ingest_rows(batch)
+            ingest_seconds = time.perf_counter() - began
+
+            with db.engine.connect() as conn:
+                conn.execute(text("VACUUM"))
+                conn.execute(text("ANALYZE"))
+            size = os.path.getsize(db_path)
+
+            city, lat, lon = location_keys(locations)[0]
+
+            def page_history():
+                cursor = None
+                while True:
+                    _, cursor = Locations.get_weather_range(city, lat, lon, limit=1000, after=cursor)
+                    if cursor is None:
+                        break
+
+            def downsample():
+                Locations.get_weather_aggregates(city, lat, lon, "day", limit=1000)
+
+            def export_all():
+                for _ in Locations.iter_export():
+                    pass
+
+            report = {
+                "storage": storage,
+                "rows": rows,
+                "locations": locations,
+                "ingest_rows_per_second": round(rows / ingest_seconds),
+                "db_bytes": size,
+                "bytes_per_row": round(size / rows, 1),
+                "range_scan_location_ms": timed(page_history, repeat),
+                "daily_aggregates_location_ms": timed(downsample, repeat),
+                "export_all_ms": timed(export_all, 1),
+            }
+            db.session.remove()
+            db.engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="Snapshots to store (default: 200000)")
+    parser.add_argument("--locations", type=int, default=50, help="Distinct locations (default: 50)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions, best is kept (default: 5)")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = [run(storage, args.rows, args.locations, args.repeat) for storage in ("row", "compact")]
+    for entry in report:
+        print(json.dumps(entry))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Request latency while the weather API is slow, with and without the upstream guards.
+
+Current weather is cached for a set of cities while the stub API is fast. The
+cache entries are then expired and the stub slowed down, and client threads
+request the same cities again:
+
+    unguarded    the circuit breaker never trips and there is no rate limit, so
+                 every request waits on upstream
+    guarded      the configured breaker (WEATHER_BREAKER_*) and rate limiter
+                 (WEATHER_RATE_LIMIT_*); once the breaker opens, requests get the
+                 last cached value marked stale
+
+Latency percentiles, stale responses, errors and upstream calls are reported per mode.
+
+Usage:
+    python -m benchmarks.bench_upstream_outage --cities 50 --requests 200 --concurrency 16 --upstream-delay-ms 3000
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import time
+
+from benchmarks.stub_weather_api import StubWeatherAPI
+from weather.utils import api_utils
+from weather.utils.resilience_utils import CircuitBreaker, TokenBucket
+
+MODES = ("unguarded", "guarded")
+
+
+def percentile(samples: list, pct: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def guards(mode: str):
+    """Returns the (breaker, rate limiter) pair a mode runs with."""
+    if mode == "unguarded":
+        return (CircuitBreaker(slow_call_seconds=float("inf"), failure_rate=1.0, min_calls=20),
+                TokenBucket(rate=1e9, capacity=1e9))
+    return (CircuitBreaker(failure_rate=api_utils.WEATHER_BREAKER_FAILURE_RATE, window=api_utils.WEATHER_BREAKER_WINDOW,
+                           min_calls=api_utils.WEATHER_BREAKER_MIN_CALLS,
+                           slow_call_seconds=api_utils.WEATHER_BREAKER_SLOW_CALL,
+                           reset_timeout=api_utils.WEATHER_BREAKER_RESET_TIMEOUT),
+            TokenBucket(rate=api_utils.WEATHER_RATE_LIMIT_PER_MINUTE / 60, capacity=api_utils.WEATHER_RATE_LIMIT_BURST))
+
+
+def run(mode: str, cities: int, requests: int, concurrency: int, delay: float) -> dict:
+    names = [f"City{i}" for i in range(cities)]
+    with StubWeatherAPI() as stub:
+        for name in names:
+            api_utils.get_current_weather(name)
+        api_utils.weather_cache.ttl = api_utils.weather_cache.stale_ttl = 0
+        api_utils.breaker, api_utils.rate_limiter = guards(mode)
+        stub.delay = delay
+        upstream_before = stub.requests
+
+        def request(n: int):
+            began = time.perf_counter()
+            try:
+                stale = api_utils.get_current_weather(names[n % cities]).get("stale", False)
+                ok = True
+            except RuntimeError:
+                stale, ok = False, False
+            return (time.perf_counter() - began) * 1000, ok, stale
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(request, range(requests)))
+        wall = time.perf_counter() - began
+        upstream = stub.requests - upstream_before
+        breaker_stats = api_utils.breaker.stats()
+
+    samples = sorted(elapsed for elapsed, _, _ in results)
+    return {
+        "mode": mode,
+        "requests": requests,
+        "concurrency": concurrency,
+        "upstream_delay_ms": round(delay * 1000),
+        "wall_seconds": round(wall, 2),
+        "p50_ms": round(percentile(samples, 0.50), 2),
+        "p95_ms": round(percentile(samples, 0.95), 2),
+        "max_ms": round(samples[-1], 2),
+        "stale_responses": sum(1 for _, _, stale in results if stale),
+        "errors": sum(1 for _, ok, _ in results if not ok),
+        "upstream_requests": upstream,
+        "breaker_opened": breaker_stats["opened"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=50, help="Distinct cities requested (default: 50)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per mode (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Client threads (default: 16)")
+    parser.add_argument("--upstream-delay-ms", type=float, default=3000.0,
+                        help="Latency of the slowed-down stub weather API (default: 3000)")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    weather_cache = (api_utils.weather_cache.ttl, api_utils.weather_cache.stale_ttl)
+    breaker, rate_limiter = api_utils.breaker, api_utils.rate_limiter
+    report = []
+    try:
+        for mode in MODES:
+            entry = run(mode, args.cities, args.requests, args.concurrency, args.upstream_delay_ms / 1000)
+            api_utils.weather_cache.ttl, api_utils.weather_cache.stale_ttl = weather_cache
+            report.append(entry)
+            print(json.dumps(entry))
+    finally:
+        api_utils.weather_cache.ttl, api_utils.weather_cache.stale_ttl = weather_cache
+        api_utils.breaker, api_utils.rate_limiter = breaker, rate_limiter
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
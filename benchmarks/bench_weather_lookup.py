@@ -0,0 +1,120 @@
+"""
+Benchmark latest-snapshot and history lookups on weather_data as the table grows.
+
+Each size gets a fresh SQLite file populated through the raw sqlite3 driver,
+then Locations.get_current_weather (served from latest_weather) and
+Locations.get_weather_history are timed with and without the composite
+(city_name, latitude, longitude, time DESC) index.
+
+Usage:
+    python -m benchmarks.bench_weather_lookup --sizes 10000,100000,1000000,10000000
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from app import create_app
+from weather.models.locations_model import LatestWeather, Locations
+
+INDEX_NAME = "ix_weather_data_location_time"
+CONDITIONS = [("Clear", "clear sky"), ("Clouds", "overcast clouds"), ("Rain", "light rain")]
+
+
+def make_config(db_path: str):
+    class BenchConfig:
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+    return BenchConfig
+
+
+def populate(db_path: str, rows: int, locations: int, batch: int = 50_000) -> list:
+    """Insert rows spread over a fixed set of locations, one hourly snapshot each."""
+    rng = random.Random(42)
+    keys = [(f"City{i}", round(rng.uniform(-90, 90), 4), round(rng.uniform(-180, 180), 4)) for i in range(locations)]
+    start = datetime(2020, 1, 1)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    sql = ("INSERT INTO weather_data (city_name, latitude, longitude, time, temp, feels_like, pressure, "
+           "humidity, weather_main, weather_description) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+    for offset in range(0, rows, batch):
+        chunk = []
+        for n in range(offset, min(offset + batch, rows)):
+            city, lat, lon = keys[n % locations]
+            main, description = CONDITIONS[n % len(CONDITIONS)]
+            when = start + timedelta(hours=n // locations)
+            chunk.append((city, lat, lon, when.strftime("%Y-%m-%d %H:%M:%S.000000"),
+                          rng.uniform(-10, 35), rng.uniform(-15, 35), 1000 + n % 40, n % 100, main, description))
+        conn.executemany(sql, chunk)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return keys
+
+
+def time_lookups(keys: list, iterations: int) -> dict:
+    """Time both lookup paths over random keys and return latency percentiles in ms."""
+    rng = random.Random(7)
+    results = {}
+    for name, lookup in (("current", Locations.get_current_weather), ("history", Locations.get_weather_history)):
+        samples = []
+        for _ in range(iterations):
+            city, lat, lon = rng.choice(keys)
+            began = time.perf_counter()
+            lookup(city, lat, lon)
+            samples.append((time.perf_counter() - began) * 1000)
+        samples.sort()
+        results[name] = {
+            "p50_ms": round(statistics.median(samples), 4),
+            "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 4),
+            "mean_ms": round(statistics.fmean(samples), 4),
+        }
+    return results
+
+
+def run(sizes: list, locations: int, iterations: int, compare: bool) -> list:
+    report = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            app = create_app(make_config(db_path))
+            keys = populate(db_path, size, min(locations, size))
+            with app.app_context():
+                LatestWeather.rebuild()
+                entry = {"rows": size, "indexed": time_lookups(keys, iterations)}
+                if compare:
+                    conn = sqlite3.connect(db_path)
+                    conn.execute(f"DROP INDEX {INDEX_NAME}")
+                    conn.close()
+                    entry["unindexed"] = time_lookups(keys, max(1, iterations // 10))
+            report.append(entry)
+            print(json.dumps(entry))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated row counts (default: 10000,100000,1000000)")
+    parser.add_argument("--locations", type=int, default=1000, help="Distinct locations (default: 1000)")
+    parser.add_argument("--iterations", type=int, default=500, help="Lookups per path (default: 500)")
+    parser.add_argument("--compare", action="store_true", help="Also time lookups after dropping the index")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = run([int(s) for s in args.sizes.split(",")], args.locations, args.iterations, args.compare)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+A local stand-in for the OpenWeatherMap /weather, /forecast and geocoding endpoints, for benchmarks.
+
+Every city resolves to the same coordinates; requests made by coordinates are
+named after them. While it runs, the weather client's rate limiter is lifted,
+since the stub has no quota. Responses can be delayed to model
+upstream latency, and every request is counted.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from weather.utils import api_utils
+from weather.utils.resilience_utils import TokenBucket
+
+
+class StubWeatherAPI:
+    """Serves canned weather payloads on 127.0.0.1 from a background thread."""
+
+    def __init__(self, delay: float = 0.0):
+        """
+        Args:
+            delay (float): Seconds to wait before each response.
+        """
+        self.delay = delay
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._previous = None
+
+    def weather(self, city: str) -> dict:
+        return {
+            "coord": {"lat": 10.0, "lon": 20.0},
+            "weather": [{"main": "Clear", "description": "clear sky"}],
+            "main": {"temp": 21.5, "feels_like": 20.0, "pressure": 1012, "humidity": 40},
+            "dt": 1700000000,
+            "name": city,
+        }
+
+    def forecast(self, city: str, cnt: int) -> dict:
+        return {
+            "city": {"name": city, "coord": {"lat": 10.0, "lon": 20.0}},
+            "list": [
+                {
+                    "dt": 1700000000 + 10800 * (i + 1),
+                    "main": {"temp": 22.0 + i, "feels_like": 21.0 + i, "pressure": 1010, "humidity": 45},
+                    "weather": [{"main": "Clouds", "description": "few clouds"}],
+                }
+                for i in range(cnt)
+            ],
+        }
+
+    def geocode(self, city: str) -> list:
+        return [{"name": city.split(",")[0], "lat": 10.0, "lon": 20.0}] if city else []
+
+    def start(self) -> str:
+        """Starts the server and points api_utils at it.
+
+        Returns:
+            str: The base URL the weather client now uses.
+        """
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                with stub._lock:
+                    stub.requests += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                city = params.get("q") or f"{params.get('lat')},{params.get('lon')}"
+                if url.path.endswith("/weather"):
+                    body = stub.weather(city)
+                elif url.path.endswith("/forecast"):
+                    body = stub.forecast(city, int(params.get("cnt", 5)))
+                elif url.path.endswith("/direct"):
+                    body = stub.geocode(params.get("q", ""))
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler, bind_and_activate=False)
+        # The default listen backlog of 5 drops connections from large concurrent batches
+        self._server.request_queue_size = 1024
+        self._server.server_bind()
+        self._server.server_activate()
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+        self._previous = (api_utils.WEATHER_API_BASE_URL, api_utils.GEOCODING_API_BASE_URL, api_utils.WEATHER_API_KEY,
+                          api_utils.rate_limiter)
+        api_utils.WEATHER_API_BASE_URL = f"http://127.0.0.1:{self._server.server_port}/data/2.5"
+        api_utils.GEOCODING_API_BASE_URL = f"http://127.0.0.1:{self._server.server_port}/geo/1.0"
+        api_utils.WEATHER_API_KEY = "bench-key"
+        api_utils.rate_limiter = TokenBucket(rate=1e9, capacity=1e9)
+        api_utils.breaker.reset()
+        api_utils.client.close()
+        api_utils.weather_cache.clear()
+        return api_utils.WEATHER_API_BASE_URL
+
+    def stop(self) -> None:
+        """Stops the server and restores the weather client settings."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        (api_utils.WEATHER_API_BASE_URL, api_utils.GEOCODING_API_BASE_URL, api_utils.WEATHER_API_KEY,
+         api_utils.rate_limiter) = self._previous
+        api_utils.breaker.reset()
+        api_utils.client.close()
+        api_utils.weather_cache.clear()
+
+    def __enter__(self) -> "StubWeatherAPI":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
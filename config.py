@@ -1,5 +1,54 @@
 import os
 
+from sqlalchemy.engine import make_url
+
+# Connection pool for the SQLAlchemy engine, per process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Seconds after which a pooled connection is replaced, below the server's idle timeout (-1 disables)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test each connection with a round trip when it is checked out, so dropped connections are replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Server-side limit per statement, in milliseconds (0 disables; PostgreSQL and MySQL only)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+
+def engine_options(database_uri: str) -> dict:
+    """
+    Builds SQLALCHEMY_ENGINE_OPTIONS for a database URI from the DB_* settings.
+
+    In-memory SQLite keeps Flask-SQLAlchemy's single shared connection, and the
+    statement timeout is only set for backends that support one per session.
+
+    Args:
+        database_uri (str): The SQLAlchemy database URI.
+
+    Returns:
+        dict: Keyword arguments for sqlalchemy.create_engine.
+    """
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        if backend == "postgresql":
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+        elif backend in ("mysql", "mariadb"):
+            variable = "max_statement_time" if backend == "mariadb" else "max_execution_time"
+            value = DB_STATEMENT_TIMEOUT_MS / 1000 if backend == "mariadb" else DB_STATEMENT_TIMEOUT_MS
+            options["connect_args"] = {"init_command": f"SET SESSION {variable}={value}"}
+    return options
+
+
 class ProductionConfig():
     """Production configuration."""
     DEBUG = False
@@ -17,6 +66,12 @@ class ProductionConfig():
         # This will create/use weather.db alongside app.py
         f"sqlite:///{os.path.abspath(os.path.join(os.path.dirname(__file__), 'weather.db'))}"
     )
+    # Pool sizing, recycling, pre-ping and statement timeout, for SQLite or a server database
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Run the favorites refresh scheduler inside the web process instead of worker.py
+    WEATHER_REFRESH_IN_PROCESS = os.getenv("WEATHER_REFRESH_IN_PROCESS", "false").lower() == "true"
+    # "row" stores snapshots in weather_data; "compact" dictionary-encodes them (see compact_model)
+    WEATHER_STORAGE = os.getenv("WEATHER_STORAGE", "row")
    
 
 class TestConfig():
@@ -14,7 +14,13 @@
 -- CREATE INDEX idx_songs_year ON songs(year);
 -- CREATE INDEX idx_songs_play_count ON songs(play_count);
 
-DROP TABLE IF EXISTS weather_data (
+DROP TABLE IF EXISTS latest_weather;
+DROP TABLE IF EXISTS weather_data;
+DROP TABLE IF EXISTS weather_snapshots;
+DROP TABLE IF EXISTS location_dim;
+DROP TABLE IF EXISTS weather_conditions;
+DROP TABLE IF EXISTS geocoding_cache;
+CREATE TABLE weather_data (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     latitude REAL NOT NULL,       -- from user input / coord.lat
     longitude REAL NOT NULL,      -- from user input /coord.lon
@@ -28,4 +34,59 @@ DROP TABLE IF EXISTS weather_data (
     weather_description TEXT     -- weather[0].description
 );
 
+-- Serves the "latest snapshot" and "recent history" lookups by compound key
+CREATE INDEX IF NOT EXISTS ix_weather_data_location_time
+    ON weather_data(city_name, latitude, longitude, time DESC);
+
+-- Most recent snapshot per location, maintained by the app on every write
+CREATE TABLE latest_weather (
+    city_name TEXT NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    snapshot_id INTEGER NOT NULL REFERENCES weather_data(id),
+    time DATETIME NOT NULL,
+    PRIMARY KEY (city_name, latitude, longitude)
+);
+
+-- Dictionary-encoded snapshots, used instead of weather_data with WEATHER_STORAGE=compact
+CREATE TABLE location_dim (
+    id INTEGER PRIMARY KEY,
+    city_name TEXT NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    CONSTRAINT uq_location_dim_location UNIQUE (city_name, latitude, longitude)
+);
+
+CREATE TABLE weather_conditions (
+    id INTEGER PRIMARY KEY,
+    main TEXT NOT NULL,
+    description TEXT NOT NULL,
+    CONSTRAINT uq_weather_conditions_main_description UNIQUE (main, description)
+);
+
+CREATE TABLE weather_snapshots (
+    id INTEGER PRIMARY KEY,
+    location_id INTEGER NOT NULL REFERENCES location_dim(id),
+    time INTEGER NOT NULL,        -- Unix seconds, UTC
+    temp INTEGER,                 -- hundredths of a degree
+    feels_like INTEGER,           -- hundredths of a degree
+    pressure INTEGER,
+    humidity INTEGER,
+    condition_id INTEGER REFERENCES weather_conditions(id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_weather_snapshots_location_time
+    ON weather_snapshots(location_id, time);
+
+-- City names resolved by the geocoding API, keyed by the case-folded, whitespace-collapsed name
+CREATE TABLE geocoding_cache (
+    normalized_name TEXT PRIMARY KEY,
+    name TEXT NOT NULL,           -- name
+    country TEXT,                 -- country
+    state TEXT,                   -- state
+    latitude REAL NOT NULL,       -- lat, quantized
+    longitude REAL NOT NULL,      -- lon, quantized
+    created_at DATETIME NOT NULL
+);
+
 --might want units parameter assume Imperial for F
@@ -0,0 +1,6 @@
+-- Adds the composite lookup index to an existing weather_data table.
+-- Safe to run more than once. The app also creates it on startup.
+CREATE INDEX IF NOT EXISTS ix_weather_data_location_time
+    ON weather_data(city_name, latitude, longitude, time DESC);
+
+ANALYZE weather_data;
@@ -0,0 +1,24 @@
+-- Adds latest_weather and fills it from the existing weather_data rows.
+-- Safe to run more than once. Requires SQLite 3.25+ for window functions.
+CREATE TABLE IF NOT EXISTS latest_weather (
+    city_name TEXT NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    snapshot_id INTEGER NOT NULL REFERENCES weather_data(id),
+    time DATETIME NOT NULL,
+    PRIMARY KEY (city_name, latitude, longitude)
+);
+
+DELETE FROM latest_weather;
+
+INSERT INTO latest_weather (city_name, latitude, longitude, snapshot_id, time)
+SELECT city_name, latitude, longitude, id, time
+FROM (
+    SELECT id, city_name, latitude, longitude, time,
+           ROW_NUMBER() OVER (
+               PARTITION BY city_name, latitude, longitude
+               ORDER BY time DESC, id DESC
+           ) AS rank
+    FROM weather_data
+)
+WHERE rank = 1;
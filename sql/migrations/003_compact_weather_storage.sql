@@ -0,0 +1,49 @@
+-- Adds the dictionary-encoded tables used with WEATHER_STORAGE=compact and
+-- copies the existing weather_data rows into them, keeping their ids.
+-- Safe to run more than once; rows already copied are skipped.
+CREATE TABLE IF NOT EXISTS location_dim (
+    id INTEGER PRIMARY KEY,
+    city_name TEXT NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    CONSTRAINT uq_location_dim_location UNIQUE (city_name, latitude, longitude)
+);
+
+CREATE TABLE IF NOT EXISTS weather_conditions (
+    id INTEGER PRIMARY KEY,
+    main TEXT NOT NULL,
+    description TEXT NOT NULL,
+    CONSTRAINT uq_weather_conditions_main_description UNIQUE (main, description)
+);
+
+CREATE TABLE IF NOT EXISTS weather_snapshots (
+    id INTEGER PRIMARY KEY,
+    location_id INTEGER NOT NULL REFERENCES location_dim(id),
+    time INTEGER NOT NULL,        -- Unix seconds, UTC
+    temp INTEGER,                 -- hundredths of a degree
+    feels_like INTEGER,           -- hundredths of a degree
+    pressure INTEGER,
+    humidity INTEGER,
+    condition_id INTEGER REFERENCES weather_conditions(id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_weather_snapshots_location_time
+    ON weather_snapshots(location_id, time);
+
+INSERT OR IGNORE INTO location_dim (city_name, latitude, longitude)
+SELECT DISTINCT city_name, latitude, longitude FROM weather_data;
+
+INSERT OR IGNORE INTO weather_conditions (main, description)
+SELECT DISTINCT COALESCE(weather_main, ''), COALESCE(weather_description, '')
+FROM weather_data
+WHERE weather_main IS NOT NULL OR weather_description IS NOT NULL;
+
+INSERT OR IGNORE INTO weather_snapshots (id, location_id, time, temp, feels_like, pressure, humidity, condition_id)
+SELECT w.id, l.id, CAST(strftime('%s', w.time) AS INTEGER),
+       CAST(ROUND(w.temp * 100) AS INTEGER), CAST(ROUND(w.feels_like * 100) AS INTEGER),
+       w.pressure, w.humidity, c.id
+FROM weather_data w
+JOIN location_dim l
+  ON l.city_name = w.city_name AND l.latitude = w.latitude AND l.longitude = w.longitude
+LEFT JOIN weather_conditions c
+  ON c.main = COALESCE(w.weather_main, '') AND c.description = COALESCE(w.weather_description, '');
@@ -0,0 +1,64 @@
+-- Rounds stored coordinates to 4 decimal places (COORD_PRECISION's default) so
+-- near-identical locations share one key, then rebuilds latest_weather.
+-- Snapshots of merged locations are kept. Favorites that collapse onto the same
+-- key keep the lowest id. In the compact tables, location_dim rows that collapse
+-- onto the same key are merged into the lowest id and their weather_snapshots
+-- re-pointed at it. The compact tables exist in every database created by the
+-- app, so this runs with either storage option. Run with the app stopped.
+-- Requires SQLite 3.25+ for window functions.
+BEGIN;
+
+UPDATE weather_data
+SET latitude = ROUND(latitude, 4), longitude = ROUND(longitude, 4)
+WHERE latitude != ROUND(latitude, 4) OR longitude != ROUND(longitude, 4);
+
+DELETE FROM favorites
+WHERE id NOT IN (
+    SELECT MIN(id)
+    FROM favorites
+    GROUP BY user_id, city_name, ROUND(latitude, 4), ROUND(longitude, 4)
+);
+
+UPDATE favorites
+SET latitude = ROUND(latitude, 4), longitude = ROUND(longitude, 4)
+WHERE latitude != ROUND(latitude, 4) OR longitude != ROUND(longitude, 4);
+
+CREATE TEMP TABLE location_dim_merge AS
+SELECT l.id AS old_id, s.survivor_id
+FROM location_dim l
+JOIN (
+    SELECT city_name, ROUND(latitude, 4) AS latitude, ROUND(longitude, 4) AS longitude, MIN(id) AS survivor_id
+    FROM location_dim
+    GROUP BY city_name, ROUND(latitude, 4), ROUND(longitude, 4)
+) s
+  ON s.city_name = l.city_name AND s.latitude = ROUND(l.latitude, 4) AND s.longitude = ROUND(l.longitude, 4)
+WHERE l.id != s.survivor_id;
+
+UPDATE weather_snapshots
+SET location_id = (SELECT survivor_id FROM location_dim_merge WHERE old_id = weather_snapshots.location_id)
+WHERE location_id IN (SELECT old_id FROM location_dim_merge);
+
+DELETE FROM location_dim
+WHERE id IN (SELECT old_id FROM location_dim_merge);
+
+UPDATE location_dim
+SET latitude = ROUND(latitude, 4), longitude = ROUND(longitude, 4)
+WHERE latitude != ROUND(latitude, 4) OR longitude != ROUND(longitude, 4);
+
+DROP TABLE location_dim_merge;
+
+DELETE FROM latest_weather;
+
+INSERT INTO latest_weather (city_name, latitude, longitude, snapshot_id, time)
+SELECT city_name, latitude, longitude, id, time
+FROM (
+    SELECT id, city_name, latitude, longitude, time,
+           ROW_NUMBER() OVER (
+               PARTITION BY city_name, latitude, longitude
+               ORDER BY time DESC, id DESC
+           ) AS rank
+    FROM weather_data
+)
+WHERE rank = 1;
+
+COMMIT;
@@ -0,0 +1,16 @@
+-- Adds geocoding_cache, keyed by normalized_name.
+-- Tables created by earlier builds keyed it by a "query" column, which shadowed
+-- the model's query attribute. They are dropped and recreated. The table only
+-- caches geocoding API results, so dropped names are resolved again on their
+-- next lookup. Safe to run more than once; each run empties the table.
+DROP TABLE IF EXISTS geocoding_cache;
+
+CREATE TABLE geocoding_cache (
+    normalized_name TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    country TEXT,
+    state TEXT,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    created_at DATETIME NOT NULL
+);
@@ -1,8 +1,36 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
 import pytest
 
 from app import create_app
 from config import TestConfig
 from weather.db import db
+from weather.models import user_model
+from weather.models.locations_model import location_index
+from weather.utils import api_utils
+
+@pytest.fixture(autouse=True)
+def fast_password_hashing(monkeypatch):
+    """
+    Use a cheap KDF cost and empty verification and user caches in tests.
+    """
+    monkeypatch.setattr(user_model, "PASSWORD_HASH_ITERATIONS", 1000)
+    user_model._verify_cache.clear()
+    user_model.Users.clear_user_cache()
+
+
+@pytest.fixture(autouse=True)
+def reset_upstream_guards():
+    """
+    Start every test with a closed circuit breaker and a full rate limit bucket.
+    """
+    api_utils.breaker.reset()
+    api_utils.rate_limiter.reset()
+
 
 @pytest.fixture
 def app():
@@ -10,6 +38,7 @@ def app():
     Create and configure a new app instance for testing.
     """
     app = create_app(TestConfig)
+    location_index.clear()
     with app.app_context():
         db.create_all()
         yield app
@@ -30,3 +59,108 @@ def session(app):
     """
     with app.app_context():
         yield db.session
+
+
+class StubWeatherAPI:
+    """A local stand-in for the OpenWeatherMap /weather, /forecast and /geo/1.0/direct endpoints."""
+
+    def __init__(self):
+        self.requests = []
+        self.fail_cities = set()
+        self.delay = 0.0
+        # City name -> (lat, lon), for geocoding and for naming requests made by coordinates
+        self.places = {}
+
+    def city(self, params):
+        """The city a request is for: its q, or the registered place at its lat/lon."""
+        if "q" in params:
+            return params["q"]
+        point = (float(params["lat"]), float(params["lon"]))
+        return next((name for name, coords in self.places.items() if coords == point), f"{point[0]},{point[1]}")
+
+    def geocode(self, city):
+        wanted = city.split(",")[0].strip().casefold()
+        return [{"name": name, "lat": lat, "lon": lon, "country": "TC"}
+                for name, (lat, lon) in self.places.items() if name.casefold() == wanted]
+
+    def weather(self, city):
+        return {
+            "coord": {"lat": 10.0, "lon": 20.0},
+            "weather": [{"main": "Clear", "description": "clear sky"}],
+            "main": {"temp": 21.5, "feels_like": 20.0, "pressure": 1012, "humidity": 40},
+            "dt": 1700000000,
+            "name": city,
+        }
+
+    def forecast(self, city, cnt):
+        return {
+            "city": {"name": city, "coord": {"lat": 10.0, "lon": 20.0}},
+            "list": [
+                {
+                    "dt": 1700000000 + 10800 * (i + 1),
+                    "main": {"temp": 22.0 + i, "feels_like": 21.0 + i, "pressure": 1010, "humidity": 45},
+                    "weather": [{"main": "Clouds", "description": "few clouds"}],
+                }
+                for i in range(cnt)
+            ],
+        }
+
+
+@pytest.fixture
+def weather_api(monkeypatch):
+    """
+    Serve a stub weather API on localhost and point api_utils at it.
+    """
+    stub = StubWeatherAPI()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            stub.requests.append((url.path, params))
+            if stub.delay:
+                time.sleep(stub.delay)
+            city = stub.city(params)
+            if city in stub.fail_cities:
+                self.send_response(404)
+                self.end_headers()
+                return
+            if url.path.endswith("/weather"):
+                body = stub.weather(city)
+            elif url.path.endswith("/forecast"):
+                body = stub.forecast(city, int(params.get("cnt", 5)))
+            elif url.path.endswith("/direct"):
+                body = stub.geocode(city)
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    # Clients that time out hang up before the stub answers; don't print the broken pipe
+    server.handle_error = lambda request, client_address: None
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(api_utils, "WEATHER_API_BASE_URL", f"http://127.0.0.1:{server.server_port}/data/2.5")
+    monkeypatch.setattr(api_utils, "GEOCODING_API_BASE_URL", f"http://127.0.0.1:{server.server_port}/geo/1.0")
+    monkeypatch.setattr(api_utils, "WEATHER_API_KEY", "KEY")
+    monkeypatch.setattr(api_utils.client, "retries", 0)
+    api_utils.client.close()
+    api_utils.weather_cache.clear()
+
+    yield stub
+
+    server.shutdown()
+    server.server_close()
+    api_utils.client.close()
+    api_utils.weather_cache.clear()
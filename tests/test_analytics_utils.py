@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from weather.models.locations_model import Locations
+from weather.utils.analytics_utils import (compute_stats, daily_means, describe, get_location_stats, rolling_mean,
+                                           trend_per_day)
+
+BOSTON = ("Boston", 42.36, -71.06)
+SEATTLE = ("Seattle", 47.61, -122.33)
+BASE = datetime(2024, 1, 1)
+
+
+def test_describe_ignores_missing_readings():
+    """Test summaries skip NaNs and are all None without readings."""
+    stats = describe(np.array([1.0, np.nan, 3.0, 5.0]))
+
+    assert (stats["min"], stats["max"], stats["mean"], stats["p50"]) == (1.0, 5.0, 3.0, 3.0)
+    assert describe(np.array([np.nan]))["mean"] is None
+
+
+def test_daily_means_leave_gaps_as_nan():
+    """Test days without readings are NaN rather than dropped."""
+    means = daily_means(np.array([0, 0, 2]), np.array([1.0, 3.0, 10.0]))
+
+    assert means[0] == 2.0
+    assert np.isnan(means[1])
+    assert means[2] == 10.0
+
+
+def test_rolling_mean():
+    """Test the trailing window skips NaNs and shrinks at the start."""
+    result = rolling_mean(np.array([1.0, 2.0, np.nan, 4.0, 5.0]), 2)
+
+    assert result[0] == 1.0
+    assert result[1] == 1.5
+    assert result[2] == 2.0
+    assert result[3] == 4.0
+    assert result[4] == 4.5
+
+
+def test_trend_per_day():
+    """Test the slope matches a linear series and needs two readings."""
+    days = np.arange(10, dtype=np.float64)
+    assert trend_per_day(days, 50 + 2.5 * days) == 2.5
+    assert trend_per_day(days[:1], days[:1]) is None
+
+
+def test_compute_stats_day_over_day():
+    """Test daily deltas and the rolling mean are computed from calendar-day means."""
+    times = np.array([BASE + timedelta(hours=12 * i) for i in range(6)], dtype="datetime64[s]")
+    temp = np.array([0.0, 2.0, 5.0, 7.0, 3.0, 3.0])
+
+    stats = compute_stats(times, temp, temp - 1, np.full(6, 50.0), window=2, include_daily=True)
+
+    assert stats["samples"] == 6
+    assert stats["daily"]["temp_mean"] == [1.0, 6.0, 3.0]
+    assert stats["daily"]["temp_mean_delta"] == [None, 5.0, -3.0]
+    assert stats["day_over_day"] == {"last_temp_mean_delta": -3.0, "max_rise": 5.0, "max_drop": -3.0,
+                                     "mean_abs_change": 4.0}
+    assert stats["rolling_temp_mean"] == {"window_days": 2, "last": 4.5}
+    assert stats["humidity"]["trend_per_day"] == 0.0
+
+
+def test_get_location_stats_batches_locations(session):
+    """Test many locations are loaded and summarised together, skipping those without history."""
+    Locations.ingest_rows([
+        {"city_name": city, "latitude": lat, "longitude": lon, "time": BASE + timedelta(hours=i),
+         "temp": offset + i % 24, "feels_like": offset - 1.0, "pressure": 1000, "humidity": 40 + i % 10,
+         "weather_main": "Clear", "weather_description": "clear sky"}
+        for (city, lat, lon), offset in ((BOSTON, 0.0), (SEATTLE, 10.0))
+        for i in range(72)
+    ])
+
+    stats = get_location_stats([BOSTON, SEATTLE, ("Nowhere", 0.0, 0.0)], start=BASE + timedelta(days=1))
+
+    assert set(stats) == {BOSTON, SEATTLE}
+    assert stats[BOSTON]["samples"] == 48
+    assert stats[BOSTON]["temp"]["mean"] == 11.5
+    assert stats[SEATTLE]["temp"]["min"] == 10.0
+    assert stats[SEATTLE]["start"] == "2024-01-02T00:00:00"
+
+
+def test_get_location_stats_invalid_window(app):
+    """Test the rolling window must be positive."""
+    with pytest.raises(ValueError):
+        get_location_stats([BOSTON], window=0)
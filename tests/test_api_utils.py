@@ -1,3 +1,6 @@
+import threading
+import time
+
 import pytest
 import requests
 from unittest.mock import Mock
@@ -16,25 +19,36 @@ def set_api_key(monkeypatch):
     monkeypatch.setattr(api_utils, "WEATHER_API_KEY", "KEY")
 
 
+@pytest.fixture(autouse=True)
+def clear_weather_cache():
+    # Each test starts with an empty shared cache
+    api_utils.weather_cache.clear()
+    api_utils.upstream_flight.reset()
+    yield
+    api_utils.weather_cache.clear()
+
+
 @pytest.fixture
 def mock_requests_success(monkeypatch):
     # Create a dummy response object whose .json() and .raise_for_status() we can control
     dummy_resp = Mock()
+    dummy_resp.status_code = 200
     dummy_resp.raise_for_status = Mock()
     dummy_resp.json.return_value = {}
-    # Patch requests.get to return our dummy
+    # Patch the pooled session's get to return our dummy
     dummy_get = Mock(return_value=dummy_resp)
-    monkeypatch.setattr(requests, "get", dummy_get)
+    monkeypatch.setattr(requests.Session, "get", dummy_get)
     return dummy_resp
 
 
 @pytest.fixture
 def mock_requests_forecast(monkeypatch):
     dummy_resp = Mock()
+    dummy_resp.status_code = 200
     dummy_resp.raise_for_status = Mock()
     dummy_resp.json.return_value = {}
     dummy_get = Mock(return_value=dummy_resp)
-    monkeypatch.setattr(requests, "get", dummy_get)
+    monkeypatch.setattr(requests.Session, "get", dummy_get)
     return dummy_resp
 
 
@@ -45,7 +59,7 @@ def test_get_current_weather_success(mock_requests_success):
     result = get_current_weather(CITY)
     assert result == payload
 
-    requests.get.assert_called_once_with(
+    requests.Session.get.assert_called_once_with(
         f"{api_utils.WEATHER_API_BASE_URL}/weather",
         params={"q": CITY, "appid": "KEY", "units": UNITS},
         timeout=5,
@@ -54,7 +68,7 @@ def test_get_current_weather_success(mock_requests_success):
 
 def test_get_current_weather_request_failure(monkeypatch):
     monkeypatch.setattr(
-        requests, "get", Mock(side_effect=requests.exceptions.RequestException("Oops"))
+        requests.Session, "get", Mock(side_effect=requests.exceptions.RequestException("Oops"))
     )
     with pytest.raises(RuntimeError, match="Weather API request failed: Oops"):
         get_current_weather(CITY)
@@ -62,7 +76,7 @@ def test_get_current_weather_request_failure(monkeypatch):
 
 def test_get_current_weather_timeout(monkeypatch):
     monkeypatch.setattr(
-        requests, "get", Mock(side_effect=requests.exceptions.Timeout)
+        requests.Session, "get", Mock(side_effect=requests.exceptions.Timeout)
     )
     with pytest.raises(RuntimeError, match="Weather API request timed out."):
         get_current_weather(CITY)
@@ -74,6 +88,169 @@ def test_get_current_weather_invalid_response(mock_requests_success):
         get_current_weather(CITY)
 
 
+def test_invalid_json_is_an_upstream_error(mock_requests_success):
+    mock_requests_success.json.side_effect = requests.exceptions.JSONDecodeError("Expecting value", "<html>", 0)
+
+    with pytest.raises(RuntimeError, match="Weather API returned invalid JSON"):
+        api_utils.fetch_current_weather(CITY)
+    with pytest.raises(RuntimeError, match="Forecast API returned invalid JSON"):
+        api_utils.fetch_forecast(CITY)
+    with pytest.raises(RuntimeError, match="Geocoding API returned invalid JSON"):
+        api_utils.fetch_geocode(CITY)
+
+
+def test_get_current_weather_cached(mock_requests_success):
+    payload = {"weather": [{"desc": "clear"}], "main": {"temp": 25}}
+    mock_requests_success.json.return_value = payload
+
+    assert get_current_weather(CITY) == payload
+    assert get_current_weather(CITY) == payload
+
+    requests.Session.get.assert_called_once()
+    stats = api_utils.get_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_get_current_weather_cache_keyed_by_units(mock_requests_success):
+    mock_requests_success.json.return_value = {"weather": [], "main": {}}
+
+    get_current_weather(CITY, units="metric")
+    get_current_weather(CITY, units="imperial")
+
+    assert requests.Session.get.call_count == 2
+
+
+def test_get_current_weather_failure_not_cached(mock_requests_success):
+    mock_requests_success.json.return_value = {}
+    with pytest.raises(ValueError):
+        get_current_weather(CITY)
+
+    assert len(api_utils.weather_cache) == 0
+
+
+def test_get_current_weather_by_coordinates(mock_requests_success):
+    payload = {"weather": [], "main": {}}
+    mock_requests_success.json.return_value = payload
+
+    assert get_current_weather(CITY, latitude=40.71281, longitude=-74.00604) == payload
+    assert get_current_weather("Other name", latitude=40.7128, longitude=-74.006) == payload
+
+    requests.Session.get.assert_called_once_with(
+        f"{api_utils.WEATHER_API_BASE_URL}/weather",
+        params={"lat": 40.7128, "lon": -74.006, "appid": "KEY", "units": UNITS},
+        timeout=5,
+    )
+
+
+def test_get_forecast_by_coordinates(mock_requests_forecast):
+    mock_requests_forecast.json.return_value = {"list": []}
+
+    get_forecast(CITY, cnt=3, latitude=42.36, longitude=-71.06)
+
+    requests.Session.get.assert_called_once_with(
+        f"{api_utils.WEATHER_API_BASE_URL}/forecast",
+        params={"lat": 42.36, "lon": -71.06, "cnt": 3, "appid": "KEY", "units": UNITS},
+        timeout=5,
+    )
+
+
+def test_fetch_geocode(mock_requests_success):
+    match = {"name": "Boston", "lat": 42.3601, "lon": -71.0589, "country": "US", "state": "Massachusetts"}
+    mock_requests_success.json.return_value = [match]
+
+    assert api_utils.fetch_geocode("Boston,MA,US") == match
+    requests.Session.get.assert_called_once_with(
+        f"{api_utils.GEOCODING_API_BASE_URL}/direct",
+        params={"q": "Boston,MA,US", "limit": 1, "appid": "KEY"},
+        timeout=5,
+    )
+
+    mock_requests_success.json.return_value = []
+    assert api_utils.fetch_geocode("Nowhere") is None
+
+    mock_requests_success.json.return_value = {"cod": 401}
+    with pytest.raises(ValueError, match="Unexpected payload from geocoding API:"):
+        api_utils.fetch_geocode("Boston")
+
+
+def test_breaker_open_serves_last_cached_value_as_stale(mock_requests_success, monkeypatch):
+    payload = {"weather": [], "main": {"temp": 3}}
+    mock_requests_success.json.return_value = payload
+    get_current_weather(CITY)
+    monkeypatch.setattr(api_utils.weather_cache, "ttl", 0)
+    monkeypatch.setattr(api_utils.weather_cache, "stale_ttl", 0)
+    for _ in range(api_utils.breaker.min_calls):
+        api_utils.breaker.record(False, 0)
+
+    result = get_current_weather(CITY)
+
+    assert result["stale"] is True
+    assert result["main"] == {"temp": 3}
+    assert requests.Session.get.call_count == 1
+    with pytest.raises(api_utils.CircuitOpenError):
+        get_current_weather("Uncached")
+
+
+def test_upstream_failures_open_breaker(monkeypatch):
+    monkeypatch.setattr(
+        requests.Session, "get", Mock(side_effect=requests.exceptions.ConnectionError("refused"))
+    )
+    for _ in range(api_utils.breaker.min_calls):
+        with pytest.raises(RuntimeError, match="request failed"):
+            get_forecast(CITY)
+
+    with pytest.raises(api_utils.CircuitOpenError):
+        get_forecast(CITY)
+    assert requests.Session.get.call_count == api_utils.breaker.min_calls
+    assert api_utils.get_resilience_stats()["circuit_breaker"]["state"] == "open"
+
+
+def test_throttled_response_slows_rate_limiter(mock_requests_success, monkeypatch):
+    mock_requests_success.status_code = 429
+    mock_requests_success.raise_for_status.side_effect = requests.exceptions.HTTPError("429 Too Many Requests")
+    monkeypatch.setattr(api_utils, "WEATHER_RATE_LIMIT_WAIT", 0)
+
+    with pytest.raises(RuntimeError, match="429"):
+        get_current_weather(CITY)
+
+    assert api_utils.rate_limiter.current_rate == api_utils.rate_limiter.rate / 2
+    with pytest.raises(api_utils.RateLimitedError):
+        get_current_weather("Other")
+    assert requests.Session.get.call_count == 1
+
+
+def test_unexpected_error_releases_half_open_probe(monkeypatch):
+    breaker = api_utils.CircuitBreaker(window=1, min_calls=1, reset_timeout=0)
+    breaker.record(False, 0)
+    monkeypatch.setattr(api_utils, "breaker", breaker)
+    monkeypatch.setattr(api_utils.client, "get", Mock(side_effect=ValueError("bad params")))
+
+    with pytest.raises(ValueError):
+        api_utils._guarded_get(f"{api_utils.WEATHER_API_BASE_URL}/weather", {"q": CITY})
+
+    assert breaker.state == breaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_429_is_not_retried():
+    retry = api_utils.WeatherClient().session.get_adapter("https://api.openweathermap.org").max_retries
+    assert 429 not in retry.status_forcelist
+    assert 503 in retry.status_forcelist
+
+
+def test_read_timeouts_are_not_retried(weather_api):
+    weather_api.delay = 0.5
+    client = api_utils.WeatherClient(retries=2, backoff=0, timeout=0.1)
+
+    with pytest.raises(requests.exceptions.RequestException):
+        client.get(f"{api_utils.WEATHER_API_BASE_URL}/weather", {"q": CITY})
+    client.close()
+
+    assert client.retries == 2
+    assert len(weather_api.requests) == 1
+
+
 def test_get_forecast_success(mock_requests_forecast):
     payload = {"list": [{"dt": 12345}]}
     mock_requests_forecast.json.return_value = payload
@@ -81,7 +258,7 @@ def test_get_forecast_success(mock_requests_forecast):
     result = get_forecast(CITY, cnt=3)
     assert result == payload
 
-    requests.get.assert_called_once_with(
+    requests.Session.get.assert_called_once_with(
         f"{api_utils.WEATHER_API_BASE_URL}/forecast",
         params={"q": CITY, "cnt": 3, "appid": "KEY", "units": UNITS},
         timeout=5,
@@ -90,7 +267,7 @@ def test_get_forecast_success(mock_requests_forecast):
 
 def test_get_forecast_request_failure(monkeypatch):
     monkeypatch.setattr(
-        requests, "get", Mock(side_effect=requests.exceptions.RequestException("Oops"))
+        requests.Session, "get", Mock(side_effect=requests.exceptions.RequestException("Oops"))
     )
     with pytest.raises(RuntimeError, match="Forecast API request failed: Oops"):
         get_forecast(CITY)
@@ -98,7 +275,7 @@ def test_get_forecast_request_failure(monkeypatch):
 
 def test_get_forecast_timeout(monkeypatch):
     monkeypatch.setattr(
-        requests, "get", Mock(side_effect=requests.exceptions.Timeout)
+        requests.Session, "get", Mock(side_effect=requests.exceptions.Timeout)
     )
     with pytest.raises(RuntimeError, match="Forecast API request timed out."):
         get_forecast(CITY)
@@ -108,3 +285,113 @@ def test_get_forecast_invalid_response(mock_requests_forecast):
     mock_requests_forecast.json.return_value = {}
     with pytest.raises(ValueError, match="Unexpected payload from forecast API:"):
         get_forecast(CITY)
+
+
+def test_client_reuses_pooled_session():
+    client = api_utils.WeatherClient(pool_size=4, retries=1)
+    session = client.session
+    assert client.session is session
+
+    adapter = session.get_adapter("https://api.openweathermap.org")
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 1
+    assert 503 in adapter.max_retries.status_forcelist
+
+
+def test_client_close_releases_session():
+    client = api_utils.WeatherClient()
+    session = client.session
+    client.close()
+    assert client.session is not session
+    client.close()
+
+
+def test_get_current_weather_many_partial_results(monkeypatch):
+    def fake_fetch(city, units="metric", latitude=None, longitude=None):
+        if city == "Bad":
+            raise RuntimeError("Weather API request failed: 404")
+        return {"weather": [], "main": {"temp": 1}, "name": city}
+
+    monkeypatch.setattr(api_utils, "fetch_current_weather", fake_fetch)
+
+    results = api_utils.get_current_weather_many(
+        [("Good", 1.0, 2.0), ("Bad", 3.0, 4.0)], concurrency=2, deadline=5
+    )
+
+    assert results[0]["status"] == "success"
+    assert results[0]["weather"]["name"] == "Good"
+    assert results[1]["status"] == "error"
+    assert "404" in results[1]["error"]
+
+
+def test_get_current_weather_many_runs_concurrently(monkeypatch):
+
+    def slow_fetch(city, units="metric", latitude=None, longitude=None):
+        time.sleep(0.2)
+        return {"weather": [], "main": {}}
+
+    monkeypatch.setattr(api_utils, "fetch_current_weather", slow_fetch)
+    locations = [(f"City{i}", 0.0, 0.0) for i in range(10)]
+
+    start = time.monotonic()
+    results = api_utils.get_current_weather_many(locations, concurrency=10, deadline=5)
+    elapsed = time.monotonic() - start
+
+    assert all(result["status"] == "success" for result in results)
+    assert elapsed < 1.0
+
+
+def test_get_current_weather_many_deadline(monkeypatch):
+
+    def slow_fetch(city, units="metric", latitude=None, longitude=None):
+        time.sleep(0.5)
+        return {"weather": [], "main": {}}
+
+    monkeypatch.setattr(api_utils, "fetch_current_weather", slow_fetch)
+
+    results = api_utils.get_current_weather_many(
+        [("Slow", 0.0, 0.0), ("Queued", 0.0, 0.0)], concurrency=1, deadline=0.1
+    )
+
+    assert [result["error"] for result in results] == ["Deadline exceeded", "Deadline exceeded"]
+
+
+def test_get_current_weather_many_waits_for_rate_limit_tokens(weather_api, monkeypatch):
+    monkeypatch.setattr(api_utils, "rate_limiter", api_utils.TokenBucket(rate=20, capacity=2))
+    monkeypatch.setattr(api_utils, "WEATHER_RATE_LIMIT_WAIT", 0)
+    locations = [(f"City{i}", 10.0 + i, 20.0) for i in range(6)]
+
+    results = api_utils.get_current_weather_many(locations, concurrency=6, deadline=5)
+
+    assert all(result["status"] == "success" for result in results)
+    assert len(weather_api.requests) == 6
+
+
+def test_get_current_weather_many_empty():
+    assert api_utils.get_current_weather_many([]) == []
+
+
+def test_get_forecast_coalesces_concurrent_calls(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch(city, cnt=5, units="metric", latitude=None, longitude=None):
+        calls.append(city)
+        release.wait(1)
+        return {"list": []}
+
+    monkeypatch.setattr(api_utils, "fetch_forecast", slow_fetch)
+
+    threads = [threading.Thread(target=get_forecast, args=(CITY, 3)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(100):
+        if api_utils.get_coalescing_stats()["coalesced"] == 3:
+            break
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert api_utils.get_coalescing_stats()["coalesced"] == 3
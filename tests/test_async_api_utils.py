@@ -0,0 +1,209 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+import pytest
+
+from weather.utils import api_utils
+from weather.utils.async_api_utils import AsyncWeatherClient
+
+BOSTON = ("Boston", 42.36, -71.06)
+SEATTLE = ("Seattle", 47.61, -122.33)
+
+
+@pytest.fixture(autouse=True)
+def places(weather_api):
+    """Let the stub name the locations it is asked about by coordinates."""
+    weather_api.places.update({city: (lat, lon) for city, lat, lon in (BOSTON, SEATTLE)})
+
+
+def run(coro_fn, **kwargs):
+    """Runs coro_fn(client) on a fresh event loop with a client that is closed afterwards."""
+    async def main():
+        async with AsyncWeatherClient(**kwargs) as client:
+            return await coro_fn(client)
+    return asyncio.run(main())
+
+
+def test_fetch_current_weather_by_coordinates(weather_api):
+    """Test a fetch sends coordinates, not the name, and returns the validated payload."""
+    city, lat, lon = BOSTON
+    data = run(lambda client: client.fetch_current_weather(city, latitude=lat, longitude=lon))
+
+    assert data["name"] == "Boston"
+    path, params = weather_api.requests[-1]
+    assert path.endswith("/weather")
+    assert (params["lat"], params["lon"], params["appid"]) == ("42.36", "-71.06", "KEY")
+    assert "q" not in params
+
+
+def test_fetch_current_weather_invalid_response(weather_api, monkeypatch):
+    """Test payloads are validated like the synchronous client's."""
+    monkeypatch.setattr(type(weather_api), "weather", lambda self, city: {"name": city})
+
+    with pytest.raises(ValueError, match="Unexpected payload from weather API"):
+        run(lambda client: client.fetch_current_weather("Boston"))
+
+
+def test_fetch_current_weather_invalid_json(weather_api, monkeypatch):
+    """Test a body that is not JSON fails as a RuntimeError, like other upstream failures."""
+    async def not_json(self, **kwargs):
+        return json.loads("<html>Bad gateway</html>")
+
+    monkeypatch.setattr(aiohttp.ClientResponse, "json", not_json)
+
+    with pytest.raises(RuntimeError, match="Weather API returned invalid JSON"):
+        run(lambda client: client.fetch_current_weather("Boston"))
+
+
+def test_fetch_current_weather_http_error(weather_api):
+    """Test a non-200 response becomes a RuntimeError."""
+    weather_api.fail_cities.add("Boston")
+
+    with pytest.raises(RuntimeError, match="Weather API request failed: 404"):
+        run(lambda client: client.fetch_current_weather("Boston"))
+
+
+def test_fetch_current_weather_timeout(weather_api):
+    """Test every call is bounded by the client's timeout."""
+    weather_api.delay = 0.5
+
+    with pytest.raises(RuntimeError, match="Weather API request timed out."):
+        run(lambda client: client.fetch_current_weather("Boston"), timeout=0.1)
+
+
+def test_fetch_forecast(weather_api):
+    """Test forecasts are fetched and validated."""
+    data = run(lambda client: client.fetch_forecast("Boston", cnt=3))
+
+    assert len(data["list"]) == 3
+    assert weather_api.requests[-1][1]["cnt"] == "3"
+
+
+def test_get_current_weather_uses_shared_cache(weather_api):
+    """Test the async client reads and fills the cache the synchronous client uses."""
+    city, lat, lon = BOSTON
+    run(lambda client: client.get_current_weather(city, latitude=lat, longitude=lon))
+    upstream_calls = len(weather_api.requests)
+
+    assert api_utils.get_current_weather(city, latitude=lat, longitude=lon)["name"] == "Boston"
+    assert len(weather_api.requests) == upstream_calls
+
+
+def test_get_current_weather_serves_stale_when_breaker_open(weather_api, monkeypatch):
+    """Test the last cached value is served, marked stale, while the breaker refuses calls."""
+    run(lambda client: client.get_current_weather("Boston"))
+    monkeypatch.setattr(api_utils.weather_cache, "ttl", 0)
+    monkeypatch.setattr(api_utils.weather_cache, "stale_ttl", 0)
+    monkeypatch.setattr(api_utils.breaker, "allow", lambda: False)
+
+    data = run(lambda client: client.get_current_weather("Boston"))
+
+    assert data["stale"] is True
+    assert len(weather_api.requests) == 1
+
+
+def test_get_current_weather_serves_stale_while_refreshing(weather_api, monkeypatch):
+    """Test a stale entry is returned without waiting on upstream and refreshed in the background."""
+    run(lambda client: client.get_current_weather("Boston"))
+    monkeypatch.setattr(api_utils.weather_cache, "ttl", 0)
+    monkeypatch.setattr(api_utils.weather_cache, "stale_ttl", 60)
+    weather_api.delay = 0.2
+
+    async def fetch(client):
+        started = time.perf_counter()
+        data = await client.get_current_weather("Boston")
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*client._background)
+        return data, elapsed
+
+    data, elapsed = run(fetch)
+
+    assert data["name"] == "Boston"
+    assert "stale" not in data
+    assert elapsed < 0.1
+    assert len(weather_api.requests) == 2
+    assert api_utils.weather_cache.peek(("boston", "metric"))[0] is not data
+
+
+def test_get_forecast_coalesces_concurrent_calls(weather_api):
+    """Test identical in-flight forecast requests share one upstream call."""
+    weather_api.delay = 0.1
+
+    async def fetch(client):
+        return await asyncio.gather(*(client.get_forecast("Boston", cnt=3) for _ in range(5)))
+
+    results = run(fetch)
+
+    assert len(results) == 5
+    assert len(weather_api.requests) == 1
+
+
+def test_session_is_reused(weather_api):
+    """Test one session serves every call until the client is closed."""
+    async def fetch(client):
+        session = client.session
+        await client.fetch_current_weather("Boston")
+        await client.fetch_current_weather("Seattle")
+        assert client.session is session
+        await client.close()
+        assert session.closed
+        return client._session
+
+    assert run(fetch) is None
+
+
+def test_get_current_weather_many_partial_results(weather_api):
+    """Test results keep input order and report failures per location."""
+    weather_api.fail_cities.add("Seattle")
+
+    results = run(lambda client: client.get_current_weather_many([BOSTON, SEATTLE]))
+
+    assert [r["city_name"] for r in results] == ["Boston", "Seattle"]
+    assert results[0]["status"] == "success"
+    assert results[0]["weather"]["name"] == "Boston"
+    assert results[1]["status"] == "error"
+    assert "404" in results[1]["error"]
+
+
+def test_get_current_weather_many_bounded_concurrency(weather_api):
+    """Test the semaphore caps the calls in flight."""
+    weather_api.delay = 0.1
+    locations = [(f"City {i}", 10.0 + i, 20.0) for i in range(6)]
+
+    started = time.perf_counter()
+    results = run(lambda client: client.get_current_weather_many(locations), concurrency=2)
+    elapsed = time.perf_counter() - started
+
+    assert all(r["status"] == "success" for r in results)
+    assert elapsed >= 0.3
+
+
+def test_get_current_weather_many_deadline(weather_api):
+    """Test locations still pending at the deadline are reported as timed out."""
+    weather_api.delay = 0.5
+
+    results = run(lambda client: client.get_current_weather_many([BOSTON], deadline=0.1))
+
+    assert results[0]["status"] == "error"
+    assert results[0]["error"] == "Deadline exceeded"
+
+
+def test_get_current_weather_many_waits_for_rate_limit_tokens(weather_api, monkeypatch):
+    """Test a batch larger than the burst waits for tokens until its deadline instead of failing."""
+    monkeypatch.setattr(api_utils, "rate_limiter", api_utils.TokenBucket(rate=20, capacity=2))
+    monkeypatch.setattr(api_utils, "WEATHER_RATE_LIMIT_WAIT", 0)
+    locations = [(f"City {i}", 10.0 + i, 20.0) for i in range(6)]
+
+    results = run(lambda client: client.get_current_weather_many(locations, deadline=5))
+
+    assert all(r["status"] == "success" for r in results)
+    assert len(weather_api.requests) == 6
+
+
+def test_get_current_weather_many_empty(weather_api):
+    """Test an empty batch makes no upstream calls."""
+    assert run(lambda client: client.get_current_weather_many([])) == []
+    assert weather_api.requests == []
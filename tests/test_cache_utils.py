@@ -0,0 +1,193 @@
+import threading
+import time
+
+import pytest
+
+from weather.utils.cache_utils import SingleFlight, TTLCache
+
+
+@pytest.fixture
+def cache():
+    """Provide a small cache with a short TTL and stale window."""
+    return TTLCache(maxsize=2, ttl=0.05, stale_ttl=0.5)
+
+
+def test_invalid_arguments():
+    """Test that a non-positive size or negative TTL is rejected."""
+    with pytest.raises(ValueError):
+        TTLCache(maxsize=0)
+    with pytest.raises(ValueError):
+        TTLCache(ttl=-1)
+
+
+def test_get_and_set(cache):
+    """Test a value can be stored and read back while fresh."""
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_get_expired(cache):
+    """Test an entry past its TTL is reported as a miss."""
+    cache.set("a", 1)
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_peek_returns_expired_value(cache):
+    """Test peek returns the last value and its age past expiry without counting a hit or miss."""
+    assert cache.peek("a") is None
+    cache.set("a", 1)
+    time.sleep(0.06)
+
+    value, age = cache.peek("a")
+    assert value == 1
+    assert age >= 0.06
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+
+def test_lru_eviction(cache):
+    """Test the least recently used entry is evicted when full."""
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_get_or_load_caches(cache):
+    """Test the loader runs once for repeated fresh lookups."""
+    calls = []
+    loader = lambda: calls.append(1) or "value"
+
+    assert cache.get_or_load("k", loader) == "value"
+    assert cache.get_or_load("k", loader) == "value"
+    assert len(calls) == 1
+
+
+def test_get_or_load_stale_while_revalidate(cache):
+    """Test a stale entry is served immediately and refreshed in the background."""
+    cache.set("k", "old")
+    time.sleep(0.06)
+
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return "new"
+
+    assert cache.get_or_load("k", loader) == "old"
+    assert refreshed.wait(1)
+    for _ in range(50):
+        if cache.get("k") == "new":
+            break
+        time.sleep(0.01)
+    assert cache.get("k") == "new"
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_get_or_load_stale_refresh_failure_keeps_value(cache):
+    """Test a failed background refresh leaves the stale value in place."""
+    cache.set("k", "old")
+    time.sleep(0.06)
+
+    def loader():
+        raise RuntimeError("upstream down")
+
+    assert cache.get_or_load("k", loader) == "old"
+    time.sleep(0.05)
+    assert cache.get_or_load("k", loader) == "old"
+
+
+def test_get_or_load_error_propagates(cache):
+    """Test loader errors on a miss propagate and nothing is cached."""
+    def loader():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        cache.get_or_load("k", loader)
+    assert len(cache) == 0
+
+
+def test_clear_resets_stats(cache):
+    """Test clear empties the cache and resets counters."""
+    cache.set("a", 1)
+    cache.get("a")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 0
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    """Test concurrent callers with the same key share one execution."""
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(1)
+        return "shared"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", fn))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for _ in range(100):
+        if flight.stats()["coalesced"] == 4:
+            break
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["shared"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_single_flight_shares_errors():
+    """Test waiting callers receive the leader's exception."""
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(1)
+        raise RuntimeError("upstream down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", fn)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(1)
+    follower = threading.Thread(target=call)
+    follower.start()
+    for _ in range(100):
+        if flight.stats()["coalesced"] == 1:
+            break
+        time.sleep(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert errors == ["upstream down", "upstream down"]
+
+
+def test_single_flight_sequential_calls_execute_again():
+    """Test a key is executed again once the previous call has finished."""
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+    assert flight.stats()["executions"] == 2
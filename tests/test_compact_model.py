@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import SQLAlchemyError
+
+from weather.models.compact_model import CompactSnapshot, CompactStore, LocationDim, WeatherCondition
+from weather.models.locations_model import Locations
+
+BASE = datetime(2024, 1, 1)
+CONDITIONS = [("Clear", "clear sky"), ("Clouds", "overcast clouds"), (None, None)]
+
+
+def make_rows():
+    """Two days of 20-minute readings for two locations."""
+    return [
+        {"city_name": city, "latitude": lat, "longitude": lon, "time": BASE + timedelta(minutes=20 * i),
+         "temp": round(-5 + 0.37 * i, 2), "feels_like": round(-8 + 0.41 * i, 2), "pressure": 1000 + i % 30,
+         "humidity": i % 100, "weather_main": CONDITIONS[i % 3][0], "weather_description": CONDITIONS[i % 3][1]}
+        for city, lat, lon in (("Boston", 42.36, -71.06), ("Seattle", 47.61, -122.33))
+        for i in range(144)
+    ]
+
+
+@pytest.fixture
+def storage(app):
+    """Switches the app between row and compact storage, with empty dimension caches."""
+    def use(kind):
+        app.config["WEATHER_STORAGE"] = kind
+    CompactStore.clear_cache()
+    yield use
+    app.config["WEATHER_STORAGE"] = "row"
+    CompactStore.clear_cache()
+
+
+def test_ingest_dictionary_encodes(session, storage):
+    """Test each location and condition is stored once and snapshots hold only references."""
+    storage("compact")
+
+    assert Locations.ingest_rows(make_rows()) == 288
+    assert Locations.ingest_rows(make_rows()[:10]) == 10
+
+    assert session.query(CompactSnapshot).count() == 298
+    assert session.query(LocationDim).count() == 2
+    assert session.query(WeatherCondition).count() == 2
+    assert session.query(Locations).count() == 0
+    snapshot = session.query(CompactSnapshot).first()
+    assert (snapshot.time, snapshot.temp) == (1704067200, -500)
+    assert session.get(WeatherCondition, snapshot.condition_id).main == "Clear"
+
+
+def test_ingest_skip_existing(session, storage):
+    """Test skip_existing drops snapshots already stored for the same location and time."""
+    storage("compact")
+    Locations.ingest_rows(make_rows()[:10])
+
+    assert Locations.ingest_rows(make_rows()[5:15] + make_rows()[14:15], skip_existing=True) == 5
+    assert session.query(CompactSnapshot).count() == 15
+
+
+def test_query_api_matches_row_storage(session, storage):
+    """Test every query returns the same results from both storage options."""
+    def run_queries():
+        current = Locations.get_current_weather("Boston", 42.36, -71.06)
+        history = Locations.get_weather_history("Seattle", 47.61, -122.33)
+        page, cursor = Locations.get_weather_range("Boston", 42.36, -71.06, start=BASE + timedelta(hours=3), limit=20)
+        next_page, _ = Locations.get_weather_range("Boston", 42.36, -71.06, limit=20, after=cursor)
+        hourly, next_start = Locations.get_weather_aggregates("Boston", 42.36, -71.06, "hour", limit=30)
+        daily, _ = Locations.get_weather_aggregates("Seattle", 47.61, -122.33, "day")
+        exported = list(Locations.iter_export(city_name="Seattle", end=BASE + timedelta(hours=5), batch_size=4))
+        return {
+            "current": (current.id, current.time, current.temp, current.weather_main),
+            "history": [(row.id, row.time, row.feels_like, row.weather_description) for row in history],
+            "page": page, "cursor": cursor, "next_page": next_page,
+            "hourly": hourly, "next_start": next_start, "daily": daily, "exported": exported,
+            "by_id": Locations.get_location_by_id(145).city_name,
+            "many": {key: (row.id, row.time, row.temp) for key, row in Locations.get_current_weather_many(
+                [("Boston", 42.36, -71.06), ("Seattle", 47.61, -122.33), ("Nowhere", 0.0, 0.0)]).items()},
+            "columns": Locations.get_history_columns([("Seattle", 47.61, -122.33), ("Nowhere", 0.0, 0.0)],
+                                                     start=BASE + timedelta(hours=40)),
+        }
+
+    storage("row")
+    Locations.ingest_rows(make_rows())
+    row_results = run_queries()
+
+    storage("compact")
+    Locations.ingest_rows(make_rows())
+    compact_results = run_queries()
+
+    # Means may differ in the last rounded digit: compact storage averages integer hundredths
+    for key in ("hourly", "daily"):
+        for row_bucket, compact_bucket in zip(row_results.pop(key), compact_results.pop(key)):
+            means = [name for name in row_bucket if name.endswith("_mean")]
+            assert {name: compact_bucket.pop(name) for name in means} == pytest.approx(
+                {name: row_bucket.pop(name) for name in means}, abs=0.011)
+            assert compact_bucket == row_bucket
+    assert compact_results == row_results
+
+
+def test_find_nearest_compact(session, storage):
+    """Test the location index is loaded from, and kept in sync with, compact storage."""
+    storage("compact")
+    Locations.ingest_rows(make_rows()[:10])
+    assert Locations.find_nearest(42.37, -71.05)[0] == ("Boston", 42.36, -71.06)
+
+    Locations.ingest_rows([dict(row, city_name="Portland", latitude=43.66, longitude=-70.26) for row in make_rows()[:2]])
+    assert Locations.find_nearest(43.65, -70.25)[0] == ("Portland", 43.66, -70.26)
+
+
+def test_missing_location(session, storage):
+    """Test unknown locations behave as they do with row storage."""
+    storage("compact")
+    Locations.ingest_rows(make_rows()[:3])
+
+    with pytest.raises(ValueError):
+        Locations.get_current_weather("Nowhere", 0.0, 0.0)
+    with pytest.raises(ValueError):
+        Locations.get_location_by_id(999)
+    assert Locations.get_weather_range("Nowhere", 0.0, 0.0) == ([], None)
+    assert Locations.get_current_weather_many([("Nowhere", 0.0, 0.0), ("Boston", 42.36, -71.06)]).keys() == {
+        ("Boston", 42.36, -71.06)}
+
+
+def test_ingest_rejects_invalid_rows(session, storage):
+    """Test rows are validated before anything is encoded or written."""
+    storage("compact")
+    rows = make_rows()[:2]
+    rows[1]["latitude"] = 200.0
+
+    with pytest.raises(ValueError):
+        Locations.ingest_rows(rows)
+    assert session.query(LocationDim).count() == 0
+
+
+def test_failed_ingest_leaves_no_dimension_rows(session, storage, monkeypatch):
+    """Test dimension rows and cached ids roll back with the snapshots that reference them."""
+    storage("compact")
+    execute = session.execute
+
+    def fail_on_snapshots(statement, *args, **kwargs):
+        if getattr(getattr(statement, "table", None), "name", None) == CompactSnapshot.__tablename__:
+            raise SQLAlchemyError("disk full")
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(session, "execute", fail_on_snapshots)
+    with pytest.raises(SQLAlchemyError):
+        Locations.ingest_rows(make_rows()[:3])
+    monkeypatch.undo()
+
+    assert session.query(LocationDim).count() == 0
+    assert session.query(WeatherCondition).count() == 0
+    assert CompactStore._location_ids == {}
+
+    assert Locations.ingest_rows(make_rows()[:3]) == 3
+    assert Locations.get_current_weather("Boston", 42.36, -71.06).temp == pytest.approx(-4.26)
@@ -0,0 +1,45 @@
+import pytest
+
+import config
+from config import engine_options
+
+
+def test_engine_options_in_memory_sqlite():
+    """Test in-memory SQLite keeps Flask-SQLAlchemy's default single connection."""
+    assert engine_options("sqlite:///:memory:") == {}
+    assert engine_options("sqlite://") == {}
+
+
+def test_engine_options_sqlite_file():
+    """Test a SQLite file gets the pool settings but no statement timeout."""
+    options = engine_options("sqlite:////tmp/weather.db")
+
+    assert options == {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30.0, "pool_recycle": 1800,
+                       "pool_pre_ping": True}
+
+
+@pytest.mark.parametrize("uri, connect_args", [
+    ("postgresql+psycopg2://weather:secret@db:5432/weather", {"options": "-c statement_timeout=30000"}),
+    ("mysql+pymysql://weather:secret@db/weather", {"init_command": "SET SESSION max_execution_time=30000"}),
+    ("mariadb+pymysql://weather:secret@db/weather", {"init_command": "SET SESSION max_statement_time=30.0"}),
+])
+def test_engine_options_server_databases(uri, connect_args):
+    """Test server databases get the pool settings and a per-session statement timeout."""
+    options = engine_options(uri)
+
+    assert options["pool_size"] == 5
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == connect_args
+
+
+def test_engine_options_read_settings(monkeypatch):
+    """Test the DB_* settings are applied and a zero statement timeout is left unset."""
+    monkeypatch.setattr(config, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(config, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(config, "DB_POOL_PRE_PING", False)
+    monkeypatch.setattr(config, "DB_STATEMENT_TIMEOUT_MS", 0)
+
+    options = engine_options("postgresql://weather@db/weather")
+
+    assert (options["pool_size"], options["max_overflow"], options["pool_pre_ping"]) == (20, 0, False)
+    assert "connect_args" not in options
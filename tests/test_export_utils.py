@@ -0,0 +1,78 @@
+import csv
+from datetime import datetime
+import io
+import json
+
+import pytest
+
+from weather.models.locations_model import Locations
+from weather.utils.export_utils import serialize, to_csv, to_ndjson
+
+ROWS = [
+    {"id": 1, "city_name": "Boston", "time": datetime(2024, 1, 1, 12, 0), "temp": 1.5, "weather_main": None},
+    {"id": 2, "city_name": "New York, NY", "time": datetime(2024, 1, 1, 13, 0), "temp": -2.0, "weather_main": "Snow"},
+]
+COLUMNS = ("id", "city_name", "time", "temp", "weather_main")
+
+
+def test_to_ndjson():
+    """Test each row becomes one JSON line with ISO timestamps."""
+    lines = "".join(to_ndjson(ROWS)).splitlines()
+
+    assert [json.loads(line) for line in lines] == [
+        {"id": 1, "city_name": "Boston", "time": "2024-01-01T12:00:00", "temp": 1.5, "weather_main": None},
+        {"id": 2, "city_name": "New York, NY", "time": "2024-01-01T13:00:00", "temp": -2.0, "weather_main": "Snow"},
+    ]
+
+
+def test_to_csv():
+    """Test CSV output has a header and quotes values containing commas."""
+    text = "".join(to_csv(ROWS, COLUMNS))
+
+    assert list(csv.reader(io.StringIO(text))) == [
+        list(COLUMNS),
+        ["1", "Boston", "2024-01-01T12:00:00", "1.5", ""],
+        ["2", "New York, NY", "2024-01-01T13:00:00", "-2.0", "Snow"],
+    ]
+
+
+def test_serializers_are_lazy_and_chunked():
+    """Test rows are consumed as chunks are requested and chunks hold many lines."""
+    consumed = []
+
+    def rows():
+        for n in range(1000):
+            consumed.append(n)
+            yield {"id": n, "city_name": "Boston", "time": datetime(2024, 1, 1), "temp": 0.0, "weather_main": "Clear"}
+
+    chunks = to_csv(rows(), COLUMNS, chunk_bytes=1024)
+    first = next(chunks)
+
+    assert 1024 <= len(first) < 1200
+    assert len(consumed) < 1000
+    assert sum(len(chunk.splitlines()) for chunk in chunks) + len(first.splitlines()) == 1001
+
+
+def test_serialize_rejects_unknown_format():
+    """Test only the supported formats are accepted."""
+    with pytest.raises(ValueError):
+        serialize(ROWS, "xml", COLUMNS)
+
+
+def test_export_weather_cli(app, session, tmp_path):
+    """Test the export-weather command writes filtered rows to a file."""
+    Locations.ingest_rows([
+        {"city_name": city, "latitude": 1.0, "longitude": 2.0, "time": datetime(2024, 1, 1, hour),
+         "temp": 1.0, "feels_like": 1.0, "pressure": 1000, "humidity": 50, "weather_main": "Clear",
+         "weather_description": "clear sky"}
+        for city in ("Boston", "Seattle") for hour in range(3)
+    ])
+    output = tmp_path / "export.csv"
+
+    result = app.test_cli_runner().invoke(args=["export-weather", "--format", "csv", "--city-name", "Boston",
+                                                "--start", "2024-01-01T01:00:00", "--output", str(output)])
+
+    assert result.exit_code == 0, result.output
+    rows = list(csv.DictReader(output.open()))
+    assert [(row["city_name"], row["time"]) for row in rows] == [
+        ("Boston", "2024-01-01T01:00:00"), ("Boston", "2024-01-01T02:00:00")]
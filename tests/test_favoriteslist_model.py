@@ -1,12 +1,28 @@
 import pytest
 
-from weather.models.favoriteslist_model import FavoriteslistModel
+from weather.models.favoriteslist_model import Favorite, FavoriteslistModel
+from weather.models.user_model import Users
+
+
+@pytest.fixture(autouse=True)
+def clear_favorites_cache():
+    """Start every test with an empty per-process favorites cache."""
+    FavoriteslistModel.invalidate_all()
+    yield
+    FavoriteslistModel.invalidate_all()
+
+
+@pytest.fixture
+def user_id(session):
+    """Create a user that owns the favorites."""
+    Users.create_user("favuser", "password")
+    return Users.get_id_by_username("favuser")
 
 
 @pytest.fixture
-def fav_model():
+def fav_model(user_id):
     """Provide a fresh FavoriteslistModel for each test."""
-    return FavoriteslistModel()
+    return FavoriteslistModel(user_id)
 
 
 @pytest.fixture
@@ -94,3 +110,76 @@ def test_get_all_locations_empty(fav_model):
     """Test that get_all_locations on an empty list returns [] without error."""
     result = fav_model.get_all_locations()
     assert result == []
+
+
+def test_favorites_persist_across_instances(fav_model, user_id, sample_locations):
+    """Test favorites are stored in the database, not on the instance."""
+    for city, lat, lon in sample_locations:
+        fav_model.add_location_to_favoriteslist(city, lat, lon)
+
+    FavoriteslistModel.invalidate_all()
+    assert FavoriteslistModel(user_id).get_all_locations() == sample_locations
+
+
+def test_favorites_are_per_user(session, fav_model, sample_locations):
+    """Test one user's favorites are not visible to another user."""
+    Users.create_user("otheruser", "password")
+    other = FavoriteslistModel(Users.get_id_by_username("otheruser"))
+
+    city, lat, lon = sample_locations[0]
+    fav_model.add_location_to_favoriteslist(city, lat, lon)
+    other.add_location_to_favoriteslist(city, lat, lon)
+
+    assert other.get_all_locations() == [sample_locations[0]]
+    other.clear_favoriteslist()
+    assert fav_model.get_all_locations() == [sample_locations[0]]
+
+
+def test_contains(fav_model, sample_locations):
+    """Test membership checks against the cached favorites."""
+    city, lat, lon = sample_locations[0]
+    fav_model.add_location_to_favoriteslist(city, lat, lon)
+    assert fav_model.contains(city, lat, lon)
+    assert not fav_model.contains(*sample_locations[1])
+
+
+def test_add_duplicate_written_by_other_worker(session, fav_model, user_id, sample_locations):
+    """Test the unique constraint rejects a duplicate the local cache has not seen yet."""
+    assert fav_model.get_all_locations() == []
+    city, lat, lon = sample_locations[0]
+    session.add(Favorite(user_id=user_id, city_name=city, latitude=lat, longitude=lon))
+    session.commit()
+
+    with pytest.raises(ValueError, match="already exists"):
+        fav_model.add_location_to_favoriteslist(city, lat, lon)
+    assert fav_model.get_all_locations() == [sample_locations[0]]
+
+
+def test_get_all_favorited_locations_distinct(session, fav_model, sample_locations):
+    """Test the distinct favorited locations across all users."""
+    Users.create_user("otheruser", "password")
+    other = FavoriteslistModel(Users.get_id_by_username("otheruser"))
+    for city, lat, lon in sample_locations:
+        fav_model.add_location_to_favoriteslist(city, lat, lon)
+    other.add_location_to_favoriteslist(*sample_locations[0])
+
+    assert sorted(FavoriteslistModel.get_all_favorited_locations()) == sample_locations
+
+
+def test_delete_user_removes_favorites(session, fav_model, sample_locations):
+    """Test deleting a user also deletes their favorites."""
+    fav_model.add_location_to_favoriteslist(*sample_locations[0])
+    Users.delete_user("favuser")
+    assert session.query(Favorite).count() == 0
+
+
+def test_near_identical_coordinates_are_one_favorite(fav_model):
+    """Test coordinates within the quantization step are treated as the same favorite."""
+    fav_model.add_location_to_favoriteslist("CityA", 10.00001, 20.00002)
+
+    assert fav_model.get_all_locations() == [("CityA", 10.0, 20.0)]
+    assert fav_model.contains("CityA", 10.0, 20.0)
+    with pytest.raises(ValueError):
+        fav_model.add_location_to_favoriteslist("CityA", 9.99999, 20.0)
+    fav_model.remove_location("CityA", 10.00003, 19.99998)
+    assert fav_model.get_all_locations() == []
@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from weather.models.forecast_model import FORECAST_CYCLE_SECONDS, ForecastModel
+from weather.utils import api_utils
+from weather.utils.resilience_utils import CircuitOpenError, UpstreamUnavailableError
+
+BOSTON = ("Boston", 42.36, -71.06)
+# The stub forecast starts 3 hours after this instant (2023-11-14T22:13:20Z)
+NOW = 1700000000
+
+
+class Clock:
+    """A settable stand-in for time.time."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock(NOW)
+
+
+@pytest.fixture
+def forecast_model(clock):
+    return ForecastModel(clock=clock)
+
+
+def forecast_requests(weather_api):
+    return [path for path, _ in weather_api.requests if path.endswith("/forecast")]
+
+
+def test_get_forecast_fetches_once_per_cycle(weather_api, forecast_model):
+    """Test repeated reads in one cycle are served from the store."""
+    first = forecast_model.get_forecast(*BOSTON)
+    second = forecast_model.get_forecast(*BOSTON)
+
+    assert first is second
+    assert first.issued_at == datetime(2023, 11, 14, 21, 0)
+    assert len(first.entries) == 40
+    assert len(forecast_requests(weather_api)) == 1
+    assert forecast_model.stats()["upstream_fetches"] == 1
+
+
+def test_get_forecast_refetches_in_next_cycle(weather_api, forecast_model, clock):
+    """Test a new forecast cycle triggers exactly one new upstream fetch."""
+    forecast_model.get_forecast(*BOSTON)
+    clock.now += FORECAST_CYCLE_SECONDS
+
+    forecast = forecast_model.get_forecast(*BOSTON)
+    forecast_model.get_forecast(*BOSTON)
+
+    assert forecast.issued_at == datetime(2023, 11, 15, 0, 0)
+    assert len(forecast_requests(weather_api)) == 2
+
+
+def test_concurrent_misses_share_one_fetch(weather_api, forecast_model):
+    """Test simultaneous reads for a cold location make a single upstream request."""
+    weather_api.delay = 0.1
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: forecast_model.get_forecast(*BOSTON), range(8)))
+
+    assert all(result is results[0] for result in results)
+    assert len(forecast_requests(weather_api)) == 1
+
+
+def test_get_next_hours(weather_api, forecast_model):
+    """Test the next 24 hours slice covers only entries inside the window."""
+    entries = forecast_model.get_next_hours(*BOSTON, hours=24)
+
+    assert [entry["time"] for entry in entries] == [
+        "2023-11-15T01:13:20", "2023-11-15T04:13:20", "2023-11-15T07:13:20", "2023-11-15T10:13:20",
+        "2023-11-15T13:13:20", "2023-11-15T16:13:20", "2023-11-15T19:13:20",
+    ]
+    assert entries[0]["temp"] == 22.0
+
+
+def test_get_day(weather_api, forecast_model):
+    """Test day slices follow UTC calendar days."""
+    assert forecast_model.get_day(*BOSTON, day=0) == []
+    tomorrow = forecast_model.get_day(*BOSTON, day=1)
+
+    assert len(tomorrow) == 8
+    assert all(entry["time"].startswith("2023-11-15") for entry in tomorrow)
+    assert len(forecast_requests(weather_api)) == 1
+
+
+def test_get_forecast_upstream_error(weather_api, forecast_model):
+    """Test an upstream failure is not stored and is not retried again in the same cycle."""
+    weather_api.places["Boston"] = BOSTON[1:]
+    weather_api.fail_cities.add("Boston")
+
+    for _ in range(3):
+        with pytest.raises(UpstreamUnavailableError, match="404"):
+            forecast_model.get_forecast(*BOSTON)
+    assert len(forecast_model.store) == 0
+    assert len(forecast_requests(weather_api)) == 1
+    assert forecast_model.stats()["upstream_failures"] == 1
+
+
+def test_get_forecast_serves_previous_cycle_when_fetch_fails(weather_api, forecast_model, clock):
+    """Test a failed fetch for a new cycle serves the stored forecast, fetching upstream only once."""
+    fresh = forecast_model.get_forecast(*BOSTON)
+    clock.now += FORECAST_CYCLE_SECONDS
+    weather_api.places["Boston"] = BOSTON[1:]
+    weather_api.fail_cities.add("Boston")
+
+    served = [forecast_model.get_forecast(*BOSTON) for _ in range(4)]
+
+    assert all(forecast.stale and forecast.issued_at == fresh.issued_at for forecast in served)
+    assert len(forecast_requests(weather_api)) == 2
+
+
+def test_get_forecast_retries_after_backoff(weather_api, forecast_model, monkeypatch):
+    """Test a failed fetch is tried again once its backoff has passed."""
+    monkeypatch.setattr(forecast_model.failures, "ttl", 0)
+    weather_api.places["Boston"] = BOSTON[1:]
+    weather_api.fail_cities.add("Boston")
+    with pytest.raises(UpstreamUnavailableError):
+        forecast_model.get_forecast(*BOSTON)
+    weather_api.fail_cities.clear()
+
+    assert len(forecast_model.get_forecast(*BOSTON).entries) == 40
+    assert len(forecast_requests(weather_api)) == 2
+
+
+def test_get_forecast_serves_previous_cycle_while_breaker_open(weather_api, forecast_model, clock):
+    """Test the last stored forecast is served marked stale while upstream calls are refused."""
+    fresh = forecast_model.get_forecast(*BOSTON)
+    clock.now += FORECAST_CYCLE_SECONDS
+    for _ in range(api_utils.breaker.min_calls):
+        api_utils.breaker.record(False, 0)
+
+    stale = forecast_model.get_forecast(*BOSTON)
+
+    assert stale.stale is True
+    assert stale.issued_at == fresh.issued_at
+    assert fresh.stale is False
+    assert len(forecast_requests(weather_api)) == 1
+    with pytest.raises(CircuitOpenError):
+        forecast_model.get_forecast("Zocca", 44.34, 10.99)
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from weather.utils.geo_utils import GridIndex, haversine_km, location_key, quantize
+
+BOSTON = ("Boston", 42.3601, -71.0589)
+CAMBRIDGE = ("Cambridge", 42.3736, -71.1097)
+NEW_YORK = ("New York", 40.7128, -74.0060)
+
+
+def test_haversine_km():
+    """Test distances against known values."""
+    assert haversine_km(*BOSTON[1:], *BOSTON[1:]) == 0
+    assert haversine_km(*BOSTON[1:], *NEW_YORK[1:]) == pytest.approx(306, abs=1)
+    assert haversine_km(0, 179.99, 0, -179.99) == pytest.approx(2.22, abs=0.01)
+
+
+def test_nearest_within_radius():
+    """Test the closest location in range is returned, optionally filtered by city name."""
+    index = GridIndex(0.1)
+    index.add_many([BOSTON, CAMBRIDGE, NEW_YORK])
+
+    location, distance = index.nearest(42.365, -71.07, 5)
+    assert location == BOSTON
+    assert distance < 1.5
+    assert index.nearest(42.365, -71.07, 5, city_name="Cambridge")[0] == CAMBRIDGE
+    assert index.nearest(42.365, -71.07, 0.1) is None
+    assert index.nearest(40.9, -74.2, 50)[0] == NEW_YORK
+
+
+def test_within_orders_by_distance():
+    """Test radius queries return every match, nearest first, up to the limit."""
+    index = GridIndex(0.1)
+    index.add_many([NEW_YORK, CAMBRIDGE, BOSTON])
+
+    matches = index.within(42.36, -71.06, 400)
+    assert [location for location, _ in matches] == [BOSTON, CAMBRIDGE, NEW_YORK]
+    assert index.within(42.36, -71.06, 400, limit=1)[0][0] == BOSTON
+
+
+def test_wraps_antimeridian_and_poles():
+    """Test searches cross longitude ±180 and cover every column near a pole."""
+    index = GridIndex(0.1)
+    fiji = ("Fiji", -17.0, 179.99)
+    station = ("Station", 89.95, 10.0)
+    index.add_many([fiji, station])
+
+    assert index.nearest(-17.0, -179.99, 5)[0] == fiji
+    assert index.nearest(89.95, -170.0, 20)[0] == station
+
+
+def test_add_discard_replace():
+    """Test updates keep the size right and replace marks the index as built."""
+    index = GridIndex(0.1)
+    index.add(BOSTON)
+    index.add(BOSTON)
+    assert len(index) == 1
+    assert index.built_at is None
+
+    index.discard(BOSTON)
+    index.discard(BOSTON)
+    assert len(index) == 0
+    assert index.nearest(*BOSTON[1:], 1) is None
+
+    index.replace([BOSTON, NEW_YORK])
+    assert len(index) == 2
+    assert index.built_at is not None
+    index.clear()
+    assert len(index) == 0
+    assert index.built_at is None
+
+
+def test_matches_brute_force():
+    """Test grid lookups agree with a full scan."""
+    rng = random.Random(3)
+    locations = [(f"City{i}", rng.uniform(40, 45), rng.uniform(-75, -70)) for i in range(2000)]
+    index = GridIndex(0.05)
+    index.replace(locations)
+
+    for _ in range(200):
+        lat, lon, radius = rng.uniform(40, 45), rng.uniform(-75, -70), rng.uniform(0.5, 30)
+        expected = sorted((haversine_km(lat, lon, loc[1], loc[2]), loc) for loc in locations
+                          if haversine_km(lat, lon, loc[1], loc[2]) <= radius)
+        assert [loc for loc, _ in index.within(lat, lon, radius)] == [loc for _, loc in expected]
+        nearest = index.nearest(lat, lon, radius)
+        assert (nearest[0] if nearest else None) == (expected[0][1] if expected else None)
+
+
+def test_invalid_cell_size():
+    """Test the cell size must be positive."""
+    with pytest.raises(ValueError):
+        GridIndex(0)
+
+
+def test_quantize():
+    """Test coordinates are rounded to the configured precision and always returned as floats."""
+    assert quantize(40.71281) == 40.7128
+    assert quantize(40.71276) == 40.7128
+    assert quantize(40.71281, 2) == 40.71
+    assert quantize(10) == 10.0 and isinstance(quantize(10), float)
+    assert str(quantize(-0.00001)) == "0.0"
+
+
+def test_location_key():
+    """Test near-identical lookups share one key."""
+    assert location_key(" New York ", 40.71281, -74.00604) == NEW_YORK
+    assert location_key(*NEW_YORK) == NEW_YORK
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from weather.models.geocoding_model import GeocodedCity, normalize_city_name
+
+
+@pytest.fixture(autouse=True)
+def clear_geocoding_cache():
+    """Start every test with an empty per-process geocoding cache."""
+    GeocodedCity.clear_cache()
+    yield
+    GeocodedCity.clear_cache()
+
+
+@pytest.fixture
+def places(weather_api):
+    """Places the stub geocoding API knows about."""
+    weather_api.places.update({"Boston": (42.3601, -71.0589), "Zocca": (44.34, 10.99)})
+    return weather_api
+
+
+def geocode_requests(weather_api):
+    return [params["q"] for path, params in weather_api.requests if path.endswith("/direct")]
+
+
+def test_normalize_city_name():
+    """Test names differing only in case and whitespace normalize to the same key."""
+    assert normalize_city_name("  New   York ") == normalize_city_name("new york") == "new york"
+
+
+def test_resolve_calls_upstream_once_per_name(session, places):
+    """Test repeat lookups, in any spelling, are served without resolving the name again."""
+    assert GeocodedCity.resolve("Boston") == ("Boston", 42.3601, -71.0589)
+    assert GeocodedCity.resolve(" BOSTON ") == ("Boston", 42.3601, -71.0589)
+
+    assert geocode_requests(places) == ["boston"]
+
+
+def test_resolve_reads_the_table_after_a_restart(session, places):
+    """Test a name resolved earlier is read from geocoding_cache, not from upstream."""
+    GeocodedCity.resolve("Zocca")
+    GeocodedCity.clear_cache()
+
+    assert GeocodedCity.resolve("zocca") == ("Zocca", 44.34, 10.99)
+    assert len(geocode_requests(places)) == 1
+    stored = session.get(GeocodedCity, "zocca")
+    assert (stored.country, stored.created_at is not None) == ("TC", True)
+
+
+def test_model_query_is_not_shadowed(session, places):
+    """Test the stored rows can be read through Model.query like the other models."""
+    GeocodedCity.resolve("Boston")
+
+    assert GeocodedCity.query.filter_by(normalized_name="boston").one().name == "Boston"
+
+
+def test_resolve_coalesces_concurrent_lookups(app, session, places):
+    """Test concurrent lookups of one name make a single upstream call."""
+    places.delay = 0.2
+
+    def resolve(_):
+        with app.app_context():
+            return GeocodedCity.resolve("Boston")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(resolve, range(4)))
+
+    assert set(results) == {("Boston", 42.3601, -71.0589)}
+    assert len(geocode_requests(places)) == 1
+
+
+def test_resolve_unknown_name(session, places):
+    """Test a name with no match raises and is not stored."""
+    with pytest.raises(ValueError, match="No place found"):
+        GeocodedCity.resolve("Atlantis")
+    with pytest.raises(ValueError):
+        GeocodedCity.resolve("   ")
+
+    assert session.query(GeocodedCity).count() == 0
@@ -1,7 +1,13 @@
 from datetime import datetime, timedelta, timezone
 import pytest
+from sqlalchemy import desc, inspect, text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.exc import SQLAlchemyError
 
-from weather.models.locations_model import Locations
+from weather.db import ensure_indexes
+from weather.models import locations_model
+from weather.models.locations_model import (LOCATION_MAX_RADIUS_KM, LatestWeather, Locations, decode_cursor,
+                                            encode_cursor, location_index, parse_timestamp)
 
 @pytest.fixture
 def location_london(session):
@@ -110,4 +116,447 @@ def test_get_weather_history_returns_limit_3(session):
 def test_get_weather_history_invalid(app):
     """Test error when method get_weather_history_returns does not get a valid location."""
     with pytest.raises(ValueError):
-        Locations.get_weather_history("oeeaeoeeeae", 12, 34)
\ No newline at end of file
+        Locations.get_weather_history("oeeaeoeeeae", 12, 34)
+
+@pytest.fixture
+def hourly_history(session):
+    """Two days of readings every 20 minutes for one location."""
+    base = datetime(2024, 1, 1)
+    Locations.ingest_rows([
+        {"city_name": "cityH", "latitude": 10.0, "longitude": 20.0, "time": base + timedelta(minutes=20 * i),
+         "temp": float(i % 3), "feels_like": float(i), "pressure": 1000 + i, "humidity": 50,
+         "weather_main": "Clear", "weather_description": "clear sky"}
+        for i in range(144)
+    ])
+    return base
+
+
+def test_get_weather_range_pages_with_keyset(hourly_history):
+    """Test walking the cursor returns every row once, in time order."""
+    seen = []
+    cursor = None
+    while True:
+        rows, cursor = Locations.get_weather_range("cityH", 10.0, 20.0, limit=50, after=cursor)
+        seen += rows
+        if cursor is None:
+            break
+
+    assert len(seen) == 144
+    assert [row["time"] for row in seen] == sorted(row["time"] for row in seen)
+    assert len({row["id"] for row in seen}) == 144
+
+
+def test_get_weather_range_bounds(hourly_history):
+    """Test start is inclusive and end is exclusive."""
+    rows, cursor = Locations.get_weather_range("cityH", 10.0, 20.0, start=hourly_history + timedelta(hours=1),
+                                               end=hourly_history + timedelta(hours=2))
+
+    assert [row["time"].minute for row in rows] == [0, 20, 40]
+    assert cursor is None
+
+
+def test_get_weather_range_invalid_limit(app):
+    """Test a non-positive page size is rejected."""
+    with pytest.raises(ValueError):
+        Locations.get_weather_range("cityH", 10.0, 20.0, limit=0)
+
+
+def test_get_weather_aggregates_hourly(hourly_history):
+    """Test hourly buckets hold min/mean/max of the readings in each hour."""
+    buckets, next_start = Locations.get_weather_aggregates("cityH", 10.0, 20.0, "hour", limit=24)
+
+    assert len(buckets) == 24
+    assert buckets[0]["time"] == hourly_history
+    assert buckets[0]["samples"] == 3
+    assert (buckets[0]["temp_min"], buckets[0]["temp_mean"], buckets[0]["temp_max"]) == (0.0, 1.0, 2.0)
+    assert (buckets[1]["pressure_min"], buckets[1]["pressure_max"]) == (1003, 1005)
+    assert next_start == hourly_history + timedelta(hours=24)
+
+
+def test_get_weather_aggregates_daily(hourly_history):
+    """Test daily buckets cover whole days and the last page has no next start."""
+    buckets, next_start = Locations.get_weather_aggregates("cityH", 10.0, 20.0, "day")
+
+    assert [bucket["time"] for bucket in buckets] == [hourly_history, hourly_history + timedelta(days=1)]
+    assert [bucket["samples"] for bucket in buckets] == [72, 72]
+    assert next_start is None
+
+
+def test_get_weather_aggregates_invalid_interval(app):
+    """Test only hourly and daily downsampling are accepted."""
+    with pytest.raises(ValueError):
+        Locations.get_weather_aggregates("cityH", 10.0, 20.0, "week")
+
+
+def test_time_bucket_per_dialect():
+    """Test every supported backend truncates in SQL and others are rejected as invalid input."""
+    column = Locations.__table__.c.time
+    compiled = str(locations_model._time_bucket(column, "hour", "mysql").compile(dialect=mysql.dialect()))
+    assert "date_format" in compiled
+    for dialect in ("postgresql", "sqlite", "mariadb"):
+        locations_model._time_bucket(column, "day", dialect)
+    with pytest.raises(ValueError, match="not supported on the oracle"):
+        locations_model._time_bucket(column, "day", "oracle")
+
+
+def test_iter_export_filters_and_streams(hourly_history, location_london):
+    """Test export rows are yielded in id order and honour the location and time filters."""
+    everything = list(Locations.iter_export(batch_size=10))
+    assert len(everything) == 145
+    assert [row["id"] for row in everything] == sorted(row["id"] for row in everything)
+
+    rows = list(Locations.iter_export(city_name="cityH", latitude=10.0, longitude=20.0,
+                                      start=hourly_history + timedelta(days=1), batch_size=7))
+    assert len(rows) == 72
+    assert rows[0]["time"] == hourly_history + timedelta(days=1)
+    assert set(rows[0]) == {"id", "city_name", "latitude", "longitude", "time", "temp", "feels_like",
+                            "pressure", "humidity", "weather_main", "weather_description"}
+
+
+def test_history_cursor_round_trip():
+    """Test cursors survive encoding and timezone-aware bounds become naive UTC."""
+    cursor = (datetime(2024, 1, 1, 12, 30), 42)
+    assert decode_cursor(encode_cursor(cursor)) == cursor
+    assert parse_timestamp("2024-01-01T14:30:00+02:00") == datetime(2024, 1, 1, 12, 30)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_location_time_index_exists(session):
+    """Test the composite lookup index is created with the table."""
+    indexes = inspect(session.get_bind()).get_indexes("weather_data")
+    index = next(i for i in indexes if i["name"] == "ix_weather_data_location_time")
+    assert index["column_names"] == ["city_name", "latitude", "longitude", "time"]
+
+
+def test_current_weather_lookup_uses_index(session, location_zocca):
+    """Test the latest-snapshot query is served by the composite index."""
+    query = Locations.query.filter_by(city_name="Zocca", latitude=44.34, longitude=10.99).order_by(desc(Locations.time)).limit(1)
+    compiled = query.statement.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = " ".join(str(row) for row in session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    assert "ix_weather_data_location_time" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_ensure_indexes_migrates_existing_table(session):
+    """Test ensure_indexes adds the index to a table created without it."""
+    session.execute(text("DROP INDEX ix_weather_data_location_time"))
+    session.commit()
+
+    ensure_indexes()
+
+    names = [i["name"] for i in inspect(session.get_bind()).get_indexes("weather_data")]
+    assert "ix_weather_data_location_time" in names
+
+
+def make_snapshot(city_name, latitude, longitude, time, temp=280.0):
+    return Locations(
+        city_name=city_name,
+        latitude=latitude,
+        longitude=longitude,
+        time=time,
+        temp=temp,
+        weather_main="Clear",
+        weather_description="clear sky"
+    )
+
+
+def test_latest_weather_tracks_newest_snapshot(session):
+    """Test latest_weather points at the newest snapshot even when writes arrive out of order."""
+    base_time = datetime(2024, 1, 1, 12)
+    newest = make_snapshot("cityL", 1.5, 2.5, base_time, temp=300)
+    session.add(newest)
+    session.commit()
+    session.add(make_snapshot("cityL", 1.5, 2.5, base_time - timedelta(hours=1), temp=200))
+    session.commit()
+
+    pointer = session.get(LatestWeather, ("cityL", 1.5, 2.5))
+    assert pointer.snapshot_id == newest.id
+    assert Locations.get_current_weather("cityL", 1.5, 2.5).temp == 300
+
+
+def test_latest_weather_advances_on_newer_snapshot(session, location_zocca):
+    """Test a newer snapshot replaces the pointer."""
+    newer = make_snapshot("Zocca", 44.34, 10.99, location_zocca.time + timedelta(hours=3), temp=301)
+    session.add(newer)
+    session.commit()
+
+    assert session.get(LatestWeather, ("Zocca", 44.34, 10.99)).snapshot_id == newer.id
+    assert Locations.get_current_weather("Zocca", 44.34, 10.99).temp == 301
+
+
+def test_get_current_weather_falls_back_without_pointer(session, location_zocca):
+    """Test rows without a latest_weather pointer are still found through the index."""
+    session.execute(LatestWeather.__table__.delete())
+    session.commit()
+
+    loc = Locations.get_current_weather("Zocca", 44.34, 10.99)
+    assert loc.id == location_zocca.id
+
+
+def test_get_current_weather_many(location_london, location_zocca):
+    """Test many locations are fetched in one call and unknown keys are omitted."""
+    result = Locations.get_current_weather_many([
+        ("London", 51.5085, -0.1257),
+        ("Zocca ", 44.34, 10.99),
+        ("Nowhere", 0.0, 0.0),
+    ])
+
+    assert set(result) == {("London", 51.5085, -0.1257), ("Zocca", 44.34, 10.99)}
+    assert result[("Zocca", 44.34, 10.99)].temp == 294.93
+
+
+def test_latest_weather_rebuild(session, location_london, location_zocca):
+    """Test rebuild recomputes every pointer from weather_data."""
+    session.execute(LatestWeather.__table__.delete())
+    session.commit()
+
+    assert LatestWeather.rebuild() == 2
+    assert session.get(LatestWeather, ("London", 51.5085, -0.1257)).snapshot_id == location_london.id
+
+
+def test_latest_weather_generic_upsert_handles_existing_pointers(session, location_zocca):
+    """Test the fallback upsert turns a key conflict into a forward-only update."""
+    connection = session.connection()
+    older = {"city_name": "Zocca", "latitude": 44.34, "longitude": 10.99,
+             "snapshot_id": location_zocca.id - 1, "time": location_zocca.time - timedelta(hours=1)}
+    LatestWeather._upsert_generic(connection, [older])
+    assert session.get(LatestWeather, ("Zocca", 44.34, 10.99)).snapshot_id == location_zocca.id
+
+    newer = make_snapshot("Zocca", 44.34, 10.99, location_zocca.time + timedelta(hours=1), temp=300)
+    session.add(newer)
+    session.flush()
+    LatestWeather._upsert_generic(connection, [{**older, "snapshot_id": newer.id, "time": newer.time},
+                                               {**older, "city_name": "Zocca2", "snapshot_id": location_zocca.id}])
+    session.commit()
+
+    session.expire_all()
+    assert session.get(LatestWeather, ("Zocca", 44.34, 10.99)).snapshot_id == newer.id
+    assert session.get(LatestWeather, ("Zocca2", 44.34, 10.99)) is not None
+
+
+def test_latest_weather_mysql_upsert_is_conditional():
+    """Test the MySQL upsert only moves a pointer forward and compares before assigning time."""
+    row = {"city_name": "Zocca", "latitude": 44.34, "longitude": 10.99, "snapshot_id": 1,
+           "time": datetime(2024, 1, 1)}
+    sql = str(LatestWeather._mysql_upsert([row]).compile(dialect=mysql.dialect()))
+
+    assert "ON DUPLICATE KEY UPDATE" in sql
+    assert sql.index("snapshot_id = CASE") < sql.index("time = CASE")
+
+
+WEATHER_PAYLOAD = {
+    "coord": {"lon": 10.99, "lat": 44.34},
+    "weather": [{"main": "Rain", "description": "moderate rain"}],
+    "main": {"temp": 298.48, "feels_like": 298.74, "pressure": 1015, "humidity": 64},
+    "dt": 1661870592,
+    "name": "Zocca",
+}
+
+
+def forecast_payload(city_name, lat, lon, entries):
+    return {
+        "city": {"name": city_name, "coord": {"lat": lat, "lon": lon}},
+        "list": [
+            {
+                "dt": 1661871600 + 10800 * i,
+                "main": {"temp": 290 + i, "feels_like": 289 + i, "pressure": 1010, "humidity": 50},
+                "weather": [{"main": "Clouds", "description": "few clouds"}],
+            }
+            for i in range(entries)
+        ],
+    }
+
+
+def test_rows_from_weather_payload():
+    """Test a /weather payload maps to a single row."""
+    rows = Locations.rows_from_weather_payload(WEATHER_PAYLOAD)
+    assert rows == [{
+        "city_name": "Zocca",
+        "latitude": 44.34,
+        "longitude": 10.99,
+        "time": datetime(2022, 8, 30, 14, 43, 12),
+        "temp": 298.48,
+        "feels_like": 298.74,
+        "pressure": 1015,
+        "humidity": 64,
+        "weather_main": "Rain",
+        "weather_description": "moderate rain",
+    }]
+
+
+def test_rows_from_forecast_payload_coerces_coordinates():
+    """Test a /forecast payload maps to one row per entry with float coordinates."""
+    rows = Locations.rows_from_forecast_payload(forecast_payload("Integer City", 40, -70, 3))
+    assert len(rows) == 3
+    assert rows[0]["latitude"] == 40.0 and isinstance(rows[0]["latitude"], float)
+    assert rows[2]["time"] - rows[0]["time"] == timedelta(hours=6)
+
+
+def test_validate_rows_reports_all_bad_rows():
+    """Test batch validation lists every failing rule and row."""
+    rows = Locations.rows_from_weather_payload(WEATHER_PAYLOAD) + [
+        {"city_name": "", "latitude": 100.0, "longitude": 10.0, "time": datetime.now()},
+        {"city_name": "Bad", "latitude": 10.0, "longitude": 10.0, "time": "not date"},
+    ]
+    with pytest.raises(ValueError) as excinfo:
+        Locations.validate_rows(rows)
+    message = str(excinfo.value)
+    assert "City Name must be a non-empty string. (rows [1])" in message
+    assert "Latitude must be within bounds of [-90,90] (rows [1])" in message
+    assert "Time must be a datetime object (rows [2])" in message
+
+
+def test_bulk_ingest(session):
+    """Test current and forecast payloads are written and latest_weather advances."""
+    payloads = [WEATHER_PAYLOAD, forecast_payload("Zocca", 44.34, 10.99, 5), forecast_payload("Boston", 42.36, -71.06, 4)]
+
+    written = Locations.bulk_ingest(payloads, batch_size=2)
+
+    assert written == 10
+    assert session.query(Locations).count() == 10
+    latest = Locations.get_current_weather("Zocca", 44.34, 10.99)
+    assert latest.temp == 294
+    assert session.query(LatestWeather).count() == 2
+
+
+def test_bulk_ingest_without_returning(session, monkeypatch):
+    """Test backends without INSERT ... RETURNING (MySQL) still advance latest_weather."""
+    monkeypatch.setattr(session.get_bind().dialect, "insert_executemany_returning_sort_by_parameter_order", False)
+
+    written = Locations.bulk_ingest([forecast_payload("Boston", 42.36, -71.06, 4)], batch_size=3)
+
+    assert written == 4
+    latest = session.query(LatestWeather).one()
+    assert latest.snapshot_id == session.query(Locations).order_by(desc(Locations.time)).first().id
+
+
+def test_bulk_ingest_invalid_writes_nothing(session):
+    """Test one invalid row rejects the whole ingest."""
+    bad = dict(WEATHER_PAYLOAD, coord={"lat": 200, "lon": 10.99})
+    with pytest.raises(ValueError):
+        Locations.bulk_ingest([WEATHER_PAYLOAD, bad])
+    assert session.query(Locations).count() == 0
+
+
+def test_ingest_rows_skip_existing(session):
+    """Test skip_existing stores each (location, time) once across and within ingests."""
+    rows = Locations.rows_from_forecast_payload(forecast_payload("Boston", 42.36, -71.06, 3))
+    Locations.ingest_rows(rows[:2])
+
+    written = Locations.ingest_rows(rows + rows[2:], skip_existing=True)
+
+    assert written == 1
+    assert session.query(Locations).count() == 3
+    assert Locations.ingest_rows(rows, skip_existing=True) == 0
+
+
+def test_bulk_ingest_empty(session):
+    """Test ingesting nothing is a no-op."""
+    assert Locations.bulk_ingest([]) == 0
+
+
+def test_find_nearest(session, location_london, location_zocca):
+    """Test a point near a stored location matches it, and points out of range do not."""
+    (key, distance) = Locations.find_nearest(51.51, -0.13, radius_km=5)
+
+    assert key == ("London", 51.5085, -0.1257)
+    assert distance < 1
+    assert Locations.find_nearest(51.51, -0.13, radius_km=5, city_name="Zocca") is None
+    assert Locations.find_nearest(48.85, 2.35, radius_km=5) is None
+    assert Locations.find_within(48.0, 5.0, radius_km=100) == []
+    assert [key for key, _ in Locations.find_within(51.5, -0.1, radius_km=50)] == [("London", 51.5085, -0.1257)]
+
+
+def test_find_nearest_tracks_writes(session, location_london):
+    """Test locations written after the index was built are found without a reload."""
+    assert Locations.find_nearest(44.34, 10.99) is None
+    built_at = location_index.built_at
+
+    Locations.bulk_ingest([forecast_payload("Zocca", 44.34, 10.99, 2)])
+
+    assert Locations.find_nearest(44.35, 11.0)[0] == ("Zocca", 44.34, 10.99)
+    assert location_index.built_at == built_at
+
+
+def test_location_index_only_holds_committed_locations(session, location_london, monkeypatch):
+    """Test rolled-back writes never reach the index and committed ORM writes do."""
+    assert Locations.find_nearest(44.34, 10.99) is None
+
+    session.add(make_snapshot("Zocca", 44.34, 10.99, datetime(2024, 1, 1)))
+    session.flush()
+    session.rollback()
+    assert Locations.find_nearest(44.34, 10.99) is None
+
+    def fail(connection, rows):
+        raise SQLAlchemyError("connection lost")
+    monkeypatch.setattr(LatestWeather, "upsert", fail)
+    with pytest.raises(SQLAlchemyError):
+        Locations.bulk_ingest([forecast_payload("Zocca", 44.34, 10.99, 2)])
+    monkeypatch.undo()
+    assert Locations.find_nearest(44.34, 10.99) is None
+
+    session.add(make_snapshot("Zocca", 44.34, 10.99, datetime(2024, 1, 1)))
+    session.commit()
+    assert Locations.find_nearest(44.34, 10.99)[0] == ("Zocca", 44.34, 10.99)
+
+
+def test_match_location(session, location_london):
+    """Test a nearby point with the same city name is matched to the stored location."""
+    assert Locations.match_location("London", 51.51, -0.13) == ("London", 51.5085, -0.1257)
+    assert Locations.match_location(" London ", 51.5085, -0.1257) == ("London", 51.5085, -0.1257)
+    assert Locations.match_location("Westminster", 51.51, -0.13) == ("Westminster", 51.51, -0.13)
+    assert Locations.match_location("London", 48.85, 2.35) == ("London", 48.85, 2.35)
+
+
+def test_find_nearest_reloads_after_refresh_interval(session, location_london, monkeypatch):
+    """Test the index is reloaded from the database to pick up writes from other processes."""
+    assert Locations.find_nearest(51.51, -0.13) is not None
+    session.execute(LatestWeather.__table__.delete())
+    session.commit()
+    assert Locations.find_nearest(51.51, -0.13) is not None
+
+    monkeypatch.setattr(locations_model, "LOCATION_INDEX_REFRESH_SECONDS", 0)
+    assert Locations.find_nearest(51.51, -0.13) is None
+
+
+def test_find_nearest_invalid_point(session):
+    """Test out-of-range coordinates and radii are rejected."""
+    with pytest.raises(ValueError):
+        Locations.find_nearest(91, 0)
+    with pytest.raises(ValueError):
+        Locations.find_nearest(0, 181)
+    with pytest.raises(ValueError):
+        Locations.find_nearest(0, 0, radius_km=LOCATION_MAX_RADIUS_KM + 1)
+
+
+
+def test_near_identical_coordinates_share_location(session, location_london):
+    """Test lookups and writes at coordinates within the quantization step hit the same location."""
+    assert Locations.get_current_weather("London", 51.50851, -0.12566).id == location_london.id
+    assert len(Locations.get_weather_history(" London", 51.508504, -0.1257)) == 1
+
+    Locations.bulk_ingest([forecast_payload("London", 51.50849, -0.12571, 2)])
+
+    assert len(Locations.get_weather_history("London", 51.5085, -0.1257)) == 3
+    assert Locations.get_location_keys() == [("London", 51.5085, -0.1257)]
+
+
+def test_coordinate_dedup_report(session):
+    """Test the report counts the locations that would merge at each precision."""
+    session.execute(Locations.__table__.insert(), [
+        {"city_name": "Oslo", "latitude": lat, "longitude": 10.75, "time": datetime(2024, 1, 1, hour)}
+        for hour, lat in enumerate([59.91, 59.91, 59.912, 59.9139])
+    ])
+    session.commit()
+
+    report = {entry["precision"]: entry for entry in Locations.coordinate_dedup_report([1, 2, 4])}
+
+    assert report[4] == {"precision": 4, "locations": 3, "quantized_locations": 3, "merged_locations": 0,
+                         "rows_rekeyed": 0, "rows": 4}
+    assert report[2]["quantized_locations"] == 1
+    assert report[2]["merged_locations"] == 2
+    assert report[2]["rows_rekeyed"] == 2
+    assert report[1]["rows_rekeyed"] == 4
+    with pytest.raises(ValueError):
+        Locations.coordinate_dedup_report([-1])
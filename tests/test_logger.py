@@ -0,0 +1,68 @@
+import json
+import logging
+import logging.handlers
+
+from flask.logging import default_handler
+
+from weather.utils.logger import JsonFormatter, TruncatedPayload, configure_logger
+
+
+def queue_handlers():
+    return [h for h in logging.getLogger().handlers if isinstance(h, logging.handlers.QueueHandler)]
+
+
+def test_configure_logger_is_idempotent():
+    """Test repeated configuration installs one queue handler and none on the logger itself."""
+    logger = logging.getLogger("weather.tests.idempotent")
+    configure_logger(logger)
+    configure_logger(logger)
+
+    assert logger.handlers == []
+    assert len(queue_handlers()) == 1
+
+
+def test_configure_logger_removes_flask_handler():
+    """Test Flask's default stderr handler is dropped so lines are not written twice."""
+    logger = logging.getLogger("weather.tests.flask")
+    logger.addHandler(default_handler)
+    configure_logger(logger)
+    assert default_handler not in logger.handlers
+
+
+def test_records_propagate(caplog):
+    """Test configured loggers still reach handlers attached to the root logger."""
+    logger = logging.getLogger("weather.tests.propagate")
+    configure_logger(logger)
+    with caplog.at_level(logging.WARNING):
+        logger.warning("reached root")
+    assert "reached root" in caplog.text
+
+
+def test_json_formatter():
+    """Test records are rendered as one JSON object."""
+    record = logging.LogRecord("weather.test", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "weather.test"
+    assert entry["message"] == "hello world"
+
+
+def test_truncated_payload():
+    """Test large payloads are cut and small ones are left alone."""
+    assert str(TruncatedPayload({"a": 1}, limit=100)) == '{"a": 1}'
+    text = str(TruncatedPayload({"a": "x" * 100}, limit=10))
+    assert text.startswith('{"a": "xxx')
+    assert text.endswith("more chars)")
+    assert len(text) < 40
+
+
+def test_truncated_payload_is_lazy():
+    """Test the payload is not rendered when the record is filtered out."""
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("rendered")
+
+    logger = logging.getLogger("weather.tests.lazy")
+    configure_logger(logger)
+    logger.setLevel(logging.INFO)
+    logger.debug("payload: %s", TruncatedPayload(Exploding()))
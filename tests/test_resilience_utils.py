@@ -0,0 +1,134 @@
+import pytest
+
+from weather.utils.resilience_utils import CircuitBreaker, TokenBucket
+
+
+class Clock:
+    """A settable stand-in for time.monotonic whose sleep advances it."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_rate=0.5, window=4, min_calls=4, slow_call_seconds=1.0,
+                          reset_timeout=10, half_open_calls=1, clock=clock)
+
+
+def fail(breaker, calls, elapsed=0.1, success=False):
+    for _ in range(calls):
+        assert breaker.allow()
+        breaker.record(success, elapsed)
+
+
+def test_breaker_opens_at_failure_rate(breaker):
+    """Test the breaker stays closed below the threshold and opens when it is reached."""
+    fail(breaker, 3, success=True)
+    fail(breaker, 1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    fail(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_slow_calls_count_as_failures(breaker):
+    """Test successful but slow calls open the breaker."""
+    fail(breaker, 4, elapsed=1.5, success=True)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_probe_closes_on_success(breaker, clock):
+    """Test one probe is let through after the reset timeout and closes the breaker on success."""
+    fail(breaker, 4)
+    clock.now += 10
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(True, 0.1)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_probe_reopens_on_failure(breaker, clock):
+    """Test a failed probe reopens the breaker for another reset timeout."""
+    fail(breaker, 4)
+    clock.now += 10
+    fail(breaker, 1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 5
+    assert not breaker.allow()
+    assert breaker.stats()["opened"] == 2
+
+
+def test_release_returns_probe_slot(breaker, clock):
+    """Test a probe slot released without a call can be used by the next caller."""
+    fail(breaker, 4)
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_breaker_invalid_settings():
+    """Test out-of-range settings are rejected."""
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_rate=0)
+    with pytest.raises(ValueError):
+        CircuitBreaker(window=5, min_calls=6)
+
+
+def test_bucket_allows_burst_then_refills(clock):
+    """Test the bucket grants its capacity at once and then one token per 1/rate seconds."""
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_bucket_acquire_waits_up_to_timeout(clock):
+    """Test acquire sleeps for the next token when it arrives in time and gives up otherwise."""
+    bucket = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+    bucket.try_acquire()
+
+    assert not bucket.acquire(timeout=0.5)
+    assert clock.now == 0
+    assert bucket.acquire(timeout=1)
+    assert clock.now == pytest.approx(1)
+    assert bucket.stats()["throttled"] == 1
+
+
+def test_bucket_penalize_and_recover(clock):
+    """Test a 429 halves the rate and drops the saved burst, and granted calls restore it."""
+    bucket = TokenBucket(rate=4, capacity=4, clock=clock, sleep=clock.sleep)
+
+    bucket.penalize()
+    assert bucket.current_rate == 2
+    assert not bucket.try_acquire()
+
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    assert bucket.current_rate == 3
+    bucket.penalize()
+    bucket.penalize()
+    bucket.penalize()
+    bucket.penalize()
+    assert bucket.current_rate == 0.25
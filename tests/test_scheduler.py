@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+from weather.models.locations_model import LatestWeather, Locations
+from weather.utils import api_utils
+from weather.utils.scheduler import RefreshScheduler
+
+BOSTON = ("Boston", 42.36, -71.06)
+SEATTLE = ("Seattle", 47.61, -122.33)
+
+
+@pytest.fixture(autouse=True)
+def places(weather_api):
+    """Let the stub name the favorites it is asked about by coordinates."""
+    weather_api.places.update({city: (lat, lon) for city, lat, lon in (BOSTON, SEATTLE)})
+
+
+@pytest.fixture
+def favorites():
+    """A mutable list standing in for the favorited locations."""
+    return [BOSTON, SEATTLE]
+
+
+@pytest.fixture
+def scheduler(app, favorites):
+    """A scheduler without jitter so cycles run immediately, warming the app's forecast store."""
+    return RefreshScheduler(app, lambda: list(favorites), jitter=0, concurrency=2,
+                            forecast_model=app.forecast_model)
+
+
+def upstream_calls(weather_api, endpoint):
+    """The number of stub requests made to one endpoint."""
+    return sum(path.endswith(endpoint) for path, _ in weather_api.requests)
+
+
+def test_run_once_stores_current_and_warms_forecasts(session, weather_api, scheduler, app):
+    """Test a cycle stores the observed weather and fills the forecast store, not weather_data."""
+    written = scheduler.run_once()
+
+    assert written == 2
+    assert session.query(Locations).filter_by(city_name="Boston").count() == 1
+    latest = Locations.get_current_weather(*BOSTON)
+    assert (latest.temp, latest.weather_main) == (21.5, "Clear")
+    assert Locations.get_current_weather(*SEATTLE).latitude == 47.61
+    assert session.query(LatestWeather).count() == 2
+    assert app.forecast_model.has_current(*BOSTON)
+    assert len(app.forecast_model.get_forecast(*BOSTON).entries) == 40
+    assert upstream_calls(weather_api, "/forecast") == 2
+
+
+def test_repeated_cycles_do_not_duplicate_snapshots(session, weather_api, scheduler, app):
+    """Test an unchanged observation is stored once and forecasts are fetched once per forecast cycle."""
+    scheduler.run_once()
+
+    assert scheduler.run_once() == 0
+    assert session.query(Locations).filter_by(city_name="Boston").count() == 1
+    assert upstream_calls(weather_api, "/weather") == 4
+    assert upstream_calls(weather_api, "/forecast") == 2
+
+
+def test_run_once_primes_cache(session, weather_api, scheduler):
+    """Test refreshed locations are served from the cache without another upstream call."""
+    scheduler.run_once()
+    upstream_calls = len(weather_api.requests)
+
+    city, lat, lon = BOSTON
+    assert api_utils.get_current_weather(city, latitude=lat, longitude=lon)["name"] == "Boston"
+    assert len(weather_api.requests) == upstream_calls
+
+
+def test_run_once_drops_unfavorited_locations(session, weather_api, scheduler, favorites):
+    """Test locations removed from the favorites leave the refresh set and the cache."""
+    scheduler.run_once()
+    favorites.remove(SEATTLE)
+
+    scheduler.run_once()
+
+    assert scheduler.tracked == {BOSTON}
+    assert len(api_utils.weather_cache) == 1
+
+
+def test_run_once_skips_failing_locations(session, weather_api, scheduler):
+    """Test one failing location does not stop the others from being stored."""
+    weather_api.fail_cities.add("Seattle")
+
+    written = scheduler.run_once()
+
+    assert written == 1
+    assert session.query(Locations).filter_by(city_name="Seattle").count() == 0
+
+
+def test_run_once_without_favorites(session, weather_api, app):
+    """Test an empty favorites list makes no upstream calls."""
+    scheduler = RefreshScheduler(app, lambda: [], jitter=0)
+    assert scheduler.run_once() == 0
+    assert weather_api.requests == []
+
+
+def test_start_and_stop(session, weather_api, scheduler):
+    """Test the background thread runs a cycle and stops promptly."""
+    scheduler.interval = 60
+    scheduler.start()
+    for _ in range(200):
+        if scheduler.tracked:
+            break
+        time.sleep(0.01)
+    scheduler.stop(timeout=5)
+
+    assert scheduler.tracked == {BOSTON, SEATTLE}
+    assert scheduler._thread is None
+
+
+def test_run_once_async(session, weather_api, app, favorites):
+    """Test an async cycle stores the same rows and warms the same forecasts as the thread pool."""
+    weather_api.fail_cities.add("Seattle")
+    scheduler = RefreshScheduler(app, lambda: list(favorites), jitter=0, concurrency=2,
+                                 forecast_model=app.forecast_model, use_async=True)
+
+    written = scheduler.run_once()
+
+    assert written == 1
+    assert session.query(Locations).filter_by(city_name="Boston").count() == 1
+    assert len(api_utils.weather_cache) == 1
+    assert app.forecast_model.has_current(*BOSTON)
+    assert not app.forecast_model.has_current(*SEATTLE)
+
+    scheduler.run_once()
+    assert upstream_calls(weather_api, "/forecast") == 1
+
+
+def test_run_once_waits_for_rate_limit_tokens(session, weather_api, scheduler, favorites, monkeypatch):
+    """Test a cycle larger than the burst is paced by the rate limiter rather than cut short."""
+    monkeypatch.setattr(api_utils, "rate_limiter", api_utils.TokenBucket(rate=20, capacity=1))
+    monkeypatch.setattr(api_utils, "WEATHER_RATE_LIMIT_WAIT", 0)
+
+    written = scheduler.run_once()
+
+    assert written == 2
+    assert len(weather_api.requests) == 4
@@ -0,0 +1,111 @@
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app
+from weather.db import db
+from weather.utils import sql_utils
+from weather.utils.sql_utils import SQLiteConnectionPool, connect
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "weather.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE readings (id INTEGER PRIMARY KEY, value REAL)")
+    return path
+
+
+def test_connect_applies_pragma_profile(db_path):
+    """Test connections from the factory use WAL and the configured pragmas."""
+    conn = connect(db_path)
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+    conn.close()
+
+
+def test_pragma_profile_skips_empty_settings(monkeypatch):
+    """Test a pragma configured as an empty string is left at SQLite's default."""
+    monkeypatch.setattr(sql_utils, "SQLITE_MMAP_SIZE", "")
+
+    assert "mmap_size" not in sql_utils.pragma_profile()
+    assert list(sql_utils.pragma_profile())[0] == "busy_timeout"
+
+
+def test_pool_reuses_connections_and_rolls_back(db_path):
+    """Test a returned connection is reused and its uncommitted work discarded."""
+    pool = SQLiteConnectionPool(db_path, size=2)
+
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO readings (value) VALUES (1.0)")
+        first = conn
+    with pool.connection() as conn:
+        assert conn is first
+        assert conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0] == 0
+        conn.execute("INSERT INTO readings (value) VALUES (2.0)")
+        conn.commit()
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0] == 1
+    pool.close()
+
+
+def test_pool_is_bounded(db_path):
+    """Test callers wait for a free connection and time out when none is returned."""
+    pool = SQLiteConnectionPool(db_path, size=1, timeout=0.05)
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.connection():
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection():
+            pass
+    release.set()
+    thread.join()
+
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    pool.close()
+
+
+def test_get_db_connection_uses_shared_pool(db_path, monkeypatch):
+    """Test the helpers borrow from one pool per database file."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", db_path)
+
+    with sql_utils.get_db_connection() as first:
+        pass
+    with sql_utils.get_db_connection() as second:
+        assert second.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    sql_utils.check_database_connection()
+    sql_utils.check_table_exists("readings")
+    with pytest.raises(Exception):
+        sql_utils.check_table_exists("missing")
+
+    assert first is second
+    sql_utils.close_pools()
+
+
+def test_sqlalchemy_engine_applies_pragma_profile(tmp_path):
+    """Test Flask-SQLAlchemy connections get the same pragmas."""
+    class FileConfig:
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        assert db.session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        db.session.remove()
+        db.engine.dispose()
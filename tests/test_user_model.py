@@ -1,5 +1,9 @@
+import hashlib
+
 import pytest
+from sqlalchemy import event
 
+from weather.models import user_model
 from weather.models.user_model import Users
 
 
@@ -22,7 +26,8 @@ def test_create_user(session, sample_user):
     assert user is not None, "User should be created in the database."
     assert user.username == sample_user["username"], "Username should match the input."
     assert len(user.salt) == 32, "Salt should be 32 characters (hex)."
-    assert len(user.password) == 64, "Password should be a 64-character SHA-256 hash."
+    assert user.password.startswith("pbkdf2_sha256$1000$"), "Password should be a PBKDF2 hash with the configured cost."
+    assert len(user.password.rsplit("$", 1)[1]) == 64, "Digest should be 64 hex characters."
 
 
 def test_create_duplicate_user(session, sample_user):
@@ -56,6 +61,56 @@ def test_check_password_user_not_found(session):
         Users.check_password("nonexistentuser", "password")
 
 
+def test_check_password_upgrades_legacy_hash(session, sample_user):
+    """Test a legacy SHA-256 hash is replaced by a PBKDF2 hash on successful login."""
+    Users.create_user(**sample_user)
+    user = session.query(Users).filter_by(username=sample_user["username"]).first()
+    user.password = hashlib.sha256((sample_user["password"] + user.salt).encode()).hexdigest()
+    session.commit()
+
+    assert Users.check_password(sample_user["username"], "wrongpassword") is False
+    assert len(user.password) == 64, "Failed logins should not upgrade the hash."
+
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+    assert user.password.startswith("pbkdf2_sha256$")
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+
+
+def test_check_password_upgrades_cost(session, sample_user, monkeypatch):
+    """Test a hash below the configured cost is rehashed on successful login."""
+    Users.create_user(**sample_user)
+    monkeypatch.setattr(user_model, "PASSWORD_HASH_ITERATIONS", 2000)
+
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+    user = session.query(Users).filter_by(username=sample_user["username"]).first()
+    assert user.password.startswith("pbkdf2_sha256$2000$")
+
+
+def test_check_password_cached_fast_path(session, sample_user, monkeypatch):
+    """Test a recently verified password skips the KDF, and a wrong one does not."""
+    Users.create_user(**sample_user)
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+
+    calls = []
+    original = Users._verify_hash
+    monkeypatch.setattr(Users, "_verify_hash", staticmethod(lambda *args: calls.append(1) or original(*args)))
+
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+    assert calls == []
+    assert Users.check_password(sample_user["username"], "wrongpassword") is False
+    assert calls == [1]
+
+
+def test_check_password_cache_invalidated_by_password_change(session, sample_user):
+    """Test the old password stops working after a change even if it was cached."""
+    Users.create_user(**sample_user)
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+
+    Users.update_password(sample_user["username"], "newpassword456")
+
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is False
+
+
 ##########################################################
 # Update Password
 ##########################################################
@@ -110,3 +165,71 @@ def test_get_id_by_username_user_not_found(session):
     """Test failure when retrieving a non-existent user's ID by their username."""
     with pytest.raises(ValueError, match="User nonexistentuser not found"):
         Users.get_id_by_username("nonexistentuser")
+
+
+##########################################################
+# Session User Cache
+##########################################################
+
+@pytest.fixture
+def query_counter(session):
+    """Count SQL statements executed on the test engine."""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def test_load_cached_user_saves_queries(session, sample_user, query_counter):
+    """Test a cached user is loaded without touching the database."""
+    Users.create_user(**sample_user)
+    first = Users.load_cached_user(sample_user["username"])
+    query_counter.clear()
+
+    user = Users.load_cached_user(sample_user["username"])
+
+    assert query_counter == []
+    assert user.id == first.id
+    assert user.get_id() == sample_user["username"]
+    assert Users.get_user_cache_stats()["hits"] == 1
+
+
+def test_load_cached_user_lazy_loads_other_columns(session, sample_user):
+    """Test columns that are not cached are still available on the loaded user."""
+    Users.create_user(**sample_user)
+    Users.load_cached_user(sample_user["username"])
+    session.expunge_all()
+
+    user = Users.load_cached_user(sample_user["username"])
+    assert user.password.startswith("pbkdf2_sha256$")
+
+
+def test_load_cached_user_not_found(session):
+    """Test an unknown username returns None and is not cached."""
+    assert Users.load_cached_user("nonexistentuser") is None
+    assert Users.get_user_cache_stats()["size"] == 0
+
+
+def test_user_cache_invalidated_on_delete(session, sample_user):
+    """Test a deleted user can no longer be loaded from the cache."""
+    Users.create_user(**sample_user)
+    Users.load_cached_user(sample_user["username"])
+
+    Users.delete_user(sample_user["username"])
+
+    assert Users.load_cached_user(sample_user["username"]) is None
+
+
+def test_user_cache_invalidated_on_password_update(session, sample_user):
+    """Test a password change drops the user from the cache."""
+    Users.create_user(**sample_user)
+    Users.load_cached_user(sample_user["username"])
+
+    Users.update_password(sample_user["username"], "newpassword456")
+
+    assert Users.get_user_cache_stats()["size"] == 0
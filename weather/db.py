@@ -1,3 +1,34 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
-db = SQLAlchemy()
\ No newline at end of file
+from weather.utils.sql_utils import apply_pragmas
+
+db = SQLAlchemy()
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    apply_pragmas(dbapi_connection)
+
+
+def configure_sqlite(engine) -> None:
+    """Apply the sql_utils pragma profile to every connection the engine opens.
+
+    Does nothing for other databases. Must run before the engine's first
+    connection, so call it right after db.init_app.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    if not event.contains(engine, "connect", _apply_sqlite_pragmas):
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+
+
+def ensure_indexes() -> None:
+    """Create any index declared on the models that is missing from the database.
+
+    db.create_all() skips tables that already exist, so indexes added to a model
+    later are never created on existing databases. This fills that gap and is
+    safe to run on every startup.
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
@@ -0,0 +1,557 @@
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+import logging
+from operator import itemgetter
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, func, insert, or_, select, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from weather.db import db
+from weather.models.locations_model import (EXPORT_BATCH_SIZE, HISTORY_INTERVALS, HISTORY_MAX_PAGE_SIZE,
+                                            HISTORY_METRICS, HISTORY_PAGE_SIZE, INGEST_BATCH_SIZE, UPSERT_CHUNK_SIZE,
+                                            Locations, location_index)
+from weather.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# temp and feels_like are stored as integer hundredths of a degree
+VALUE_SCALE = 100
+
+_EPOCH = datetime(1970, 1, 1)
+
+Location = Tuple[str, float, float]
+Condition = Tuple[str, str]
+
+
+class LocationDim(db.Model):
+    """One row per distinct (city_name, latitude, longitude), referenced by weather_snapshots."""
+
+    __tablename__ = 'location_dim'
+    __table_args__ = (
+        db.UniqueConstraint("city_name", "latitude", "longitude", name="uq_location_dim_location"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    city_name = db.Column(db.String(255), nullable=False)
+    latitude = db.Column(db.Double, nullable=False)
+    longitude = db.Column(db.Double, nullable=False)
+
+
+class WeatherCondition(db.Model):
+    """One row per distinct (weather_main, weather_description) pair."""
+
+    __tablename__ = 'weather_conditions'
+    __table_args__ = (
+        db.UniqueConstraint("main", "description", name="uq_weather_conditions_main_description"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    main = db.Column(db.String(64), nullable=False)
+    description = db.Column(db.String(255), nullable=False)
+
+
+class CompactSnapshot(db.Model):
+    """A dictionary-encoded weather snapshot.
+
+    Strings are replaced by references to location_dim and weather_conditions,
+    time is stored as Unix seconds and temperatures as integer hundredths, so
+    each row is a handful of small integers.
+    """
+
+    __tablename__ = 'weather_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('location_dim.id'), nullable=False)
+    time = db.Column(db.Integer, nullable=False)
+    temp = db.Column(db.Integer)
+    feels_like = db.Column(db.Integer)
+    pressure = db.Column(db.Integer)
+    humidity = db.Column(db.Integer)
+    condition_id = db.Column(db.Integer, db.ForeignKey('weather_conditions.id'))
+
+    __table_args__ = (
+        db.Index("ix_weather_snapshots_location_time", location_id, time),
+    )
+
+
+def _to_epoch(value: datetime) -> int:
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _from_epoch(value: int) -> datetime:
+    return _EPOCH + timedelta(seconds=value)
+
+
+def _scale(value: Optional[float]) -> Optional[int]:
+    return None if value is None else round(value * VALUE_SCALE)
+
+
+def _unscale(value) -> Optional[float]:
+    return None if value is None else value / VALUE_SCALE
+
+
+class CompactStore:
+    """
+    The Locations query API served from the dictionary-encoded tables.
+
+    Selected with WEATHER_STORAGE = "compact"; Locations dispatches to these
+    methods, which accept and return the same shapes. Dimension ids never
+    change once written, so they are cached per process.
+    """
+
+    _location_ids: Dict[Location, int] = {}
+    _condition_ids: Dict[Condition, int] = {}
+    _cache_lock = threading.Lock()
+
+    ##################################################
+    # Dimension Management
+    ##################################################
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Forgets the cached dimension ids, e.g. after the tables are recreated."""
+        with cls._cache_lock:
+            cls._location_ids.clear()
+            cls._condition_ids.clear()
+
+    @classmethod
+    def _resolve(cls, model, columns: Tuple[str, ...], keys: Iterable[tuple], cache: dict, create: bool) -> Dict[tuple, int]:
+        """
+        Maps dimension keys to ids, reading unknown ones from the database and inserting missing ones if asked.
+
+        Inserts run in the caller's transaction and are not committed, so the
+        dimension rows commit or roll back with the snapshots that reference
+        them. Keys inserted concurrently by another writer are skipped by the
+        insert and read back on the next pass. Ids are only cached here when
+        nothing may be inserted; otherwise the caller caches them with
+        _remember after its commit, so a rolled-back id never reaches the cache.
+        """
+        keys = set(keys)
+        with cls._cache_lock:
+            found = {key: cache[key] for key in keys if key in cache}
+        missing = [key for key in keys if key not in found]
+
+        attempts = 2 if create else 1
+        for attempt in range(attempts):
+            key_columns = [getattr(model, column) for column in columns]
+            for start in range(0, len(missing), UPSERT_CHUNK_SIZE):
+                chunk = missing[start:start + UPSERT_CHUNK_SIZE]
+                for row in db.session.execute(select(model.id, *key_columns).where(tuple_(*key_columns).in_(chunk))):
+                    found[tuple(row[1:])] = row.id
+            missing = [key for key in missing if key not in found]
+            if not missing or not create or attempt == attempts - 1:
+                break
+            cls._insert_missing(model, [dict(zip(columns, key)) for key in missing])
+
+        if not create:
+            cls._remember(cache, found)
+        return found
+
+    @staticmethod
+    def _insert_missing(model, rows: List[dict]) -> None:
+        """Inserts dimension rows, skipping any whose key another writer has inserted meanwhile."""
+        table = model.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            module = sqlite if dialect == "sqlite" else postgresql
+            db.session.execute(module.insert(table).on_conflict_do_nothing(), rows)
+        elif dialect in ("mysql", "mariadb"):
+            db.session.execute(mysql.insert(table).on_duplicate_key_update(id=table.c.id), rows)
+        else:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(table), rows)
+            except IntegrityError:
+                # Only the savepoint is rolled back; the next pass reads the other writer's ids
+                logger.info(f"{table.name} rows were inserted concurrently; reading their ids")
+
+    @classmethod
+    def _remember(cls, cache: dict, ids: Dict[tuple, int]) -> None:
+        """Caches committed dimension ids."""
+        with cls._cache_lock:
+            cache.update(ids)
+
+    @classmethod
+    def _location_id(cls, city_name: str, latitude: float, longitude: float) -> Optional[int]:
+        key = (city_name.strip(), latitude, longitude)
+        return cls._resolve(LocationDim, ("city_name", "latitude", "longitude"), [key], cls._location_ids,
+                            create=False).get(key)
+
+    ##################################################
+    # Encoding
+    ##################################################
+
+    @staticmethod
+    def _select():
+        """Selects decoded snapshot columns joined to their dimensions."""
+        return select(
+            CompactSnapshot.id, LocationDim.city_name, LocationDim.latitude, LocationDim.longitude,
+            CompactSnapshot.time, CompactSnapshot.temp, CompactSnapshot.feels_like, CompactSnapshot.pressure,
+            CompactSnapshot.humidity, WeatherCondition.main.label("weather_main"),
+            WeatherCondition.description.label("weather_description"),
+        ).join(LocationDim, LocationDim.id == CompactSnapshot.location_id).outerjoin(
+            WeatherCondition, WeatherCondition.id == CompactSnapshot.condition_id)
+
+    @staticmethod
+    def _decode(row) -> dict:
+        """Turns a row from _select or get_weather_range back into a weather_data row."""
+        decoded = row._asdict()
+        decoded["time"] = _from_epoch(decoded["time"])
+        if decoded["temp"] is not None:
+            decoded["temp"] /= VALUE_SCALE
+        if decoded["feels_like"] is not None:
+            decoded["feels_like"] /= VALUE_SCALE
+        decoded["weather_main"] = decoded["weather_main"] or None
+        decoded["weather_description"] = decoded["weather_description"] or None
+        return decoded
+
+    ##################################################
+    # Ingestion
+    ##################################################
+
+    @classmethod
+    def ingest_rows(cls, rows: List[dict], batch_size: int = INGEST_BATCH_SIZE, skip_existing: bool = False) -> int:
+        """
+        Encodes and writes weather_data rows in batches inside one transaction.
+
+        Args:
+            rows (List[dict]): Rows as built by Locations.rows_from_weather_payload / rows_from_forecast_payload.
+            batch_size (int): Rows per executemany batch.
+            skip_existing (bool): Skip rows whose location already has a snapshot at the same time.
+
+        Returns:
+            int: The number of rows written.
+
+        Raises:
+            ValueError: If any row is invalid or batch_size is not positive.
+            SQLAlchemyError: If a database error occurs. No snapshot is written in that case.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer")
+
+        Locations.validate_rows(rows)
+        if not rows:
+            logger.warning("Bulk ingest called with no rows")
+            return 0
+
+        logger.info(f"Bulk ingesting {len(rows)} compact weather snapshots in batches of {batch_size}")
+        try:
+            location_ids = cls._resolve(
+                LocationDim, ("city_name", "latitude", "longitude"),
+                ((row["city_name"].strip(), row["latitude"], row["longitude"]) for row in rows),
+                cls._location_ids, create=True)
+            conditions = {(row.get("weather_main") or "", row.get("weather_description") or "") for row in rows}
+            conditions.discard(("", ""))
+            condition_ids = cls._resolve(WeatherCondition, ("main", "description"), conditions,
+                                         cls._condition_ids, create=True)
+
+            encoded = []
+            for row in rows:
+                condition = (row.get("weather_main") or "", row.get("weather_description") or "")
+                encoded.append({
+                    "location_id": location_ids[(row["city_name"].strip(), row["latitude"], row["longitude"])],
+                    "time": _to_epoch(row["time"]),
+                    "temp": _scale(row.get("temp")),
+                    "feels_like": _scale(row.get("feels_like")),
+                    "pressure": row.get("pressure"),
+                    "humidity": row.get("humidity"),
+                    "condition_id": condition_ids.get(condition),
+                })
+            if skip_existing:
+                encoded = cls._drop_stored(encoded)
+
+            for start in range(0, len(encoded), batch_size):
+                db.session.execute(insert(CompactSnapshot), encoded[start:start + batch_size])
+            db.session.commit()
+            cls._remember(cls._location_ids, location_ids)
+            cls._remember(cls._condition_ids, condition_ids)
+            location_index.add_many(location_ids)
+            logger.info(f"Successfully ingested {len(encoded)} compact weather snapshots")
+            return len(encoded)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error while bulk ingesting compact weather snapshots: {e}")
+            raise
+
+    @staticmethod
+    def _drop_stored(encoded: List[dict]) -> List[dict]:
+        """Returns the encoded snapshots whose (location_id, time) is neither repeated nor already stored."""
+        unique = list({(row["location_id"], row["time"]): row for row in encoded}.values())
+        location_ids = list({row["location_id"] for row in unique})
+        times = list({row["time"] for row in unique})
+        stored = set()
+        for start in range(0, len(location_ids), UPSERT_CHUNK_SIZE):
+            stored.update(tuple(row) for row in db.session.execute(
+                select(CompactSnapshot.location_id, CompactSnapshot.time)
+                .where(CompactSnapshot.location_id.in_(location_ids[start:start + UPSERT_CHUNK_SIZE]),
+                       CompactSnapshot.time.in_(times))))
+        return [row for row in unique if (row["location_id"], row["time"]) not in stored]
+
+    ##################################################
+    # Retrieval
+    ##################################################
+
+    @classmethod
+    def get_location_keys(cls) -> List[Tuple[str, float, float]]:
+        """Every location with at least one snapshot; see Locations.get_location_keys."""
+        try:
+            rows = db.session.execute(
+                select(LocationDim.city_name, LocationDim.latitude, LocationDim.longitude)
+                .where(select(CompactSnapshot.id).where(CompactSnapshot.location_id == LocationDim.id).exists())).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while listing stored compact locations: {e}")
+            raise
+        return [tuple(row) for row in rows]
+
+    @classmethod
+    def get_location_row_counts(cls) -> Dict[Location, int]:
+        """Snapshot counts per location; see Locations.get_location_row_counts."""
+        try:
+            rows = db.session.execute(
+                select(LocationDim.city_name, LocationDim.latitude, LocationDim.longitude, func.count())
+                .join(CompactSnapshot, CompactSnapshot.location_id == LocationDim.id)
+                .group_by(LocationDim.id, LocationDim.city_name, LocationDim.latitude, LocationDim.longitude)).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while counting compact snapshots per location: {e}")
+            raise
+        return {(city, lat, lon): count for city, lat, lon, count in rows}
+
+    @classmethod
+    def get_location_by_id(cls, location_id: int) -> Locations:
+        """Returns the snapshot with the given id as a transient Locations instance.
+
+        Raises:
+            ValueError: If no snapshot has that id.
+        """
+        row = db.session.execute(cls._select().where(CompactSnapshot.id == location_id)).first()
+        if row is None:
+            logger.info(f"Location with ID {location_id} not found")
+            raise ValueError(f"Location with ID {location_id} not found")
+        return Locations(**cls._decode(row))
+
+    @classmethod
+    def get_current_weather(cls, city_name: str, latitude: float, longitude: float) -> Locations:
+        """Returns the latest snapshot for a location as a transient Locations instance.
+
+        Raises:
+            ValueError: If the location has no snapshots.
+        """
+        history = cls._latest(city_name, latitude, longitude, 1)
+        if not history:
+            logger.info(f"Location with city name '{city_name}, latitude {latitude}, and longitude {longitude} not found")
+            raise ValueError(f"Location with city name '{city_name}, latitude {latitude}, and longitude {longitude} not found")
+        return history[0]
+
+    @classmethod
+    def get_current_weather_many(cls, keys: Iterable[Location]) -> Dict[Location, Locations]:
+        """Returns the latest snapshot per location with one query per UPSERT_CHUNK_SIZE keys.
+
+        Locations without snapshots are omitted.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        keys = [(city_name.strip(), latitude, longitude) for city_name, latitude, longitude in keys]
+        if not keys:
+            return {}
+
+        logger.info(f"Attempting to retrieve current compact weather for {len(keys)} locations")
+        try:
+            location_ids = cls._resolve(LocationDim, ("city_name", "latitude", "longitude"), keys,
+                                        cls._location_ids, create=False)
+            ids = list(location_ids.values())
+            found = {}
+            for start in range(0, len(ids), UPSERT_CHUNK_SIZE):
+                ranked = select(
+                    CompactSnapshot.id,
+                    func.row_number().over(
+                        partition_by=CompactSnapshot.location_id,
+                        order_by=(CompactSnapshot.time.desc(), CompactSnapshot.id.desc()),
+                    ).label("rank"),
+                ).where(CompactSnapshot.location_id.in_(ids[start:start + UPSERT_CHUNK_SIZE])).subquery()
+                rows = db.session.execute(cls._select().join(ranked, ranked.c.id == CompactSnapshot.id)
+                                          .where(ranked.c.rank == 1))
+                for row in rows:
+                    snapshot = Locations(**cls._decode(row))
+                    found[(snapshot.city_name, snapshot.latitude, snapshot.longitude)] = snapshot
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while retrieving current compact weather for {len(keys)} locations: {e}")
+            raise
+        logger.info(f"Successfully retrieved current compact weather for {len(found)} of {len(keys)} locations")
+        return found
+
+    @classmethod
+    def get_weather_history(cls, city_name: str, latitude: float, longitude: float) -> List[Locations]:
+        """Returns the 3 most recent snapshots for a location, newest first.
+
+        Raises:
+            ValueError: If the location has no snapshots.
+        """
+        history = cls._latest(city_name, latitude, longitude, 3)
+        if not history:
+            logger.info(f"Location with city name '{city_name}, latitude {latitude}, and longitude {longitude} not found")
+            raise ValueError(f"Location with city name '{city_name}, latitude {latitude}, and longitude {longitude} not found")
+        return history
+
+    @classmethod
+    def _latest(cls, city_name: str, latitude: float, longitude: float, limit: int) -> List[Locations]:
+        location_id = cls._location_id(city_name, latitude, longitude)
+        if location_id is None:
+            return []
+        rows = db.session.execute(cls._select().where(CompactSnapshot.location_id == location_id).order_by(
+            CompactSnapshot.time.desc(), CompactSnapshot.id.desc()).limit(limit))
+        return [Locations(**cls._decode(row)) for row in rows]
+
+    @classmethod
+    def get_weather_range(cls, city_name: str, latitude: float, longitude: float,
+                          start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          limit: int = HISTORY_PAGE_SIZE,
+                          after: Optional[Tuple[datetime, int]] = None) -> Tuple[List[dict], Optional[Tuple[datetime, int]]]:
+        """Keyset-paginated history in time order; see Locations.get_weather_range."""
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, HISTORY_MAX_PAGE_SIZE)
+
+        location_id = cls._location_id(city_name, latitude, longitude)
+        if location_id is None:
+            return [], None
+
+        query = select(CompactSnapshot.id, CompactSnapshot.time, CompactSnapshot.temp, CompactSnapshot.feels_like,
+                       CompactSnapshot.pressure, CompactSnapshot.humidity,
+                       WeatherCondition.main.label("weather_main"),
+                       WeatherCondition.description.label("weather_description")).outerjoin(
+            WeatherCondition, WeatherCondition.id == CompactSnapshot.condition_id).where(
+            CompactSnapshot.location_id == location_id)
+        if start is not None:
+            query = query.where(CompactSnapshot.time >= _to_epoch(start))
+        if end is not None:
+            query = query.where(CompactSnapshot.time < _to_epoch(end))
+        if after is not None:
+            after_time, after_id = _to_epoch(after[0]), after[1]
+            query = query.where(or_(CompactSnapshot.time > after_time,
+                                    and_(CompactSnapshot.time == after_time, CompactSnapshot.id > after_id)))
+        query = query.order_by(CompactSnapshot.time, CompactSnapshot.id).limit(limit + 1)
+
+        try:
+            rows = [cls._decode(row) for row in db.session.execute(query)]
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while retrieving compact weather history for '{city_name}': {e}")
+            raise
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]["time"], rows[-1]["id"])
+        return rows, next_cursor
+
+    @classmethod
+    def get_weather_aggregates(cls, city_name: str, latitude: float, longitude: float, interval: str,
+                               start: Optional[datetime] = None, end: Optional[datetime] = None,
+                               limit: int = HISTORY_PAGE_SIZE) -> Tuple[List[dict], Optional[datetime]]:
+        """Hourly or daily min/mean/max buckets computed in SQL; see Locations.get_weather_aggregates."""
+        if interval not in HISTORY_INTERVALS:
+            raise ValueError(f"interval must be one of: {', '.join(HISTORY_INTERVALS)}")
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, HISTORY_MAX_PAGE_SIZE)
+
+        location_id = cls._location_id(city_name, latitude, longitude)
+        if location_id is None:
+            return [], None
+
+        # Unix seconds make the bucket plain integer arithmetic on every dialect
+        width = int(HISTORY_INTERVALS[interval].total_seconds())
+        bucket = (CompactSnapshot.time - CompactSnapshot.time % width).label("bucket")
+        columns = [bucket, func.count(CompactSnapshot.id).label("samples")]
+        for metric in HISTORY_METRICS:
+            column = getattr(CompactSnapshot, metric)
+            columns += [func.min(column).label(f"{metric}_min"),
+                        func.avg(column).label(f"{metric}_mean"),
+                        func.max(column).label(f"{metric}_max")]
+        query = select(*columns).where(CompactSnapshot.location_id == location_id)
+        if start is not None:
+            query = query.where(CompactSnapshot.time >= _to_epoch(start))
+        if end is not None:
+            query = query.where(CompactSnapshot.time < _to_epoch(end))
+        query = query.group_by(bucket).order_by(bucket).limit(limit + 1)
+
+        try:
+            rows = db.session.execute(query).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while aggregating compact weather history for '{city_name}': {e}")
+            raise
+
+        buckets = []
+        for row in rows[:limit]:
+            entry = row._asdict()
+            entry["time"] = _from_epoch(entry.pop("bucket"))
+            for metric in HISTORY_METRICS:
+                scale = VALUE_SCALE if metric in ("temp", "feels_like") else 1
+                if entry[f"{metric}_mean"] is not None:
+                    entry[f"{metric}_mean"] = round(float(entry[f"{metric}_mean"]) / scale, 2)
+                if scale != 1:
+                    entry[f"{metric}_min"] = _unscale(entry[f"{metric}_min"])
+                    entry[f"{metric}_max"] = _unscale(entry[f"{metric}_max"])
+            buckets.append(entry)
+
+        next_start = buckets[-1]["time"] + HISTORY_INTERVALS[interval] if len(rows) > limit else None
+        return buckets, next_start
+
+    @classmethod
+    def get_history_columns(cls, keys: List[Location], start: Optional[datetime] = None,
+                            end: Optional[datetime] = None) -> Dict[Location, Dict[str, tuple]]:
+        """Column-wise time, temp, feels_like and humidity history; see Locations.get_history_columns."""
+        location_ids = cls._resolve(LocationDim, ("city_name", "latitude", "longitude"), keys,
+                                    cls._location_ids, create=False)
+        keys_by_id = {location_id: key for key, location_id in location_ids.items()}
+        ids = list(keys_by_id)
+
+        history: Dict[Location, Dict[str, tuple]] = {}
+        for offset in range(0, len(ids), UPSERT_CHUNK_SIZE):
+            query = select(CompactSnapshot.location_id, CompactSnapshot.time, CompactSnapshot.temp,
+                           CompactSnapshot.feels_like, CompactSnapshot.humidity).where(
+                CompactSnapshot.location_id.in_(ids[offset:offset + UPSERT_CHUNK_SIZE]))
+            if start is not None:
+                query = query.where(CompactSnapshot.time >= _to_epoch(start))
+            if end is not None:
+                query = query.where(CompactSnapshot.time < _to_epoch(end))
+            query = query.order_by(CompactSnapshot.location_id, CompactSnapshot.time)
+            rows = db.session.execute(query).all()
+            for location_id, group in groupby(rows, key=itemgetter(0)):
+                _, times, temps, feels_like, humidity = zip(*group)
+                history[keys_by_id[location_id]] = {
+                    "time": tuple(map(_from_epoch, times)),
+                    "temp": tuple(map(_unscale, temps)),
+                    "feels_like": tuple(map(_unscale, feels_like)),
+                    "humidity": humidity,
+                }
+        return history
+
+    @classmethod
+    def iter_export(cls, city_name: Optional[str] = None, latitude: Optional[float] = None,
+                    longitude: Optional[float] = None, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+        """Streams decoded rows in id order; see Locations.iter_export."""
+        query = cls._select()
+        if city_name is not None:
+            query = query.where(LocationDim.city_name == city_name.strip())
+        if latitude is not None:
+            query = query.where(LocationDim.latitude == latitude)
+        if longitude is not None:
+            query = query.where(LocationDim.longitude == longitude)
+        if start is not None:
+            query = query.where(CompactSnapshot.time >= _to_epoch(start))
+        if end is not None:
+            query = query.where(CompactSnapshot.time < _to_epoch(end))
+        query = query.order_by(CompactSnapshot.id).execution_options(yield_per=batch_size)
+
+        logger.info(f"Exporting compact weather snapshots for city '{city_name}', latitude {latitude}, "
+                    f"longitude {longitude} from {start} to {end}")
+        # _select returns the columns in EXPORT_COLUMNS order
+        for partition in db.session.execute(query).partitions():
+            for row in partition:
+                yield cls._decode(row)
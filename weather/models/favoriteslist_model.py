@@ -1,32 +1,120 @@
 import logging
 import os
+import threading
 import time
-from typing import List, Tuple
+from typing import Dict, List, Tuple
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from weather.utils.logger import configure_logger
 from weather.db import db
 from weather.models.locations_model import Locations
+from weather.models.user_model import Users
+from weather.utils.geo_utils import location_key
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# Seconds a user's cached favorites are trusted before re-reading them, so writes
+# made by other worker processes become visible
+FAVORITES_CACHE_TTL = float(os.getenv("FAVORITES_CACHE_TTL", "5"))
+
+Location = Tuple[str, float, float]
+
+
+class Favorite(db.Model):
+    """A location favorited by a user, stored in the 'favorites' table.
+
+    The (user_id, city_name, latitude, longitude) combination is unique, so
+    concurrent adds from different worker processes cannot create duplicates.
+    """
+
+    __tablename__ = 'favorites'
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "city_name", "latitude", "longitude", name="uq_favorites_user_location"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    city_name = db.Column(db.String(255), nullable=False)
+    latitude = db.Column(db.Double, nullable=False)
+    longitude = db.Column(db.Double, nullable=False)
+
+    user = db.relationship(Users, backref=db.backref("favorites", cascade="all, delete-orphan", lazy="dynamic"))
+
+
 class FavoriteslistModel:
     """
-    A class to manage favorite locations.
+    A class to manage a user's favorite locations.
+
+    Favorites are persisted in the 'favorites' table. Each process keeps a
+    per-user, insertion-ordered dict of them so membership checks, adds and
+    removes are O(1) in memory. The cache is updated on every local write and
+    re-read from the database after FAVORITES_CACHE_TTL seconds.
     """
 
-    def __init__(self):
-        """Initializes the FavoritesModel with an empty list
+    _cache: Dict[int, Tuple[float, Dict[Location, None]]] = {}
+    _cache_lock = threading.Lock()
 
-        Favorites is a list of locations, that starts off empty.
+    def __init__(self, user_id: int):
+        """Initializes the FavoritesModel for a single user.
+
+        Args:
+            user_id (int): The ID of the user whose favorites are managed.
 
         """
-        self.favoriteslist: List[Tuple[str, float, float]] = [] 
+        self.user_id = user_id
+
+    ##################################################
+    # Cache Management
+    ##################################################
+
+    def _locations(self) -> Dict[Location, None]:
+        """Returns the user's favorites, loading them from the database if the cache is cold or expired."""
+        with self._cache_lock:
+            entry = self._cache.get(self.user_id)
+            if entry is not None and time.monotonic() - entry[0] <= FAVORITES_CACHE_TTL:
+                return entry[1]
+
+        rows = db.session.query(Favorite.city_name, Favorite.latitude, Favorite.longitude).filter_by(
+            user_id=self.user_id).order_by(Favorite.id).all()
+        locations = {(row.city_name, row.latitude, row.longitude): None for row in rows}
+        with self._cache_lock:
+            self._cache[self.user_id] = (time.monotonic(), locations)
+        return locations
+
+    def _snapshot(self) -> List[Location]:
+        """Returns a copy of the user's favorites that is safe to iterate."""
+        locations = self._locations()
+        with self._cache_lock:
+            return list(locations)
+
+    def _cache_update(self, location: Location, present: bool) -> None:
+        """Applies a committed add or remove to the cached favorites, if cached."""
+        with self._cache_lock:
+            entry = self._cache.get(self.user_id)
+            if entry is None:
+                return
+            if present:
+                entry[1][location] = None
+            else:
+                entry[1].pop(location, None)
+
+    def invalidate(self) -> None:
+        """Drops this user's cached favorites so the next read goes to the database."""
+        with self._cache_lock:
+            self._cache.pop(self.user_id, None)
+
+    @classmethod
+    def invalidate_all(cls) -> None:
+        """Drops every user's cached favorites."""
+        with cls._cache_lock:
+            cls._cache.clear()
 
     ##################################################
     # Location Management Functions
     ##################################################
-    
+
     def add_location_to_favoriteslist(self, city_name: str, latitude: float, longitude: float) -> None:
         """
         Adds a location to the favoriteslist by city_name, latitude, and longitude
@@ -34,19 +122,35 @@ class FavoriteslistModel:
         Args:
             city_name (str): the city name of the location
             latitude (float): the latitude of the location
-            longitude (float): the longitude of the location 
+            longitude (float): the longitude of the location
 
         Raises:
             ValueError: If the combination of city_name, latitude, and longitude already exists in favoriteslist
         """
         logger.info(f"Received request to add location with name {city_name}, latitude {latitude}, and longitude {longitude} to the favoriteslist")
-        tuple_input = (city_name.strip(), latitude, longitude)
+        tuple_input = location_key(city_name, latitude, longitude)
 
-        if tuple_input in self.favoriteslist: # go through the list to check the name lat and long
+        if tuple_input in self._locations():
             logger.error(f"Location with name {city_name} already exists in the favoriteslist")
             raise ValueError(f"Location with name {city_name} already exists in the favoriteslist")
 
-        self.favoriteslist.append(tuple_input)
+        try:
+            db.session.add(Favorite(user_id=self.user_id, city_name=tuple_input[0], latitude=tuple_input[1],
+                                    longitude=tuple_input[2]))
+            db.session.commit()
+        except IntegrityError:
+            # Added concurrently by another worker; our cache was stale
+            db.session.rollback()
+            self.invalidate()
+            logger.error(f"Location with name {city_name} already exists in the favoriteslist")
+            raise ValueError(f"Location with name {city_name} already exists in the favoriteslist")
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            self.invalidate()
+            logger.error(f"Database error while adding {tuple_input} to the favoriteslist: {e}")
+            raise
+
+        self._cache_update(tuple_input, present=True)
         logger.info(f"Successfully added to favoriteslist: {tuple_input}")
 
 
@@ -56,7 +160,7 @@ class FavoriteslistModel:
         Args:
             city_name (str): the city name of the location
             latitude (float): the latitude of the location
-            longitude (float): the longitude of the location 
+            longitude (float): the longitude of the location
 
         Raises:
             ValueError: If the favoriteslist is empty or the tuple (city_name, latitude, longitude) is invalid
@@ -65,12 +169,22 @@ class FavoriteslistModel:
         logger.info(f"Received request to remove location with city_name {city_name}, latitude {latitude}, longitude {longitude}")
 
         self.check_if_empty()
-        tuple_input = (city_name.strip(), latitude, longitude)
-        if tuple_input not in self.favoriteslist:
+        tuple_input = location_key(city_name, latitude, longitude)
+        if tuple_input not in self._locations():
             logger.warning(f"Location with {tuple_input} not found in the favoriteslist")
             raise ValueError(f"Location with name {tuple_input} not found in the favoriteslist")
 
-        self.favoriteslist.remove(tuple_input)
+        try:
+            Favorite.query.filter_by(user_id=self.user_id, city_name=tuple_input[0],
+                                     latitude=tuple_input[1], longitude=tuple_input[2]).delete()
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            self.invalidate()
+            logger.error(f"Database error while removing {tuple_input} from the favoriteslist: {e}")
+            raise
+
+        self._cache_update(tuple_input, present=False)
         logger.info(f"Successfully removed location {tuple_input} from the favoriteslist")
 
     def clear_favoriteslist(self) -> None:
@@ -81,11 +195,19 @@ class FavoriteslistModel:
         """
         logger.info("Received request to clear the favoriteslist")
 
-        if not self.favoriteslist:
+        if not self._locations():
             logger.warning("Clearing an empty favoriteslist.")
             return
 
-        self.favoriteslist.clear()
+        try:
+            Favorite.query.filter_by(user_id=self.user_id).delete()
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error while clearing the favoriteslist: {e}")
+            raise
+        finally:
+            self.invalidate()
         logger.info("Successfully cleared the favoriteslist")
 
 
@@ -98,13 +220,42 @@ class FavoriteslistModel:
 
         Returns:
             List[Tuple[str,float,float]]: A list of all locations name, latitude, and longitude in the favorites list .
-        """     
-        if not self.favoriteslist:
+        """
+        locations = self._snapshot()
+        if not locations:
             logger.warning("Retrieving locations from an empty favoriteslist.")
             return []
 
         logger.info("Retrieving all locations in favoriteslist")
-        return self.favoriteslist
+        return locations
+
+    @property
+    def favoriteslist(self) -> List[Tuple[str, float, float]]:
+        """The user's favorites, in the order they were added."""
+        return self._snapshot()
+
+    def contains(self, city_name: str, latitude: float, longitude: float) -> bool:
+        """Checks whether a location is in the favoriteslist.
+
+        Args:
+            city_name (str): the city name of the location
+            latitude (float): the latitude of the location
+            longitude (float): the longitude of the location
+
+        Returns:
+            bool: True if the location is a favorite.
+        """
+        return location_key(city_name, latitude, longitude) in self._locations()
+
+    @staticmethod
+    def get_all_favorited_locations() -> List[Tuple[str, float, float]]:
+        """Returns every location favorited by at least one user.
+
+        Returns:
+            List[Tuple[str,float,float]]: Distinct (city_name, latitude, longitude) tuples.
+        """
+        rows = db.session.query(Favorite.city_name, Favorite.latitude, Favorite.longitude).distinct().all()
+        return [(row.city_name, row.latitude, row.longitude) for row in rows]
 
     ##################################################
     # Utility Functions
@@ -118,6 +269,6 @@ class FavoriteslistModel:
             ValueError: If the favoriteslist is empty.
 
         """
-        if not self.favoriteslist:
+        if not self._locations():
             logger.error("favoriteslist is empty")
-            raise ValueError("favoriteslist is empty")
\ No newline at end of file
+            raise ValueError("favoriteslist is empty")
@@ -0,0 +1,242 @@
+from bisect import bisect_left
+from collections import defaultdict
+import copy
+from datetime import date, datetime, timedelta, timezone
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from weather.models.locations_model import Locations
+from weather.utils import api_utils
+from weather.utils.cache_utils import SingleFlight, TTLCache
+from weather.utils.geo_utils import location_key
+from weather.utils.logger import configure_logger
+from weather.utils.resilience_utils import UpstreamUnavailableError
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# OpenWeatherMap publishes a new 5 day / 3 hour forecast every 3 hours
+FORECAST_CYCLE_SECONDS = int(os.getenv("FORECAST_CYCLE_SECONDS", "10800"))
+FORECAST_CACHE_MAXSIZE = int(os.getenv("FORECAST_CACHE_MAXSIZE", "1024"))
+# Seconds a failed fetch for a location's cycle is remembered before upstream is tried again
+FORECAST_FAILURE_BACKOFF = float(os.getenv("FORECAST_FAILURE_BACKOFF", "300"))
+# 40 entries x 3 hours = the full 5 day forecast
+FORECAST_CNT = 40
+
+
+class Forecast:
+    """
+    A forecast for one location and issue cycle, parsed once and bucketed for slicing.
+
+    Entries are kept sorted by time for "next N hours" slices and grouped by
+    UTC calendar day for "day N" slices.
+    """
+
+    def __init__(self, issued_at: datetime, rows: List[dict]):
+        """Buckets the parsed forecast rows.
+
+        Args:
+            issued_at (datetime): Start of the forecast cycle the rows belong to (UTC).
+            rows (List[dict]): Rows as built by Locations.rows_from_forecast_payload.
+        """
+        self.issued_at = issued_at
+        # Set on copies served from an earlier cycle while upstream is unavailable
+        self.stale = False
+        rows = sorted(rows, key=lambda row: row["time"])
+        self._times = [row["time"] for row in rows]
+        self.entries = [self._serialize(row) for row in rows]
+        self.days: Dict[date, List[dict]] = defaultdict(list)
+        for when, entry in zip(self._times, self.entries):
+            self.days[when.date()].append(entry)
+
+    @staticmethod
+    def _serialize(row: dict) -> dict:
+        """Returns the JSON-ready fields of a forecast row."""
+        entry = {key: row[key] for key in ("temp", "feels_like", "pressure", "humidity",
+                                           "weather_main", "weather_description")}
+        entry["time"] = row["time"].isoformat()
+        return entry
+
+    def next_hours(self, now: datetime, hours: int = 24) -> List[dict]:
+        """Returns the entries between now and now + hours."""
+        start = bisect_left(self._times, now)
+        end = bisect_left(self._times, now + timedelta(hours=hours))
+        return self.entries[start:end]
+
+    def day(self, now: datetime, n: int) -> List[dict]:
+        """Returns the entries for the UTC calendar day n days after today (0 = today)."""
+        return self.days.get(now.date() + timedelta(days=n), [])
+
+    def by_day(self) -> Dict[str, List[dict]]:
+        """Returns every entry grouped by UTC calendar day."""
+        return {day.isoformat(): entries for day, entries in self.days.items()}
+
+
+class ForecastModel:
+    """
+    A class to serve forecasts from a store keyed by (location, forecast issue time).
+
+    Each location is fetched upstream at most once per forecast cycle: concurrent
+    misses for the same location and cycle share a single fetch, and the store
+    is re-checked inside it. A failed fetch is remembered for the cycle for
+    FORECAST_FAILURE_BACKOFF seconds, during which upstream is not retried.
+    While a fetch fails or is refused, the last stored forecast is served
+    marked stale.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """Initializes an empty forecast store.
+
+        Args:
+            clock (Callable[[], float]): Returns the current Unix time; replaceable in tests.
+        """
+        self.clock = clock
+        self.store = TTLCache(maxsize=FORECAST_CACHE_MAXSIZE, ttl=FORECAST_CYCLE_SECONDS)
+        self.flight = SingleFlight()
+        # (location, units, cycle) -> message of the fetch that failed
+        self.failures = TTLCache(maxsize=FORECAST_CACHE_MAXSIZE, ttl=FORECAST_FAILURE_BACKOFF)
+        self.upstream_fetches = 0
+        self.upstream_failures = 0
+        self._lock = threading.Lock()
+
+    def current_cycle(self) -> datetime:
+        """Returns the start of the forecast cycle containing the current time (naive UTC)."""
+        now = self.clock()
+        start = now - now % FORECAST_CYCLE_SECONDS
+        return datetime.fromtimestamp(start, timezone.utc).replace(tzinfo=None)
+
+    def now(self) -> datetime:
+        """Returns the current time as naive UTC, matching the stored forecast times."""
+        return datetime.fromtimestamp(self.clock(), timezone.utc).replace(tzinfo=None)
+
+    def get_forecast(self, city_name: str, latitude: float, longitude: float, units: str = "metric") -> Forecast:
+        """
+        Returns the forecast for a location from the current cycle, fetching it if needed.
+
+        Args:
+            city_name (str): The city name of the location.
+            latitude (float): The latitude of the location.
+            longitude (float): The longitude of the location.
+            units (str): Units of measurement.
+
+        Returns:
+            Forecast: The bucketed forecast; its stale flag is set if it is from an earlier cycle.
+
+        Raises:
+            UpstreamUnavailableError: If the fetch failed or was refused (or failed recently for
+                this cycle) and no earlier forecast is stored.
+            ValueError: If the API returns unexpected data.
+        """
+        cycle = self.current_cycle()
+        key: Tuple = (*location_key(city_name, latitude, longitude), units)
+        forecast = self.store.get(key)
+        if forecast is not None and forecast.issued_at == cycle:
+            return forecast
+
+        failed = self.failures.get((*key, cycle))
+        if failed is not None:
+            failure = UpstreamUnavailableError(failed)
+        else:
+            try:
+                return self.flight.do((*key, cycle), lambda: self._refresh(key, cycle))
+            except UpstreamUnavailableError as e:
+                # Refused by the breaker or rate limiter: upstream was not contacted and those guards pace retries
+                failure = e
+            except RuntimeError as e:
+                failure = UpstreamUnavailableError(f"Forecast fetch for {city_name} failed: {e}")
+                self.failures.set((*key, cycle), str(failure))
+                with self._lock:
+                    self.upstream_failures += 1
+
+        entry = self.store.peek(key)
+        if entry is None:
+            raise failure
+        logger.warning(f"Serving the {entry[0].issued_at} forecast for {city_name}: {failure}")
+        stale = copy.copy(entry[0])
+        stale.stale = True
+        return stale
+
+    def _refresh(self, key: Tuple, cycle: datetime) -> Forecast:
+        """Fetches and buckets a location's forecast unless another caller already stored this cycle."""
+        forecast = self.store.get(key)
+        if forecast is not None and forecast.issued_at == cycle:
+            return forecast
+
+        city_name, latitude, longitude, units = key
+        logger.info(f"Fetching forecast for {city_name} ({latitude}, {longitude}) for cycle {cycle}")
+        payload = api_utils.get_forecast(city_name, cnt=FORECAST_CNT, units=units,
+                                         latitude=latitude, longitude=longitude)
+        return self._store(key, cycle, payload)
+
+    def _store(self, key: Tuple, cycle: datetime, payload: dict) -> Forecast:
+        """Buckets a freshly fetched payload and stores it for the cycle."""
+        city_name, latitude, longitude, _ = key
+        with self._lock:
+            self.upstream_fetches += 1
+        forecast = Forecast(cycle, Locations.rows_from_forecast_payload(payload, city_name, latitude, longitude))
+        self.store.set(key, forecast)
+        return forecast
+
+    def has_current(self, city_name: str, latitude: float, longitude: float, units: str = "metric") -> bool:
+        """Returns whether the current cycle's forecast for a location is already stored."""
+        forecast = self.store.peek((*location_key(city_name, latitude, longitude), units))
+        return forecast is not None and forecast[0].issued_at == self.current_cycle()
+
+    def put(self, city_name: str, latitude: float, longitude: float, payload: dict, units: str = "metric") -> Forecast:
+        """
+        Stores a /forecast payload fetched elsewhere (e.g. by the async client) as the current cycle's forecast.
+
+        Args:
+            city_name (str): The city name of the location.
+            latitude (float): The latitude of the location.
+            longitude (float): The longitude of the location.
+            payload (dict): A validated /forecast payload with FORECAST_CNT entries.
+            units (str): Units of measurement.
+
+        Returns:
+            Forecast: The stored forecast.
+        """
+        key: Tuple = (*location_key(city_name, latitude, longitude), units)
+        return self._store(key, self.current_cycle(), payload)
+
+    def get_next_hours(self, city_name: str, latitude: float, longitude: float,
+                       hours: int = 24, units: str = "metric") -> List[dict]:
+        """
+        Returns the forecast entries for the next number of hours.
+
+        Args:
+            city_name (str): The city name of the location.
+            latitude (float): The latitude of the location.
+            longitude (float): The longitude of the location.
+            hours (int): Length of the window.
+            units (str): Units of measurement.
+
+        Returns:
+            List[dict]: Forecast entries ordered by time.
+        """
+        return self.get_forecast(city_name, latitude, longitude, units).next_hours(self.now(), hours)
+
+    def get_day(self, city_name: str, latitude: float, longitude: float,
+                day: int, units: str = "metric") -> List[dict]:
+        """
+        Returns the forecast entries for one UTC calendar day.
+
+        Args:
+            city_name (str): The city name of the location.
+            latitude (float): The latitude of the location.
+            longitude (float): The longitude of the location.
+            day (int): Days from today (0 = today, up to 5).
+            units (str): Units of measurement.
+
+        Returns:
+            List[dict]: Forecast entries ordered by time.
+        """
+        return self.get_forecast(city_name, latitude, longitude, units).day(self.now(), day)
+
+    def stats(self) -> dict:
+        """Returns the store counters and the number of upstream fetches made and failed."""
+        return dict(self.store.stats(), upstream_fetches=self.upstream_fetches,
+                    upstream_failures=self.upstream_failures)
@@ -0,0 +1,129 @@
+from datetime import datetime, timezone
+import logging
+import os
+from typing import Tuple
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from weather.db import db
+from weather.utils import api_utils
+from weather.utils.cache_utils import SingleFlight, TTLCache
+from weather.utils.geo_utils import quantize
+from weather.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# Per-process layer in front of the geocoding_cache table (seconds / entries)
+GEOCODING_CACHE_TTL = float(os.getenv("GEOCODING_CACHE_TTL", "3600"))
+GEOCODING_CACHE_MAXSIZE = int(os.getenv("GEOCODING_CACHE_MAXSIZE", "4096"))
+
+Location = Tuple[str, float, float]
+
+# Maps a normalized city name to its resolved (name, latitude, longitude)
+_resolved = TTLCache(maxsize=GEOCODING_CACHE_MAXSIZE, ttl=GEOCODING_CACHE_TTL)
+
+# Coalesces concurrent lookups of the same name in this process
+_lookups = SingleFlight()
+
+
+def normalize_city_name(city_name: str) -> str:
+    """Case-folds a city name and collapses its whitespace, so "new  york" and "New York" share an entry."""
+    return " ".join(city_name.split()).casefold()
+
+
+class GeocodedCity(db.Model):
+    """A city name resolved to coordinates by the geocoding API, stored in the 'geocoding_cache' table.
+
+    Each normalized name is resolved upstream once; later lookups, from any
+    process, read the stored coordinates.
+    """
+
+    __tablename__ = 'geocoding_cache'
+
+    # Named so it does not shadow Model.query
+    normalized_name = db.Column(db.String(255), primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    country = db.Column(db.String(8))
+    state = db.Column(db.String(255))
+    latitude = db.Column(db.Double, nullable=False)
+    longitude = db.Column(db.Double, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    def to_location(self) -> Location:
+        return self.name, self.latitude, self.longitude
+
+    @classmethod
+    def resolve(cls, city_name: str) -> Location:
+        """
+        Resolves a city name to coordinates, calling the geocoding API only the first time a name is seen.
+
+        Args:
+            city_name (str): City name, optionally with state and country code (e.g. "Boston,MA,US").
+
+        Returns:
+            Location: (resolved city name, quantized latitude, quantized longitude).
+
+        Raises:
+            ValueError: If the name is empty or does not match any place.
+            RuntimeError: On network errors or non-200 responses from the geocoding API.
+            SQLAlchemyError: If a database error occurs.
+        """
+        normalized_name = normalize_city_name(city_name or "")
+        if not normalized_name:
+            raise ValueError("City Name must be a non-empty string.")
+        if len(normalized_name) > 255:
+            raise ValueError("City Name must be at most 255 characters.")
+
+        location = _resolved.get(normalized_name)
+        if location is None:
+            location = _lookups.do(normalized_name, lambda: cls._load(normalized_name))
+            _resolved.set(normalized_name, location)
+        return location
+
+    @classmethod
+    def _load(cls, normalized_name: str) -> Location:
+        """Reads a name from the geocoding_cache table, resolving and storing it if it is not there."""
+        try:
+            cached = db.session.get(cls, normalized_name)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while reading geocoding cache for {normalized_name}: {e}")
+            raise
+        if cached is not None:
+            logger.info(f"Geocoding cache hit for {normalized_name}")
+            return cached.to_location()
+
+        match = api_utils.fetch_geocode(normalized_name)
+        if match is None:
+            logger.warning(f"No place found for {normalized_name}")
+            raise ValueError(f"No place found for '{normalized_name}'")
+
+        entry = cls(
+            normalized_name=normalized_name,
+            name=match.get("name") or normalized_name,
+            country=match.get("country"),
+            state=match.get("state"),
+            latitude=quantize(match["lat"]),
+            longitude=quantize(match["lon"]),
+            created_at=datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+        try:
+            db.session.add(entry)
+            db.session.commit()
+        except IntegrityError:
+            # Resolved concurrently by another worker; keep the stored row so every process agrees
+            db.session.rollback()
+            logger.info(f"{normalized_name} was geocoded concurrently; using the stored coordinates")
+            return db.session.get(cls, normalized_name).to_location()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error while storing geocoding result for {normalized_name}: {e}")
+            raise
+
+        logger.info(f"Geocoded {normalized_name} to {entry.latitude}, {entry.longitude}")
+        return entry.to_location()
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Drops the per-process layer, so the next lookups read the table again."""
+        _resolved.clear()
@@ -1,15 +1,110 @@
+from itertools import groupby
 import logging
-from sqlalchemy import desc
+from operator import itemgetter
+import os
+from flask import current_app, has_app_context
+from sqlalchemy import and_, case, desc, event, func, insert, or_, select, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from typing import List
-from datetime import datetime
+from sqlalchemy.orm import Session, object_session, validates
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from time import monotonic
+from types import SimpleNamespace
 
 from weather.db import db
+from weather.utils.geo_utils import GridIndex, location_key, quantize
 from weather.utils.logger import configure_logger
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# Rows per multi-row upsert statement, kept well under SQLite's bound-parameter limit
+UPSERT_CHUNK_SIZE = 500
+
+# Rows per executemany batch when bulk ingesting snapshots
+INGEST_BATCH_SIZE = 1000
+
+# Default and maximum rows (or buckets) per history page
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "100"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "1000"))
+
+# Rows fetched from the database per round trip when exporting
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Columns written by exports, in output order
+EXPORT_COLUMNS = ("id", "city_name", "latitude", "longitude", "time", "temp", "feels_like", "pressure",
+                  "humidity", "weather_main", "weather_description")
+
+# Columns summarised by downsampled history queries
+HISTORY_METRICS = ("temp", "feels_like", "pressure", "humidity")
+HISTORY_INTERVALS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+# Distance within which a stored location answers a coordinate lookup, and the largest radius accepted
+LOCATION_MATCH_RADIUS_KM = float(os.getenv("LOCATION_MATCH_RADIUS_KM", "5"))
+LOCATION_MAX_RADIUS_KM = float(os.getenv("LOCATION_MAX_RADIUS_KM", "100"))
+# Grid cell size of the in-memory location index, in degrees (0.05 is about 5.5 km of latitude)
+LOCATION_INDEX_CELL_DEGREES = float(os.getenv("LOCATION_INDEX_CELL_DEGREES", "0.05"))
+# Seconds before the index is reloaded from the database, to pick up writes from other processes
+LOCATION_INDEX_REFRESH_SECONDS = float(os.getenv("LOCATION_INDEX_REFRESH_SECONDS", "60"))
+
+# Every stored location, bucketed by coordinates. Writes in this process add to it once they commit.
+location_index = GridIndex(LOCATION_INDEX_CELL_DEGREES)
+
+# Session.info key under which ORM-inserted locations wait for their transaction to commit
+_PENDING_LOCATIONS = "pending_index_locations"
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parses an ISO 8601 timestamp into the naive UTC datetimes stored in weather_data.
+
+    Raises:
+        ValueError: If the value is not a valid ISO 8601 timestamp.
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def encode_cursor(cursor: Tuple[datetime, int]) -> str:
+    """Encodes a (time, id) history keyset position as an opaque string."""
+    return f"{cursor[0].isoformat()},{cursor[1]}"
+
+
+def decode_cursor(value: str) -> Tuple[datetime, int]:
+    """Decodes a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    time_part, _, id_part = value.rpartition(",")
+    return parse_timestamp(time_part), int(id_part)
+
+
+def _compact_store():
+    """Returns the dictionary-encoded store when WEATHER_STORAGE is "compact", otherwise None."""
+    if has_app_context() and current_app.config.get("WEATHER_STORAGE") == "compact":
+        # Imported here because compact_model builds on this module
+        from weather.models.compact_model import CompactStore
+        return CompactStore
+    return None
+
+
+def _time_bucket(column, interval: str, dialect: str):
+    """Returns a SQL expression truncating a timestamp column to the hour or day.
+
+    Raises:
+        ValueError: If the database backend has no supported truncation function.
+    """
+    if dialect == "postgresql":
+        return func.date_trunc(interval, column)
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-%dT%H:00:00" if interval == "hour" else "%Y-%m-%dT00:00:00", column)
+    if dialect in ("mysql", "mariadb"):
+        return func.date_format(column, "%Y-%m-%dT%H:00:00" if interval == "hour" else "%Y-%m-%dT00:00:00")
+    raise ValueError(f"Downsampled history is not supported on the {dialect} database backend")
+
 class Locations(db.Model):
     """Represents a location in the catalog.
 
@@ -18,21 +113,35 @@ class Locations(db.Model):
 
     Used in a Flask-SQLAlchemy application for favoriteslist management,
     user interaction, and data-driven song operations.
+
+    When the app sets WEATHER_STORAGE = "compact", the query and ingest
+    classmethods are served from the dictionary-encoded tables in
+    compact_model instead; their arguments and results are unchanged.
     """
 
     __tablename__ = 'weather_data'
 
     id = db.Column(db.Integer, primary_key=True)
-    city_name= db.Column(db.String, nullable=False) 
-    latitude =db.Column(db.Float, nullable=False)
-    longitude = db.Column(db.Float, nullable=False)
+    city_name= db.Column(db.String(255), nullable=False) 
+    latitude = db.Column(db.Double, nullable=False)
+    longitude = db.Column(db.Double, nullable=False)
     time = db.Column(db.DateTime, nullable = False)
     temp = db.Column(db.Float)
     feels_like = db.Column(db.Float)
     pressure = db.Column(db.Integer)
     humidity = db.Column(db.Integer)
-    weather_main = db.Column(db.String)
-    weather_description= db.Column(db.String)
+    weather_main = db.Column(db.String(64))
+    weather_description= db.Column(db.String(255))
+
+    # Serves the latest-snapshot and history lookups by compound key without a table scan
+    __table_args__ = (
+        db.Index("ix_weather_data_location_time", city_name, latitude, longitude, time.desc()),
+    )
+
+    @validates("latitude", "longitude")
+    def _quantize_coordinate(self, key: str, value):
+        """Quantizes coordinates assigned through the ORM like every other write path."""
+        return quantize(value) if isinstance(value, float) else value
 
     def validate(self) -> None:
         """Validates the location instance before committing to the database.
@@ -64,6 +173,9 @@ class Locations(db.Model):
             ValueError: If no location with the given ID is found.
             SQLAlchemyError: If a database error occurs.
         """
+        store = _compact_store()
+        if store is not None:
+            return store.get_location_by_id(location_id)
 
         logger.info(f"Attempting to retrieve location and weather with ID {location_id}")
         try:
@@ -95,10 +207,21 @@ class Locations(db.Model):
             ValueError: If no matching location is found.
             SQLAlchemyError: If a database error occurs.
         """
+        city_name, latitude, longitude = location_key(city_name, latitude, longitude)
+        store = _compact_store()
+        if store is not None:
+            return store.get_current_weather(city_name, latitude, longitude)
 
         logger.info(f"Attempting to retrieve current location and weather with city name '{city_name}, latitude {latitude}, and longitude {longitude}")
         try:
-            location=cls.query.filter_by(city_name=city_name.strip(), latitude=latitude, longitude=longitude).order_by(desc(cls.time)).first()
+            location=cls.query.join(LatestWeather, LatestWeather.snapshot_id == cls.id).filter(
+                LatestWeather.city_name == city_name.strip(),
+                LatestWeather.latitude == latitude,
+                LatestWeather.longitude == longitude,
+            ).first()
+            if not location:
+                # Rows written before latest_weather existed (or by raw SQL) are only reachable through the index
+                location=cls.query.filter_by(city_name=city_name.strip(), latitude=latitude, longitude=longitude).order_by(desc(cls.time)).first()
             if not location:
                 logger.info(f"Location with city name '{city_name}, latitude {latitude}, and longitude {longitude} not found")
                 raise ValueError(f"Location with city name '{city_name}, latitude {latitude}, and longitude {longitude} not found")
@@ -109,6 +232,203 @@ class Locations(db.Model):
                          f"cityname '{city_name}', latitude {latitude}, longitude {longitude}: {e}")
             raise        
     
+    @classmethod
+    def get_current_weather_many(cls, keys: Iterable[Tuple[str, float, float]]) -> Dict[Tuple[str, float, float], "Locations"]:
+        """
+        Retrieves the latest weather for many locations with a single query.
+
+        Args:
+            keys (Iterable[Tuple[str, float, float]]): (city_name, latitude, longitude) compound keys.
+
+        Returns:
+            Dict[Tuple[str, float, float], Locations]: The latest snapshot per key. Keys without
+                any snapshot are omitted.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        keys = [location_key(*key) for key in keys]
+        store = _compact_store()
+        if store is not None:
+            return store.get_current_weather_many(keys)
+        if not keys:
+            return {}
+
+        logger.info(f"Attempting to retrieve current weather for {len(keys)} locations")
+        try:
+            rows = cls.query.join(LatestWeather, LatestWeather.snapshot_id == cls.id).filter(
+                tuple_(LatestWeather.city_name, LatestWeather.latitude, LatestWeather.longitude).in_(keys)
+            ).all()
+            found = {(row.city_name, row.latitude, row.longitude): row for row in rows}
+            logger.info(f"Successfully retrieved current weather for {len(found)} of {len(keys)} locations")
+            return found
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while retrieving current weather for {len(keys)} locations: {e}")
+            raise
+
+    @classmethod
+    def get_location_keys(cls) -> List[Tuple[str, float, float]]:
+        """
+        Retrieves the compound key of every location with at least one snapshot.
+
+        Returns:
+            List[Tuple[str, float, float]]: (city_name, latitude, longitude) keys.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        store = _compact_store()
+        if store is not None:
+            return store.get_location_keys()
+        try:
+            rows = db.session.execute(
+                select(LatestWeather.city_name, LatestWeather.latitude, LatestWeather.longitude)).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while listing stored locations: {e}")
+            raise
+        return [tuple(row) for row in rows]
+
+    @classmethod
+    def _location_index(cls) -> GridIndex:
+        """Returns the location index, reloading it first if it was never built or is due a refresh."""
+        built_at = location_index.built_at
+        if built_at is None or monotonic() - built_at > LOCATION_INDEX_REFRESH_SECONDS:
+            location_index.replace(cls.get_location_keys())
+        return location_index
+
+    @staticmethod
+    def _validate_point(latitude: float, longitude: float, radius_km: float) -> None:
+        if not -90 <= latitude <= 90:
+            raise ValueError("latitude must be within [-90, 90]")
+        if not -180 <= longitude <= 180:
+            raise ValueError("longitude must be within [-180, 180]")
+        if not 0 <= radius_km <= LOCATION_MAX_RADIUS_KM:
+            raise ValueError(f"radius_km must be within [0, {LOCATION_MAX_RADIUS_KM:g}]")
+
+    @classmethod
+    def find_nearest(cls, latitude: float, longitude: float, radius_km: float = LOCATION_MATCH_RADIUS_KM,
+                     city_name: Optional[str] = None) -> Optional[Tuple[Tuple[str, float, float], float]]:
+        """
+        Finds the stored location closest to a point, so nearby requests can reuse its snapshots.
+
+        Args:
+            latitude (float): Latitude of the point.
+            longitude (float): Longitude of the point.
+            radius_km (float): Only match locations within this distance.
+            city_name (str, optional): Only match locations with this city name.
+
+        Returns:
+            Optional[Tuple[Tuple[str, float, float], float]]: The location's compound key and its
+                distance in km, or None if no stored location is within the radius.
+
+        Raises:
+            ValueError: If the point is out of bounds or the radius is negative or above LOCATION_MAX_RADIUS_KM.
+            SQLAlchemyError: If a database error occurs while (re)loading the index.
+        """
+        cls._validate_point(latitude, longitude, radius_km)
+        city_name = city_name.strip() if city_name else None
+        return cls._location_index().nearest(latitude, longitude, radius_km, city_name=city_name)
+
+    @classmethod
+    def find_within(cls, latitude: float, longitude: float, radius_km: float = LOCATION_MATCH_RADIUS_KM,
+                    limit: Optional[int] = None) -> List[Tuple[Tuple[str, float, float], float]]:
+        """
+        Finds the stored locations within a radius of a point, nearest first.
+
+        Returns:
+            List[Tuple[Tuple[str, float, float], float]]: (compound key, distance in km) pairs.
+
+        Raises:
+            ValueError: If the point is out of bounds or the radius is negative or above LOCATION_MAX_RADIUS_KM.
+            SQLAlchemyError: If a database error occurs while (re)loading the index.
+        """
+        cls._validate_point(latitude, longitude, radius_km)
+        return cls._location_index().within(latitude, longitude, radius_km, limit=limit)
+
+    @classmethod
+    def match_location(cls, city_name: str, latitude: float, longitude: float,
+                       radius_km: float = LOCATION_MATCH_RADIUS_KM) -> Tuple[str, float, float]:
+        """
+        Returns the stored location a request for a point should use.
+
+        The stored location with the same city name closest to the point, within
+        radius_km, is returned so the request shares its snapshots, cache entries
+        and refreshes instead of starting a new location upstream. Without one the
+        point's own (quantized) key is returned.
+
+        Raises:
+            ValueError: If the point is out of bounds or the radius is invalid.
+            SQLAlchemyError: If a database error occurs while (re)loading the index.
+        """
+        key = location_key(city_name, latitude, longitude)
+        match = cls.find_nearest(key[1], key[2], radius_km, city_name=key[0])
+        if match is None:
+            return key
+        if match[0] != key:
+            logger.info(f"Matched {key} to stored location {match[0]}, {match[1]:.3f} km away")
+        return match[0]
+
+    @classmethod
+    def get_location_row_counts(cls) -> Dict[Tuple[str, float, float], int]:
+        """
+        Counts the stored snapshots of every location.
+
+        Returns:
+            Dict[Tuple[str, float, float], int]: Snapshot counts keyed by (city_name, latitude, longitude).
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        store = _compact_store()
+        if store is not None:
+            return store.get_location_row_counts()
+        try:
+            rows = db.session.execute(
+                select(cls.city_name, cls.latitude, cls.longitude, func.count())
+                .group_by(cls.city_name, cls.latitude, cls.longitude)).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while counting snapshots per location: {e}")
+            raise
+        return {(city, lat, lon): count for city, lat, lon, count in rows}
+
+    @classmethod
+    def coordinate_dedup_report(cls, precisions: Iterable[int]) -> List[dict]:
+        """
+        Estimates how many stored locations would merge if coordinates were rounded to each precision.
+
+        Args:
+            precisions (Iterable[int]): Decimal places to evaluate.
+
+        Returns:
+            List[dict]: Per precision, the stored and quantized location counts, the
+                locations that would merge into another, and the snapshots whose key would change.
+
+        Raises:
+            ValueError: If a precision is negative.
+            SQLAlchemyError: If a database error occurs.
+        """
+        counts = cls.get_location_row_counts()
+        report = []
+        for precision in precisions:
+            if precision < 0:
+                raise ValueError("precision must be non-negative")
+            quantized = set()
+            rekeyed = 0
+            for (city, lat, lon), count in counts.items():
+                key = (city.strip(), quantize(lat, precision), quantize(lon, precision))
+                quantized.add(key)
+                if key != (city, lat, lon):
+                    rekeyed += count
+            report.append({
+                "precision": precision,
+                "locations": len(counts),
+                "quantized_locations": len(quantized),
+                "merged_locations": len(counts) - len(quantized),
+                "rows_rekeyed": rekeyed,
+                "rows": sum(counts.values()),
+            })
+        return report
+
     @classmethod
     def get_weather_history(cls, city_name: str, latitude: float, longitude:float) -> List["Locations"]:
         """
@@ -126,6 +446,10 @@ class Locations(db.Model):
             ValueError: If no matching location is found.
             SQLAlchemyError: If a database error occurs.
         """
+        city_name, latitude, longitude = location_key(city_name, latitude, longitude)
+        store = _compact_store()
+        if store is not None:
+            return store.get_weather_history(city_name, latitude, longitude)
         logger.info(f"Attempting to retrieve previous weather with city name '{city_name}, latitude {latitude}, and longitude {longitude}")
         try:
             location=cls.query.filter_by(city_name=city_name.strip(), latitude=latitude, longitude=longitude).order_by(desc(cls.time)).limit(3).all()
@@ -137,4 +461,645 @@ class Locations(db.Model):
         except SQLAlchemyError as e:
             logger.error(f"Database error while retrieving location by compound key"
                          f"cityname '{city_name}', latitude {latitude}, longitude {longitude}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    @classmethod
+    def get_weather_range(cls, city_name: str, latitude: float, longitude: float,
+                          start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          limit: int = HISTORY_PAGE_SIZE,
+                          after: Optional[Tuple[datetime, int]] = None) -> Tuple[List[dict], Optional[Tuple[datetime, int]]]:
+        """
+        Retrieves one page of a location's weather history in time order.
+
+        Pages use keyset pagination on (time, id), so each page costs the same
+        no matter how deep into the history it is. Only the weather columns are
+        selected; no ORM instances are built.
+
+        Args:
+            city_name (str): The city name of the location.
+            latitude (float): The latitude of the location.
+            longitude (float): The longitude of the location.
+            start (datetime, optional): Inclusive lower bound on time (naive UTC).
+            end (datetime, optional): Exclusive upper bound on time (naive UTC).
+            limit (int): Maximum rows to return, capped at HISTORY_MAX_PAGE_SIZE.
+            after (Tuple[datetime, int], optional): The cursor returned with the previous page.
+
+        Returns:
+            Tuple[List[dict], Optional[Tuple[datetime, int]]]: The rows, and the cursor
+                for the next page or None if this was the last page.
+
+        Raises:
+            ValueError: If limit is not positive.
+            SQLAlchemyError: If a database error occurs.
+        """
+        city_name, latitude, longitude = location_key(city_name, latitude, longitude)
+        store = _compact_store()
+        if store is not None:
+            return store.get_weather_range(city_name, latitude, longitude, start, end, limit, after)
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, HISTORY_MAX_PAGE_SIZE)
+
+        logger.info(f"Retrieving weather history page for '{city_name}', latitude {latitude}, longitude {longitude} "
+                    f"from {start} to {end} after {after}")
+        query = select(cls.id, cls.time, cls.temp, cls.feels_like, cls.pressure, cls.humidity,
+                       cls.weather_main, cls.weather_description).where(
+            cls.city_name == city_name.strip(), cls.latitude == latitude, cls.longitude == longitude)
+        if start is not None:
+            query = query.where(cls.time >= start)
+        if end is not None:
+            query = query.where(cls.time < end)
+        if after is not None:
+            after_time, after_id = after
+            query = query.where(or_(cls.time > after_time, and_(cls.time == after_time, cls.id > after_id)))
+        query = query.order_by(cls.time, cls.id).limit(limit + 1)
+
+        try:
+            rows = [row._asdict() for row in db.session.execute(query)]
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while retrieving weather history for '{city_name}': {e}")
+            raise
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]["time"], rows[-1]["id"])
+        logger.info(f"Retrieved {len(rows)} history rows for '{city_name}'")
+        return rows, next_cursor
+
+    @classmethod
+    def get_weather_aggregates(cls, city_name: str, latitude: float, longitude: float, interval: str,
+                               start: Optional[datetime] = None, end: Optional[datetime] = None,
+                               limit: int = HISTORY_PAGE_SIZE) -> Tuple[List[dict], Optional[datetime]]:
+        """
+        Downsamples a location's weather history into hourly or daily buckets in SQL.
+
+        Each bucket holds the sample count and the min, mean and max of temp,
+        feels_like, pressure and humidity.
+
+        Args:
+            city_name (str): The city name of the location.
+            latitude (float): The latitude of the location.
+            longitude (float): The longitude of the location.
+            interval (str): "hour" or "day".
+            start (datetime, optional): Inclusive lower bound on time (naive UTC).
+            end (datetime, optional): Exclusive upper bound on time (naive UTC).
+            limit (int): Maximum buckets to return, capped at HISTORY_MAX_PAGE_SIZE.
+
+        Returns:
+            Tuple[List[dict], Optional[datetime]]: The buckets in time order, and the
+                start to pass for the next page or None if this was the last page.
+
+        Raises:
+            ValueError: If interval or limit is invalid, or the database backend cannot downsample.
+            SQLAlchemyError: If a database error occurs.
+        """
+        city_name, latitude, longitude = location_key(city_name, latitude, longitude)
+        store = _compact_store()
+        if store is not None:
+            return store.get_weather_aggregates(city_name, latitude, longitude, interval, start, end, limit)
+        if interval not in HISTORY_INTERVALS:
+            raise ValueError(f"interval must be one of: {', '.join(HISTORY_INTERVALS)}")
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, HISTORY_MAX_PAGE_SIZE)
+
+        logger.info(f"Retrieving {interval}ly weather aggregates for '{city_name}', latitude {latitude}, "
+                    f"longitude {longitude} from {start} to {end}")
+        bucket = _time_bucket(cls.time, interval, db.session.get_bind().dialect.name).label("bucket")
+        columns = [bucket, func.count(cls.id).label("samples")]
+        for metric in HISTORY_METRICS:
+            column = getattr(cls, metric)
+            columns += [func.min(column).label(f"{metric}_min"),
+                        func.avg(column).label(f"{metric}_mean"),
+                        func.max(column).label(f"{metric}_max")]
+        query = select(*columns).where(
+            cls.city_name == city_name.strip(), cls.latitude == latitude, cls.longitude == longitude)
+        if start is not None:
+            query = query.where(cls.time >= start)
+        if end is not None:
+            query = query.where(cls.time < end)
+        query = query.group_by(bucket).order_by(bucket).limit(limit + 1)
+
+        try:
+            rows = db.session.execute(query).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while aggregating weather history for '{city_name}': {e}")
+            raise
+
+        buckets = []
+        for row in rows[:limit]:
+            entry = row._asdict()
+            bucket_time = entry.pop("bucket")
+            entry["time"] = bucket_time if isinstance(bucket_time, datetime) else datetime.fromisoformat(bucket_time)
+            for metric in HISTORY_METRICS:
+                if entry[f"{metric}_mean"] is not None:
+                    entry[f"{metric}_mean"] = round(float(entry[f"{metric}_mean"]), 2)
+            buckets.append(entry)
+
+        next_start = buckets[-1]["time"] + HISTORY_INTERVALS[interval] if len(rows) > limit else None
+        logger.info(f"Retrieved {len(buckets)} {interval}ly buckets for '{city_name}'")
+        return buckets, next_start
+
+    @classmethod
+    def get_history_columns(cls, keys: Iterable[Tuple[str, float, float]], start: Optional[datetime] = None,
+                            end: Optional[datetime] = None) -> Dict[Tuple[str, float, float], Dict[str, tuple]]:
+        """
+        Loads the time, temp, feels_like and humidity history of many locations as columns.
+
+        All locations are read with one query per UPSERT_CHUNK_SIZE keys, ordered by
+        time, and returned column-wise so they convert directly to arrays.
+
+        Args:
+            keys (Iterable[Tuple[str, float, float]]): (city_name, latitude, longitude) compound keys.
+            start (datetime, optional): Inclusive lower bound on time (naive UTC).
+            end (datetime, optional): Exclusive upper bound on time (naive UTC).
+
+        Returns:
+            Dict[Tuple[str, float, float], Dict[str, tuple]]: Per key, sequences keyed by
+                "time", "temp", "feels_like" and "humidity". Keys without history are omitted.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        keys = list(dict.fromkeys(location_key(*key) for key in keys))
+        store = _compact_store()
+        if store is not None:
+            return store.get_history_columns(keys, start, end)
+
+        logger.info(f"Loading history columns for {len(keys)} locations from {start} to {end}")
+        history: Dict[Tuple[str, float, float], Dict[str, tuple]] = {}
+        try:
+            for offset in range(0, len(keys), UPSERT_CHUNK_SIZE):
+                query = select(cls.city_name, cls.latitude, cls.longitude, cls.time, cls.temp, cls.feels_like,
+                               cls.humidity).where(
+                    tuple_(cls.city_name, cls.latitude, cls.longitude).in_(keys[offset:offset + UPSERT_CHUNK_SIZE]))
+                if start is not None:
+                    query = query.where(cls.time >= start)
+                if end is not None:
+                    query = query.where(cls.time < end)
+                query = query.order_by(cls.city_name, cls.latitude, cls.longitude, cls.time)
+                rows = db.session.execute(query).all()
+                # Rows arrive grouped by location; transpose each group into columns at C speed
+                for key, group in groupby(rows, key=itemgetter(0, 1, 2)):
+                    _, _, _, times, temps, feels_like, humidity = zip(*group)
+                    history[key] = {"time": times, "temp": temps, "feels_like": feels_like, "humidity": humidity}
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while loading history columns for {len(keys)} locations: {e}")
+            raise
+        logger.info(f"Loaded history for {len(history)} of {len(keys)} locations")
+        return history
+
+    @classmethod
+    def iter_export(cls, city_name: Optional[str] = None, latitude: Optional[float] = None,
+                    longitude: Optional[float] = None, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+        """
+        Streams weather_data rows in id order, fetching batch_size rows per round trip.
+
+        Rows are read through a streaming cursor (yield_per) as plain column
+        tuples, so memory stays constant however many rows match. The caller
+        must consume the iterator inside the application context.
+
+        Args:
+            city_name (str, optional): Only rows for this city.
+            latitude (float, optional): Only rows at this latitude.
+            longitude (float, optional): Only rows at this longitude.
+            start (datetime, optional): Inclusive lower bound on time (naive UTC).
+            end (datetime, optional): Exclusive upper bound on time (naive UTC).
+            batch_size (int): Rows fetched per round trip.
+
+        Yields:
+            dict: One row keyed by EXPORT_COLUMNS.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        latitude = quantize(latitude) if latitude is not None else None
+        longitude = quantize(longitude) if longitude is not None else None
+        store = _compact_store()
+        if store is not None:
+            yield from store.iter_export(city_name, latitude, longitude, start, end, batch_size)
+            return
+        query = select(*(getattr(cls, column) for column in EXPORT_COLUMNS))
+        if city_name is not None:
+            query = query.where(cls.city_name == city_name.strip())
+        if latitude is not None:
+            query = query.where(cls.latitude == latitude)
+        if longitude is not None:
+            query = query.where(cls.longitude == longitude)
+        if start is not None:
+            query = query.where(cls.time >= start)
+        if end is not None:
+            query = query.where(cls.time < end)
+        query = query.order_by(cls.id).execution_options(yield_per=batch_size)
+
+        logger.info(f"Exporting weather_data rows for city '{city_name}', latitude {latitude}, "
+                    f"longitude {longitude} from {start} to {end}")
+        exported = 0
+        try:
+            for partition in db.session.execute(query).partitions():
+                for row in partition:
+                    yield row._asdict()
+                exported += len(partition)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while exporting weather_data after {exported} rows: {e}")
+            raise
+        logger.info(f"Exported {exported} weather_data rows")
+
+    ##################################################
+    # Bulk Ingestion
+    ##################################################
+
+    @staticmethod
+    def _row_from_entry(entry: dict, city_name: str, latitude: float, longitude: float) -> dict:
+        """Maps one OpenWeatherMap weather entry (a /weather payload or a /forecast list item) to a row."""
+        main = entry.get("main") or {}
+        conditions = (entry.get("weather") or [{}])[0]
+        dt = entry.get("dt")
+        return {
+            "city_name": city_name.strip() if isinstance(city_name, str) else city_name,
+            "latitude": quantize(latitude) if isinstance(latitude, (int, float)) else latitude,
+            "longitude": quantize(longitude) if isinstance(longitude, (int, float)) else longitude,
+            "time": datetime.fromtimestamp(dt, timezone.utc).replace(tzinfo=None) if isinstance(dt, (int, float)) else dt,
+            "temp": main.get("temp"),
+            "feels_like": main.get("feels_like"),
+            "pressure": main.get("pressure"),
+            "humidity": main.get("humidity"),
+            "weather_main": conditions.get("main"),
+            "weather_description": conditions.get("description"),
+        }
+
+    @classmethod
+    def rows_from_weather_payload(cls, payload: dict, city_name: Optional[str] = None,
+                                  latitude: Optional[float] = None, longitude: Optional[float] = None) -> List[dict]:
+        """
+        Converts a /weather payload (as returned by api_utils.get_current_weather) into rows.
+
+        Args:
+            payload (dict): The current weather payload.
+            city_name (str, optional): Overrides the payload's city name.
+            latitude (float, optional): Overrides the payload's latitude.
+            longitude (float, optional): Overrides the payload's longitude.
+
+        Returns:
+            List[dict]: A single weather_data row.
+        """
+        coord = payload.get("coord") or {}
+        return [cls._row_from_entry(
+            payload,
+            city_name if city_name is not None else payload.get("name"),
+            latitude if latitude is not None else coord.get("lat"),
+            longitude if longitude is not None else coord.get("lon"),
+        )]
+
+    @classmethod
+    def rows_from_forecast_payload(cls, payload: dict, city_name: Optional[str] = None,
+                                   latitude: Optional[float] = None, longitude: Optional[float] = None) -> List[dict]:
+        """
+        Converts a /forecast payload (as returned by api_utils.get_forecast) into rows.
+
+        Args:
+            payload (dict): The forecast payload.
+            city_name (str, optional): Overrides the payload's city name.
+            latitude (float, optional): Overrides the payload's latitude.
+            longitude (float, optional): Overrides the payload's longitude.
+
+        Returns:
+            List[dict]: One weather_data row per forecast entry.
+        """
+        city = payload.get("city") or {}
+        coord = city.get("coord") or {}
+        city_name = city_name if city_name is not None else city.get("name")
+        latitude = latitude if latitude is not None else coord.get("lat")
+        longitude = longitude if longitude is not None else coord.get("lon")
+        return [cls._row_from_entry(entry, city_name, latitude, longitude) for entry in payload.get("list", [])]
+
+    @staticmethod
+    def _quantize_rows(rows: List[dict]) -> List[dict]:
+        """Returns the rows with float coordinates quantized, copying only the rows that change."""
+        quantized = []
+        for row in rows:
+            latitude = row.get("latitude")
+            longitude = row.get("longitude")
+            if isinstance(latitude, float) and isinstance(longitude, float):
+                key_latitude, key_longitude = quantize(latitude), quantize(longitude)
+                if (key_latitude, key_longitude) != (latitude, longitude):
+                    row = {**row, "latitude": key_latitude, "longitude": key_longitude}
+            quantized.append(row)
+        return quantized
+
+    @staticmethod
+    def validate_rows(rows: List[dict]) -> None:
+        """
+        Validates a batch of rows with the same rules as validate, one column at a time.
+
+        Args:
+            rows (List[dict]): weather_data rows.
+
+        Raises:
+            ValueError: Listing the offending rows if any field is invalid.
+        """
+        cities = [row.get("city_name") for row in rows]
+        lats = [row.get("latitude") for row in rows]
+        lons = [row.get("longitude") for row in rows]
+        times = [row.get("time") for row in rows]
+
+        checks = (
+            ("City Name must be a non-empty string.",
+             [i for i, v in enumerate(cities) if not v or not isinstance(v, str)]),
+            ("Latitude must be within bounds of [-90,90]",
+             [i for i, v in enumerate(lats) if not isinstance(v, float) or not (-90 <= v <= 90)]),
+            ("Longitude must be within bounds of [-180,180]",
+             [i for i, v in enumerate(lons) if not isinstance(v, float) or not (-180 <= v <= 180)]),
+            ("Time must be a datetime object ",
+             [i for i, v in enumerate(times) if not v or not isinstance(v, datetime)]),
+        )
+        errors = [f"{message.strip()} (rows {bad[:10]}{'...' if len(bad) > 10 else ''})" for message, bad in checks if bad]
+        if errors:
+            raise ValueError("; ".join(errors))
+
+    @classmethod
+    def bulk_ingest(cls, payloads: Iterable[dict], batch_size: int = INGEST_BATCH_SIZE) -> int:
+        """
+        Writes /weather and /forecast payloads into 'weather_data' in batches inside one transaction.
+
+        Payloads with a "list" key are treated as forecasts, all others as current weather.
+        Every row is validated before anything is written, and latest_weather is advanced
+        once per batch.
+
+        Args:
+            payloads (Iterable[dict]): Payloads as returned by api_utils.
+            batch_size (int): Rows per executemany batch.
+
+        Returns:
+            int: The number of rows written.
+
+        Raises:
+            ValueError: If any row is invalid or batch_size is not positive.
+            SQLAlchemyError: If a database error occurs. Nothing is written in that case.
+        """
+        rows = []
+        for payload in payloads:
+            if "list" in payload:
+                rows.extend(cls.rows_from_forecast_payload(payload))
+            else:
+                rows.extend(cls.rows_from_weather_payload(payload))
+        return cls.ingest_rows(rows, batch_size=batch_size)
+
+    @staticmethod
+    def _unique_rows(rows: List[dict]) -> List[dict]:
+        """Returns the rows with repeated (location, time) keys dropped, keeping the last of each."""
+        unique = {(row["city_name"], row["latitude"], row["longitude"], row["time"]): row for row in rows}
+        return list(unique.values())
+
+    @classmethod
+    def _stored_keys(cls, connection, rows: List[dict]) -> set:
+        """Returns the (city_name, latitude, longitude, time) keys of rows that are already in weather_data."""
+        table = cls.__table__
+        locations = list({(row["city_name"], row["latitude"], row["longitude"]) for row in rows})
+        times = list({row["time"] for row in rows})
+        stored = set()
+        for start in range(0, len(locations), UPSERT_CHUNK_SIZE):
+            stored.update(tuple(row) for row in connection.execute(
+                select(table.c.city_name, table.c.latitude, table.c.longitude, table.c.time)
+                .where(tuple_(table.c.city_name, table.c.latitude, table.c.longitude)
+                       .in_(locations[start:start + UPSERT_CHUNK_SIZE]),
+                       table.c.time.in_(times))))
+        return stored
+
+    @classmethod
+    def ingest_rows(cls, rows: List[dict], batch_size: int = INGEST_BATCH_SIZE, skip_existing: bool = False) -> int:
+        """
+        Writes prepared weather_data rows in batches inside one transaction.
+
+        Args:
+            rows (List[dict]): Rows as built by rows_from_weather_payload / rows_from_forecast_payload.
+            batch_size (int): Rows per executemany batch.
+            skip_existing (bool): Skip rows whose location already has a snapshot at the same time,
+                so re-fetching an unchanged observation does not store it twice.
+
+        Returns:
+            int: The number of rows written.
+
+        Raises:
+            ValueError: If any row is invalid or batch_size is not positive.
+            SQLAlchemyError: If a database error occurs. Nothing is written in that case.
+        """
+        rows = cls._quantize_rows(rows)
+        store = _compact_store()
+        if store is not None:
+            return store.ingest_rows(rows, batch_size, skip_existing=skip_existing)
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer")
+
+        cls.validate_rows(rows)
+        if not rows:
+            logger.warning("Bulk ingest called with no rows")
+            return 0
+
+        logger.info(f"Bulk ingesting {len(rows)} weather snapshots in batches of {batch_size}")
+        table = cls.__table__
+        stmt = insert(table).returning(
+            table.c.id, table.c.city_name, table.c.latitude, table.c.longitude, table.c.time,
+            sort_by_parameter_order=True,
+        )
+        try:
+            connection = db.session.connection()
+            if skip_existing:
+                rows = cls._unique_rows(rows)
+                existing = cls._stored_keys(connection, rows)
+                rows = [row for row in rows
+                        if (row["city_name"], row["latitude"], row["longitude"], row["time"]) not in existing]
+                if not rows:
+                    db.session.commit()
+                    logger.info("Every snapshot was already stored; nothing to ingest")
+                    return 0
+            # MySQL has no INSERT ... RETURNING, so ids are collected one row at a time there
+            returning = connection.dialect.insert_executemany_returning_sort_by_parameter_order
+            stored = set()
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                if returning:
+                    written = connection.execute(stmt, batch).all()
+                else:
+                    written = [SimpleNamespace(id=connection.execute(insert(table), row).inserted_primary_key[0], **row)
+                               for row in batch]
+                LatestWeather.upsert(connection, [
+                    {"city_name": row.city_name, "latitude": row.latitude, "longitude": row.longitude,
+                     "snapshot_id": row.id, "time": row.time}
+                    for row in written
+                ])
+                stored.update((row.city_name, row.latitude, row.longitude) for row in written)
+            db.session.commit()
+            location_index.add_many(stored)
+            logger.info(f"Successfully ingested {len(rows)} weather snapshots")
+            return len(rows)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error while bulk ingesting weather snapshots: {e}")
+            raise
+
+
+class LatestWeather(db.Model):
+    """Points each location at its most recent snapshot in 'weather_data'.
+
+    Maintained on every write to Locations, so the current weather for a location
+    is a primary-key lookup and many locations can be fetched with one IN query.
+    """
+
+    __tablename__ = 'latest_weather'
+
+    city_name = db.Column(db.String(255), primary_key=True)
+    latitude = db.Column(db.Double, primary_key=True)
+    longitude = db.Column(db.Double, primary_key=True)
+    snapshot_id = db.Column(db.Integer, db.ForeignKey('weather_data.id'), nullable=False)
+    time = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def upsert(cls, connection, rows: List[dict]) -> None:
+        """
+        Moves each location's pointer forward to the given snapshots.
+
+        A pointer is only replaced by a newer snapshot (or, at the same time, a higher id),
+        so concurrent or out-of-order writers cannot move it backwards.
+
+        Args:
+            connection: The connection of the transaction that wrote the snapshots.
+            rows (List[dict]): Dicts with city_name, latitude, longitude, snapshot_id and time.
+        """
+        latest: Dict[Tuple[str, float, float], dict] = {}
+        for row in rows:
+            key = (row["city_name"], row["latitude"], row["longitude"])
+            current = latest.get(key)
+            if current is None or (row["time"], row["snapshot_id"]) > (current["time"], current["snapshot_id"]):
+                latest[key] = row
+        if not latest:
+            return
+
+        values = list(latest.values())
+        if connection.dialect.name in ("mysql", "mariadb"):
+            for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+                connection.execute(cls._mysql_upsert(values[start:start + UPSERT_CHUNK_SIZE]))
+            return
+        dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(connection.dialect.name)
+        if dialect is None:
+            cls._upsert_generic(connection, values)
+            return
+
+        for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+            stmt = dialect.insert(cls.__table__).values(values[start:start + UPSERT_CHUNK_SIZE])
+            newer = or_(
+                stmt.excluded.time > cls.__table__.c.time,
+                and_(stmt.excluded.time == cls.__table__.c.time, stmt.excluded.snapshot_id > cls.__table__.c.snapshot_id),
+            )
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=["city_name", "latitude", "longitude"],
+                set_={"snapshot_id": stmt.excluded.snapshot_id, "time": stmt.excluded.time},
+                where=newer,
+            ))
+
+    @classmethod
+    def _mysql_upsert(cls, rows: List[dict]):
+        """INSERT ... ON DUPLICATE KEY UPDATE for MySQL/MariaDB, moving pointers forward only."""
+        table = cls.__table__
+        stmt = mysql.insert(table).values(rows)
+        newer = or_(
+            stmt.inserted.time > table.c.time,
+            and_(stmt.inserted.time == table.c.time, stmt.inserted.snapshot_id > table.c.snapshot_id),
+        )
+        # MySQL applies the assignments in order, so snapshot_id must be compared before time changes
+        return stmt.on_duplicate_key_update([
+            ("snapshot_id", case((newer, stmt.inserted.snapshot_id), else_=table.c.snapshot_id)),
+            ("time", case((newer, stmt.inserted.time), else_=table.c.time)),
+        ])
+
+    @classmethod
+    def _upsert_generic(cls, connection, rows: List[dict]) -> None:
+        """
+        Insert-then-conditional-update for dialects without a native upsert.
+
+        Each insert runs in a savepoint; if a concurrent writer created the
+        pointer first, the key conflict rolls back only that insert and the
+        pointer is moved forward by a single conditional UPDATE instead.
+        """
+        table = cls.__table__
+        for row in rows:
+            try:
+                with connection.begin_nested():
+                    connection.execute(table.insert().values(**row))
+            except IntegrityError:
+                newer = or_(table.c.time < row["time"],
+                            and_(table.c.time == row["time"], table.c.snapshot_id < row["snapshot_id"]))
+                connection.execute(table.update().where(
+                    table.c.city_name == row["city_name"],
+                    table.c.latitude == row["latitude"],
+                    table.c.longitude == row["longitude"],
+                    newer,
+                ).values(snapshot_id=row["snapshot_id"], time=row["time"]))
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        Recomputes every pointer from 'weather_data', e.g. after rows were loaded outside the ORM.
+
+        Returns:
+            int: The number of locations indexed.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        logger.info("Rebuilding latest_weather from weather_data")
+        try:
+            ranked = db.session.query(
+                Locations.id, Locations.city_name, Locations.latitude, Locations.longitude, Locations.time,
+                db.func.row_number().over(
+                    partition_by=(Locations.city_name, Locations.latitude, Locations.longitude),
+                    order_by=(desc(Locations.time), desc(Locations.id)),
+                ).label("rank"),
+            ).subquery()
+            rows = db.session.query(ranked).filter(ranked.c.rank == 1).all()
+            db.session.execute(cls.__table__.delete())
+            cls.upsert(db.session.connection(), [
+                {"city_name": row.city_name, "latitude": row.latitude, "longitude": row.longitude,
+                 "snapshot_id": row.id, "time": row.time}
+                for row in rows
+            ])
+            db.session.commit()
+            location_index.replace((row.city_name, row.latitude, row.longitude) for row in rows)
+            logger.info(f"Rebuilt latest_weather for {len(rows)} locations")
+            return len(rows)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error while rebuilding latest_weather: {e}")
+            raise
+
+
+@event.listens_for(Locations, "after_insert")
+def _advance_latest_weather(mapper, connection, target: Locations) -> None:
+    """Keeps latest_weather in step with every snapshot written through the ORM."""
+    LatestWeather.upsert(connection, [{
+        "city_name": target.city_name,
+        "latitude": target.latitude,
+        "longitude": target.longitude,
+        "snapshot_id": target.id,
+        "time": target.time,
+    }])
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_LOCATIONS, set()).add(
+            (target.city_name, target.latitude, target.longitude))
+
+
+@event.listens_for(Session, "after_commit")
+def _index_committed_locations(session) -> None:
+    """Adds the locations inserted through the ORM to the index once their transaction has committed."""
+    pending = session.info.pop(_PENDING_LOCATIONS, None)
+    if pending:
+        location_index.add_many(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_uncommitted_locations(session) -> None:
+    """Forgets the locations of a rolled-back transaction, so the index never holds rows that were not stored."""
+    session.info.pop(_PENDING_LOCATIONS, None)
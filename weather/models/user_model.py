@@ -1,17 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
+import hmac
 import logging
 import os
 
 from flask_login import UserMixin
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
 
 from weather.db import db
+from weather.utils.cache_utils import TTLCache
 from weather.utils.logger import configure_logger
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# PBKDF2-SHA256 cost and the size of the pool the hashing runs on
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "260000"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+
+# Recently verified credentials skip the KDF for this many seconds (0 disables)
+PASSWORD_VERIFY_CACHE_TTL = float(os.getenv("PASSWORD_VERIFY_CACHE_TTL", "300"))
+
+# Per-process cache of session users consulted by Flask-Login's user_loader
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "1024"))
+
+HASH_SCHEME = "pbkdf2_sha256"
+
+# hashlib releases the GIL while deriving, so a thread pool bounds CPU use without blocking other requests' I/O
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+# Maps (username, stored hash) to a keyed digest of the last password that verified against it
+_verify_cache = TTLCache(maxsize=1024, ttl=max(PASSWORD_VERIFY_CACHE_TTL, 0.0))
+_verify_key = os.urandom(32)
+
+# Maps username to a detached identity-only Users instance; each hit saves one query
+_user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL)
+
+
+def _derive(password: str, salt: str, iterations: int) -> str:
+    """Runs PBKDF2-SHA256 on the hashing pool and returns the hex digest."""
+    return _hash_executor.submit(
+        hashlib.pbkdf2_hmac, "sha256", password.encode(), bytes.fromhex(salt), iterations
+    ).result().hex()
+
+
+def _verify_token(password: str, stored: str) -> str:
+    """Keyed fingerprint of a password/stored-hash pair used by the verification cache."""
+    return hmac.new(_verify_key, f"{stored}:{password}".encode(), hashlib.sha256).hexdigest()
+
 
 class Users(db.Model, UserMixin):  
     """
@@ -23,12 +62,12 @@ class Users(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     salt = db.Column(db.String(32), nullable=False)  # 16-byte salt in hex
-    password = db.Column(db.String(64), nullable=False)  # SHA-256 hash in hex
+    password = db.Column(db.String(128), nullable=False)  # "pbkdf2_sha256$<iterations>$<hex>" or legacy SHA-256 hex
 
     @staticmethod
     def _generate_hashed_password(password: str) -> tuple[str, str]:
         """
-        Generate a random salt and hash the provided password.
+        Generate a random salt and hash the provided password with PBKDF2-SHA256.
 
         Args:
             password (str): Plain-text password to hash.
@@ -37,9 +76,36 @@ class Users(db.Model, UserMixin):
             tuple[str, str]: (salt, hashed_password)
         """
         salt = os.urandom(16).hex()
-        hashed = hashlib.sha256((password + salt).encode()).hexdigest()
+        iterations = PASSWORD_HASH_ITERATIONS
+        hashed = f"{HASH_SCHEME}${iterations}${_derive(password, salt, iterations)}"
         return salt, hashed
 
+    @staticmethod
+    def _verify_hash(password: str, salt: str, stored: str) -> bool:
+        """
+        Check a password against a stored PBKDF2 or legacy SHA-256 hash.
+
+        Args:
+            password (str): Plain-text password to verify.
+            salt (str): The user's salt in hex.
+            stored (str): The stored hash.
+
+        Returns:
+            bool: True if password matches, False otherwise.
+        """
+        if stored.startswith(f"{HASH_SCHEME}$"):
+            _, iterations, digest = stored.split("$", 2)
+            return hmac.compare_digest(_derive(password, salt, int(iterations)), digest)
+        legacy = hashlib.sha256((password + salt).encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored)
+
+    @staticmethod
+    def _needs_rehash(stored: str) -> bool:
+        """True for legacy SHA-256 hashes and PBKDF2 hashes below the configured cost."""
+        if not stored.startswith(f"{HASH_SCHEME}$"):
+            return True
+        return int(stored.split("$", 2)[1]) < PASSWORD_HASH_ITERATIONS
+
     @classmethod
     def create_user(cls, username: str, password: str) -> None:
         """
@@ -73,6 +139,10 @@ class Users(db.Model, UserMixin):
         """
         Verify a password against the stored hash for the given username.
 
+        Credentials verified within PASSWORD_VERIFY_CACHE_TTL seconds skip the KDF.
+        Legacy SHA-256 hashes and hashes below the configured cost are upgraded
+        on the next successful check.
+
         Args:
             username (str): Username to check.
             password (str): Plain-text password to verify.
@@ -87,8 +157,24 @@ class Users(db.Model, UserMixin):
         if not user:
             logger.info("User not found: %s", username)
             raise ValueError(f"User {username} not found")
-        hashed = hashlib.sha256((password + user.salt).encode()).hexdigest()
-        return hashed == user.password
+
+        cache_key = (username, user.password)
+        if PASSWORD_VERIFY_CACHE_TTL > 0:
+            cached = _verify_cache.get(cache_key)
+            if cached is not None and hmac.compare_digest(cached, _verify_token(password, user.password)):
+                return True
+
+        if not cls._verify_hash(password, user.salt, user.password):
+            return False
+
+        if cls._needs_rehash(user.password):
+            user.salt, user.password = cls._generate_hashed_password(password)
+            db.session.commit()
+            logger.info("Upgraded password hash for user: %s", username)
+
+        if PASSWORD_VERIFY_CACHE_TTL > 0:
+            _verify_cache.set((username, user.password), _verify_token(password, user.password))
+        return True
 
     @classmethod
     def delete_user(cls, username: str) -> None:
@@ -107,6 +193,7 @@ class Users(db.Model, UserMixin):
             raise ValueError(f"User {username} not found")
         db.session.delete(user)
         db.session.commit()
+        cls.invalidate_cached_user(username)
         logger.info("User deleted: %s", username)
 
     def get_id(self) -> str:
@@ -158,4 +245,59 @@ class Users(db.Model, UserMixin):
         user.salt = salt
         user.password = hashed_pw
         db.session.commit()
+        cls.invalidate_cached_user(username)
         logger.info("Password updated for user: %s", username)
+
+    ##########################################################
+    # Session User Cache
+    ##########################################################
+
+    @classmethod
+    def load_cached_user(cls, username: str) -> "Users | None":
+        """
+        Load a user for Flask-Login, skipping the database for recently seen users.
+
+        Only the id and username are cached. Other columns load lazily from the
+        database if they are accessed.
+
+        Args:
+            username (str): Username stored in the session.
+
+        Returns:
+            Users | None: The user attached to the current session, or None if not found.
+        """
+        cached = _user_cache.get(username)
+        if cached is not None:
+            return db.session.merge(cached, load=False)
+
+        user = cls.query.filter_by(username=username).first()
+        if user is not None:
+            identity = cls(id=user.id, username=user.username)
+            make_transient_to_detached(identity)
+            _user_cache.set(username, identity)
+        return user
+
+    @staticmethod
+    def invalidate_cached_user(username: str) -> None:
+        """
+        Drop a user from the session user cache.
+
+        Args:
+            username (str): Username to drop.
+        """
+        _user_cache.delete(username)
+
+    @staticmethod
+    def clear_user_cache() -> None:
+        """Drop every user from the session user cache."""
+        _user_cache.clear()
+
+    @staticmethod
+    def get_user_cache_stats() -> dict:
+        """
+        Return the session user cache counters. Each hit is a database query saved.
+
+        Returns:
+            dict: Cache counters and size.
+        """
+        return _user_cache.stats()
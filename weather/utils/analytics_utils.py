@@ -0,0 +1,209 @@
+from datetime import datetime
+import logging
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from weather.models.locations_model import Locations
+from weather.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# Default width, in calendar days, of the rolling daily-mean window
+ANALYTICS_ROLLING_DAYS = int(os.getenv("ANALYTICS_ROLLING_DAYS", "7"))
+PERCENTILES = (10, 50, 90)
+
+Location = Tuple[str, float, float]
+
+
+def _value(x) -> Optional[float]:
+    """Converts a NumPy scalar to a rounded float, or None if it is NaN."""
+    return None if np.isnan(x) else round(float(x), 2)
+
+
+def _values(array: np.ndarray) -> list:
+    return [_value(x) for x in array]
+
+
+def describe(values: np.ndarray) -> Dict[str, Optional[float]]:
+    """
+    Summarises one series, ignoring missing (NaN) readings.
+
+    Args:
+        values (np.ndarray): float64 readings.
+
+    Returns:
+        Dict[str, Optional[float]]: min, max, mean, std and the PERCENTILES, all None if
+            there are no readings.
+    """
+    finite = values[~np.isnan(values)]
+    keys = ["min", "max", "mean", "std"] + [f"p{p}" for p in PERCENTILES]
+    if finite.size == 0:
+        return dict.fromkeys(keys)
+    stats = [finite.min(), finite.max(), finite.mean(), finite.std(), *np.percentile(finite, PERCENTILES)]
+    return {key: _value(stat) for key, stat in zip(keys, stats)}
+
+
+def daily_means(days: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Averages readings per calendar day.
+
+    Args:
+        days (np.ndarray): Day offsets from the first day (int), one per reading.
+        values (np.ndarray): float64 readings.
+
+    Returns:
+        np.ndarray: One mean per day from 0 to days.max(); NaN for days without readings.
+    """
+    valid = ~np.isnan(values)
+    length = int(days.max()) + 1
+    sums = np.bincount(days[valid], weights=values[valid], minlength=length)
+    counts = np.bincount(days[valid], minlength=length)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean over the last window entries, skipping NaNs.
+
+    Args:
+        values (np.ndarray): float64 series.
+        window (int): Number of entries in each window.
+
+    Returns:
+        np.ndarray: Same length as values; NaN where a window has no readings.
+    """
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0))
+    counts = np.cumsum(valid)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def trend_per_day(elapsed_days: np.ndarray, values: np.ndarray) -> Optional[float]:
+    """
+    Least-squares slope of values against time, in units per day.
+
+    Returns:
+        Optional[float]: The slope, or None with fewer than two readings or no time spread.
+    """
+    valid = ~np.isnan(values)
+    x = elapsed_days[valid]
+    y = values[valid]
+    if x.size < 2:
+        return None
+    x = x - x.mean()
+    spread = np.dot(x, x)
+    if spread == 0:
+        return None
+    return round(float(np.dot(x, y - y.mean()) / spread), 4)
+
+
+def compute_stats(times: np.ndarray, temp: np.ndarray, feels_like: np.ndarray, humidity: np.ndarray,
+                  window: int = ANALYTICS_ROLLING_DAYS, include_daily: bool = False) -> dict:
+    """
+    Computes summary and daily statistics for one location's time-ordered history.
+
+    Args:
+        times (np.ndarray): datetime64[s] reading times, ascending.
+        temp (np.ndarray): float64 temperatures.
+        feels_like (np.ndarray): float64 feels-like temperatures.
+        humidity (np.ndarray): float64 humidity readings.
+        window (int): Rolling window, in calendar days, for the daily mean temperature.
+        include_daily (bool): Also return the per-day series.
+
+    Returns:
+        dict: samples, start, end, temp and feels_like summaries, humidity summary and
+            trend, and day-over-day temperature changes (plus the daily series if asked).
+    """
+    day_stamps = times.astype("datetime64[D]")
+    first_day = day_stamps[0]
+    days = (day_stamps - first_day).astype(np.int64)
+    elapsed_days = (times - times[0]).astype(np.float64) / 86400.0
+
+    temp_daily = daily_means(days, temp)
+    temp_deltas = np.diff(temp_daily)
+    temp_rolling = rolling_mean(temp_daily, window)
+    finite_deltas = temp_deltas[~np.isnan(temp_deltas)]
+
+    humidity_stats = describe(humidity)
+    stats = {
+        "samples": int(times.size),
+        "start": str(times[0]),
+        "end": str(times[-1]),
+        "temp": describe(temp),
+        "feels_like": describe(feels_like),
+        "humidity": {
+            "min": humidity_stats["min"],
+            "max": humidity_stats["max"],
+            "mean": humidity_stats["mean"],
+            "trend_per_day": trend_per_day(elapsed_days, humidity),
+        },
+        "day_over_day": {
+            "last_temp_mean_delta": _value(temp_deltas[-1]) if temp_deltas.size else None,
+            "max_rise": _value(finite_deltas.max()) if finite_deltas.size else None,
+            "max_drop": _value(finite_deltas.min()) if finite_deltas.size else None,
+            "mean_abs_change": _value(np.abs(finite_deltas).mean()) if finite_deltas.size else None,
+        },
+        "rolling_temp_mean": {
+            "window_days": window,
+            "last": _value(temp_rolling[-1]),
+        },
+    }
+    if include_daily:
+        calendar = first_day + np.arange(temp_daily.size)
+        stats["daily"] = {
+            "days": [str(day) for day in calendar],
+            "temp_mean": _values(temp_daily),
+            "feels_like_mean": _values(daily_means(days, feels_like)),
+            "humidity_mean": _values(daily_means(days, humidity)),
+            "temp_mean_delta": [None] + _values(temp_deltas),
+            "temp_rolling_mean": _values(temp_rolling),
+        }
+    return stats
+
+
+def get_location_stats(keys: Iterable[Location], start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       window: int = ANALYTICS_ROLLING_DAYS, include_daily: bool = False) -> Dict[Location, dict]:
+    """
+    Loads the history of many locations in one batched query and computes their statistics.
+
+    Each location's readings are converted to contiguous float64 / datetime64 arrays
+    once; every statistic is then computed with vectorized NumPy operations.
+
+    Args:
+        keys (Iterable[Location]): (city_name, latitude, longitude) compound keys.
+        start (datetime, optional): Inclusive lower bound on time (naive UTC).
+        end (datetime, optional): Exclusive upper bound on time (naive UTC).
+        window (int): Rolling window, in calendar days, for the daily mean temperature.
+        include_daily (bool): Also return the per-day series.
+
+    Returns:
+        Dict[Location, dict]: Statistics per key, as returned by compute_stats.
+            Keys without history are omitted.
+
+    Raises:
+        ValueError: If window is not positive.
+        SQLAlchemyError: If a database error occurs.
+    """
+    if window < 1:
+        raise ValueError("window must be a positive integer")
+
+    history = Locations.get_history_columns(keys, start=start, end=end)
+    logger.info(f"Computing statistics for {len(history)} locations")
+    results = {}
+    for key, columns in history.items():
+        results[key] = compute_stats(
+            np.array(columns["time"], dtype="datetime64[s]"),
+            np.array(columns["temp"], dtype=np.float64),
+            np.array(columns["feels_like"], dtype=np.float64),
+            np.array(columns["humidity"], dtype=np.float64),
+            window=window,
+            include_daily=include_daily,
+        )
+    return results
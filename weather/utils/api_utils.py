@@ -1,8 +1,21 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
 import logging
 import os
+import threading
+import time
+from typing import Callable, Hashable, Iterator, List, Optional, Tuple
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from weather.utils.logger import configure_logger
+from weather.utils.cache_utils import SingleFlight, TTLCache
+from weather.utils.geo_utils import location_key, quantize
+from weather.utils.logger import TruncatedPayload, configure_logger
+from weather.utils.resilience_utils import (CircuitBreaker, CircuitOpenError, RateLimitedError, TokenBucket,
+                                            UpstreamUnavailableError)
 
 # Base URL and API key pulled from .env
 WEATHER_API_BASE_URL = os.getenv(
@@ -10,35 +23,474 @@ WEATHER_API_BASE_URL = os.getenv(
     "https://api.openweathermap.org/data/2.5"
 )
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+GEOCODING_API_BASE_URL = os.getenv(
+    "GEOCODING_API_BASE_URL",
+    "https://api.openweathermap.org/geo/1.0"
+)
+
+# Current weather cache settings (seconds / entries)
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "300"))
+WEATHER_CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", "600"))
+WEATHER_CACHE_MAXSIZE = int(os.getenv("WEATHER_CACHE_MAXSIZE", "1024"))
+
+# Pooled HTTP client settings
+WEATHER_HTTP_POOL_SIZE = int(os.getenv("WEATHER_HTTP_POOL_SIZE", "20"))
+WEATHER_HTTP_RETRIES = int(os.getenv("WEATHER_HTTP_RETRIES", "2"))
+WEATHER_HTTP_BACKOFF = float(os.getenv("WEATHER_HTTP_BACKOFF", "0.3"))
+WEATHER_HTTP_TIMEOUT = float(os.getenv("WEATHER_HTTP_TIMEOUT", "5"))
+
+# Batch fan-out settings: shared pool size, per-request cap and deadline (seconds)
+WEATHER_BATCH_POOL_SIZE = int(os.getenv("WEATHER_BATCH_POOL_SIZE", "32"))
+WEATHER_BATCH_CONCURRENCY = int(os.getenv("WEATHER_BATCH_CONCURRENCY", "10"))
+WEATHER_BATCH_DEADLINE = float(os.getenv("WEATHER_BATCH_DEADLINE", "8"))
+
+# Circuit breaker: failure rate over the last WINDOW calls (after MIN_CALLS), slow-call threshold and open time (seconds)
+WEATHER_BREAKER_FAILURE_RATE = float(os.getenv("WEATHER_BREAKER_FAILURE_RATE", "0.5"))
+WEATHER_BREAKER_WINDOW = int(os.getenv("WEATHER_BREAKER_WINDOW", "20"))
+WEATHER_BREAKER_MIN_CALLS = int(os.getenv("WEATHER_BREAKER_MIN_CALLS", "5"))
+WEATHER_BREAKER_SLOW_CALL = float(os.getenv("WEATHER_BREAKER_SLOW_CALL", "2"))
+WEATHER_BREAKER_RESET_TIMEOUT = float(os.getenv("WEATHER_BREAKER_RESET_TIMEOUT", "30"))
+
+# Upstream call budget per process: the API plan's calls per minute, burst size and longest wait for a token (seconds).
+# Batch fetches and refresh cycles wait for a token until their own deadline instead.
+WEATHER_RATE_LIMIT_PER_MINUTE = float(os.getenv("WEATHER_RATE_LIMIT_PER_MINUTE", "60"))
+WEATHER_RATE_LIMIT_BURST = float(os.getenv("WEATHER_RATE_LIMIT_BURST", "10"))
+WEATHER_RATE_LIMIT_WAIT = float(os.getenv("WEATHER_RATE_LIMIT_WAIT", "1"))
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
-def get_current_weather(city: str, units: str = "metric") -> dict:
+class WeatherClient:
+    """
+    HTTP client for the weather API that owns a pooled, keep-alive requests.Session.
+
+    Connections are reused across calls and threads, so repeated upstream
+    requests skip the TCP/TLS handshake. Idempotent GETs are retried with
+    exponential backoff on connection errors and 5xx responses. Read timeouts
+    are not retried, so a slow upstream holds a worker for one timeout only,
+    and 429s are not retried, so a throttled API plan is not spent on retries.
+    """
+
+    def __init__(self,
+                 pool_size: int = WEATHER_HTTP_POOL_SIZE,
+                 retries: int = WEATHER_HTTP_RETRIES,
+                 backoff: float = WEATHER_HTTP_BACKOFF,
+                 timeout: float = WEATHER_HTTP_TIMEOUT):
+        """Initializes the client. The session itself is created lazily.
+
+        Args:
+            pool_size (int): Maximum number of pooled connections per host.
+            retries (int): Number of retries for failed idempotent requests.
+            backoff (float): Backoff factor between retries, in seconds.
+            timeout (float): Per-request timeout, in seconds.
+        """
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """Returns the shared session, creating it on first use."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self) -> requests.Session:
+        """Creates a session with pooled, retrying adapters mounted for http and https."""
+        retry = Retry(
+            total=self.retries,
+            read=0,
+            backoff_factor=self.backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.headers.update({"Connection": "keep-alive"})
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        logger.info(f"Created weather API session (pool size {self.pool_size}, retries {self.retries})")
+        return session
+
+    def get(self, url: str, params: dict) -> requests.Response:
+        """Issues a GET request over the pooled session.
+
+        Args:
+            url (str): Absolute URL to request.
+            params (dict): Query string parameters.
+
+        Returns:
+            requests.Response: The raw response.
+
+        Raises:
+            requests.exceptions.RequestException: On network errors.
+        """
+        return self.session.get(url, params=params, timeout=self.timeout)
+
+    def close(self) -> None:
+        """Closes the session and releases its pooled connections."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+# Shared by every upstream call in the process
+client = WeatherClient()
+
+# Bounded pool shared by all batch requests in the process
+_batch_executor = ThreadPoolExecutor(max_workers=WEATHER_BATCH_POOL_SIZE, thread_name_prefix="weather-batch")
+
+# Coalesces identical in-flight upstream calls, keyed by (endpoint, location, units, cnt)
+upstream_flight = SingleFlight()
+
+# Shared by every request in the process, keyed by (location, units)
+weather_cache = TTLCache(
+    maxsize=WEATHER_CACHE_MAXSIZE,
+    ttl=WEATHER_CACHE_TTL,
+    stale_ttl=WEATHER_CACHE_STALE_TTL,
+)
+
+# Guard every upstream call in the process
+breaker = CircuitBreaker(
+    failure_rate=WEATHER_BREAKER_FAILURE_RATE,
+    window=WEATHER_BREAKER_WINDOW,
+    min_calls=WEATHER_BREAKER_MIN_CALLS,
+    slow_call_seconds=WEATHER_BREAKER_SLOW_CALL,
+    reset_timeout=WEATHER_BREAKER_RESET_TIMEOUT,
+)
+rate_limiter = TokenBucket(rate=WEATHER_RATE_LIMIT_PER_MINUTE / 60, capacity=WEATHER_RATE_LIMIT_BURST)
+
+# time.monotonic() until which upstream calls in this context may wait for a rate limit token
+_upstream_deadline: ContextVar[Optional[float]] = ContextVar("upstream_deadline", default=None)
+
+
+@contextmanager
+def upstream_deadline(at: float) -> Iterator[None]:
+    """
+    Lets upstream calls made inside the block wait for a rate limit token until ``at``.
+
+    Batch callers use this so that, once the burst is spent, their fetches are
+    paced by the limiter up to the batch's own deadline rather than failing
+    after WEATHER_RATE_LIMIT_WAIT seconds. asyncio tasks created inside the
+    block inherit it.
+
+    Args:
+        at (float): Deadline on the time.monotonic() clock.
+    """
+    token = _upstream_deadline.set(at)
+    try:
+        yield
+    finally:
+        _upstream_deadline.reset(token)
+
+
+def rate_limit_wait() -> float:
+    """Returns how many seconds an upstream call made now may wait for a rate limit token."""
+    at = _upstream_deadline.get()
+    if at is None:
+        return WEATHER_RATE_LIMIT_WAIT
+    return max(0.0, at - time.monotonic())
+
+
+def _guarded_get(url: str, params: dict) -> requests.Response:
+    """
+    Issues an upstream GET through the circuit breaker and the rate limiter.
+
+    Transport errors, 5xx and 429 responses and slow calls count against the
+    breaker; a 429 also slows the rate limiter down. A call that fails in any
+    other way releases its breaker slot, so a half-open probe is never lost.
+
+    Raises:
+        CircuitOpenError: If the breaker is open; upstream is not contacted.
+        RateLimitedError: If no token became available within rate_limit_wait() seconds.
+        requests.exceptions.RequestException: On network errors.
+    """
+    if not breaker.allow():
+        raise CircuitOpenError("Weather API circuit breaker is open; upstream is failing or slow")
+    if not rate_limiter.acquire(rate_limit_wait()):
+        breaker.release()
+        raise RateLimitedError("Weather API rate limit reached")
+
+    started = time.monotonic()
+    recorded = False
+    try:
+        resp = client.get(url, params)
+        if resp.status_code == 429:
+            rate_limiter.penalize()
+        breaker.record(resp.status_code < 500 and resp.status_code != 429, time.monotonic() - started)
+        recorded = True
+        return resp
+    except requests.exceptions.RequestException:
+        breaker.record(False, time.monotonic() - started)
+        recorded = True
+        raise
+    finally:
+        if not recorded:
+            breaker.release()
+
+
+def _decode_json(resp: requests.Response, api: str):
+    """Returns the JSON-decoded body, raising RuntimeError like other upstream failures if it is not JSON."""
+    try:
+        return resp.json()
+    except ValueError as e:
+        logger.error(f"{api} API returned invalid JSON: {e}")
+        raise RuntimeError(f"{api} API returned invalid JSON: {e}")
+
+
+def _call_until(at: float, fn: Callable, *args):
+    """Calls fn(*args) with upstream_deadline(at); used to carry a batch deadline onto pool threads."""
+    with upstream_deadline(at):
+        return fn(*args)
+
+
+def serve_stale(key: tuple, error: UpstreamUnavailableError) -> dict:
+    """Returns the last cached payload for key, marked stale, or re-raises error if there is none."""
+    entry = weather_cache.peek(key)
+    if entry is None:
+        raise error
+    data, age = entry
+    logger.warning(f"Serving stale weather for {key[0]} ({age:.0f}s old): {error}")
+    return {**data, "stale": True, "stale_age_seconds": round(age)}
+
+
+def location_query(city: str, latitude: Optional[float], longitude: Optional[float]) -> Tuple[Hashable, dict]:
+    """
+    Returns the cache key and upstream query parameters for a location.
+
+    With coordinates the API is queried by lat/lon, so it does not have to
+    resolve the name and always answers for the same place. Without them it
+    falls back to the free-text city name.
+    """
+    if latitude is not None and longitude is not None:
+        latitude, longitude = quantize(latitude), quantize(longitude)
+        return (latitude, longitude), {"lat": latitude, "lon": longitude}
+    return city.strip().lower(), {"q": city}
+
+
+def get_current_weather(city: str, units: str = "metric",
+                        latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
+    """
+    Returns current weather data for the given location, served from the shared cache.
+
+    Fresh entries are returned without contacting the API. Stale entries are
+    returned immediately and refreshed in the background. While the circuit
+    breaker is open or the rate limit is exhausted, the last cached payload is
+    returned with "stale": True instead of waiting on upstream.
+
+    Args:
+        city (str): City name (e.g. "Boston,US").
+        units (str): Units of measurement. One of "standard", "metric", or "imperial".
+        latitude (float, optional): Query by coordinates instead of by name; requires longitude.
+        longitude (float, optional): Longitude of the location.
+
+    Returns:
+        dict: JSON-decoded response from the weather API.
+
+    Raises:
+        RuntimeError: On network errors or non-200 responses, or UpstreamUnavailableError if the
+            circuit breaker is open or the rate limit is exhausted.
+        ValueError: If the API returns unexpected data.
+    """
+    location, _ = location_query(city, latitude, longitude)
+    key = (location, units)
+    try:
+        return weather_cache.get_or_load(
+            key,
+            lambda: upstream_flight.do(("weather", *key, None),
+                                       lambda: fetch_current_weather(city, units, latitude=latitude, longitude=longitude)),
+        )
+    except UpstreamUnavailableError as e:
+        return serve_stale(key, e)
+
+
+def refresh_current_weather(city: str, units: str = "metric",
+                            latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
+    """
+    Fetches current weather for the given location upstream and stores it in the shared cache.
+
+    Args:
+        city (str): City name.
+        units (str): Units of measurement.
+        latitude (float, optional): Query by coordinates instead of by name; requires longitude.
+        longitude (float, optional): Longitude of the location.
+
+    Returns:
+        dict: JSON-decoded response from the weather API.
+
+    Raises:
+        RuntimeError: On network errors or non-200 responses, or UpstreamUnavailableError if the
+            circuit breaker is open or the rate limit is exhausted.
+        ValueError: If the API returns unexpected data.
+    """
+    location, _ = location_query(city, latitude, longitude)
+    key = (location, units)
+    data = upstream_flight.do(("weather", *key, None),
+                              lambda: fetch_current_weather(city, units, latitude=latitude, longitude=longitude))
+    weather_cache.set(key, data)
+    return data
+
+
+def evict_current_weather(city: str, units: str = "metric",
+                          latitude: Optional[float] = None, longitude: Optional[float] = None) -> None:
+    """
+    Removes the given location from the shared cache.
+
+    Args:
+        city (str): City name.
+        units (str): Units of measurement.
+        latitude (float, optional): Latitude the entry was cached under.
+        longitude (float, optional): Longitude the entry was cached under.
+    """
+    location, _ = location_query(city, latitude, longitude)
+    weather_cache.delete((location, units))
+
+
+def get_current_weather_many(locations: List[Tuple[str, float, float]],
+                             units: str = "metric",
+                             concurrency: int = WEATHER_BATCH_CONCURRENCY,
+                             deadline: float = WEATHER_BATCH_DEADLINE) -> List[dict]:
     """
-    Fetches current weather data for the given city.
+    Fetches current weather for many locations concurrently, by coordinates.
+
+    At most ``concurrency`` fetches from this call run at once on the shared
+    batch pool. A failure for one location is reported in its result instead
+    of failing the batch, and locations still pending when the deadline
+    passes are reported as timed out. Fetches wait for rate limit tokens up
+    to the deadline.
+
+    Args:
+        locations (List[Tuple[str, float, float]]): (city_name, latitude, longitude) tuples.
+        units (str): Units of measurement.
+        concurrency (int): Maximum number of in-flight fetches for this call.
+        deadline (float): Seconds to wait for the whole batch.
+
+    Returns:
+        List[dict]: One result per location, in input order, each with the location
+            fields, a "status" of "success" or "error", and "weather" or "error".
+            Coordinates are quantized with location_key, so near-identical inputs
+            report the same location.
+    """
+    locations = [location_key(*location) for location in locations]
+    results = [
+        {"city_name": city, "latitude": lat, "longitude": lon, "status": "error", "error": "Deadline exceeded"}
+        for city, lat, lon in locations
+    ]
+    if not locations:
+        return results
+
+    logger.info(f"Fetching current weather for {len(locations)} locations (concurrency {concurrency})")
+    end = time.monotonic() + deadline
+    pending_indexes = iter(range(len(locations)))
+    in_flight = {}
+
+    def submit_next() -> bool:
+        index = next(pending_indexes, None)
+        if index is None:
+            return False
+        city, latitude, longitude = locations[index]
+        future = _batch_executor.submit(_call_until, end, get_current_weather, city, units, latitude, longitude)
+        in_flight[future] = index
+        return True
+
+    for _ in range(max(1, concurrency)):
+        if not submit_next():
+            break
+
+    while in_flight:
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = in_flight.pop(future)
+            try:
+                results[index].update(status="success", weather=future.result())
+                results[index].pop("error")
+            except Exception as e:
+                logger.warning(f"Weather fetch failed for {locations[index][0]}: {e}")
+                results[index]["error"] = str(e)
+            submit_next()
+
+    for future in in_flight:
+        future.cancel()
+    if in_flight:
+        logger.warning(f"Batch deadline exceeded with {len(in_flight)} fetches still in flight")
+
+    return results
+
+
+def get_cache_stats() -> dict:
+    """
+    Returns the hit/miss/eviction counters of the current weather cache.
+
+    Returns:
+        dict: Cache counters and size.
+    """
+    return weather_cache.stats()
+
+
+def get_resilience_stats() -> dict:
+    """
+    Returns the circuit breaker state and the rate limiter counters.
+
+    Returns:
+        dict: Breaker and limiter counters.
+    """
+    return {"circuit_breaker": breaker.stats(), "rate_limiter": rate_limiter.stats()}
+
+
+def get_coalescing_stats() -> dict:
+    """
+    Returns how many upstream calls were executed and how many were coalesced.
+
+    Returns:
+        dict: Single-flight counters.
+    """
+    return upstream_flight.stats()
+
+
+def fetch_current_weather(city: str, units: str = "metric",
+                          latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
+    """
+    Fetches current weather data for the given location directly from the API.
 
     Args:
         city (str): City name (e.g. "Boston,US").
         units (str): Units of measurement. One of "standard", "metric", or "imperial".
+        latitude (float, optional): Query by coordinates instead of by name; requires longitude.
+        longitude (float, optional): Longitude of the location.
 
     Returns:
         dict: JSON-decoded response from the weather API.
 
     Raises:
-        RuntimeError: On network errors or non-200 responses.
+        RuntimeError: On network errors, non-200 responses or a body that is not JSON, or UpstreamUnavailableError if the
+            circuit breaker is open or the rate limit is exhausted.
         ValueError: If the API returns unexpected data.
     """
     if not WEATHER_API_KEY:
         raise RuntimeError("WEATHER_API_KEY is not set in environment")
 
     url = f"{WEATHER_API_BASE_URL}/weather"
-    params = {"q": city, "appid": WEATHER_API_KEY, "units": units}
+    _, query = location_query(city, latitude, longitude)
+    params = {**query, "appid": WEATHER_API_KEY, "units": units}
 
-    logger.info(f"Requesting current weather for {city} → {url} with {params}")
+    logger.info("Requesting current weather for %s %s → %s", city, query, url)
     try:
-        resp = requests.get(url, params=params, timeout=5)
+        resp = _guarded_get(url, params)
         resp.raise_for_status()
     except requests.exceptions.Timeout:
         logger.error("Weather API request timed out.")
@@ -47,40 +499,83 @@ def get_current_weather(city: str, units: str = "metric") -> dict:
         logger.error(f"Weather API request failed: {e}")
         raise RuntimeError(f"Weather API request failed: {e}")
 
-    data = resp.json()
-    if "weather" not in data or "main" not in data:
-        logger.error(f"Unexpected payload from weather API: {data}")
-        raise ValueError(f"Unexpected payload from weather API: {data}")
+    return check_weather_payload(_decode_json(resp, "Weather"))
+
 
-    logger.info(f"Received weather payload: {data}")
+def check_weather_payload(data: dict) -> dict:
+    """
+    Validates a current weather payload.
+
+    Returns:
+        dict: The payload, unchanged.
+
+    Raises:
+        ValueError: If the "weather" or "main" section is missing.
+    """
+    if not isinstance(data, dict) or "weather" not in data or "main" not in data:
+        payload = TruncatedPayload(data)
+        logger.error("Unexpected payload from weather API: %s", payload)
+        raise ValueError(f"Unexpected payload from weather API: {payload}")
+
+    logger.debug("Received weather payload: %s", TruncatedPayload(data))
     return data
 
 
-def get_forecast(city: str, cnt: int = 5, units: str = "metric") -> dict:
+def get_forecast(city: str, cnt: int = 5, units: str = "metric",
+                 latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
     """
-    Fetches forecast data for the given city.
+    Fetches forecast data for the given location, sharing identical in-flight requests.
 
     Args:
         city (str): City name.
         cnt (int): Number of forecast entries to return (e.g. 5 for 5 days/records).
         units (str): Units of measurement.
+        latitude (float, optional): Query by coordinates instead of by name; requires longitude.
+        longitude (float, optional): Longitude of the location.
 
     Returns:
         dict: JSON-decoded forecast from the weather API.
 
     Raises:
-        RuntimeError: On network errors or non-200 responses.
+        RuntimeError: On network errors or non-200 responses, or UpstreamUnavailableError if the
+            circuit breaker is open or the rate limit is exhausted.
+        ValueError: If the API returns unexpected data.
+    """
+    location, _ = location_query(city, latitude, longitude)
+    return upstream_flight.do(("forecast", location, units, cnt),
+                              lambda: fetch_forecast(city, cnt, units, latitude=latitude, longitude=longitude))
+
+
+def fetch_forecast(city: str, cnt: int = 5, units: str = "metric",
+                   latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
+    """
+    Fetches forecast data for the given location directly from the API.
+
+    Args:
+        city (str): City name.
+        cnt (int): Number of forecast entries to return (e.g. 5 for 5 days/records).
+        units (str): Units of measurement.
+        latitude (float, optional): Query by coordinates instead of by name; requires longitude.
+        longitude (float, optional): Longitude of the location.
+
+    Returns:
+        dict: JSON-decoded forecast from the weather API.
+
+    Raises:
+        RuntimeError: On network errors, non-200 responses or a body that is not JSON, or UpstreamUnavailableError if the
+            circuit breaker is open or the rate limit is exhausted.
         ValueError: If the API returns unexpected data.
     """
     if not WEATHER_API_KEY:
         raise RuntimeError("WEATHER_API_KEY is not set in environment")
 
     url = f"{WEATHER_API_BASE_URL}/forecast"
-    params = {"q": city, "cnt": cnt, "appid": WEATHER_API_KEY, "units": units}
+    _, query = location_query(city, latitude, longitude)
+    params = {**query, "cnt": cnt, "appid": WEATHER_API_KEY, "units": units}
 
-    logger.info(f"Requesting forecast for {city} → {url} with {params}")
+    logger.info("Requesting forecast for %s %s (cnt %s) → %s", city, query, cnt, url)
     try:
-        resp = requests.get(url, params=params, timeout=5)
+        resp = _guarded_get(url, params)
         resp.raise_for_status()
     except requests.exceptions.Timeout:
         logger.error("Forecast API request timed out.")
@@ -89,10 +584,66 @@ def get_forecast(city: str, cnt: int = 5, units: str = "metric") -> dict:
         logger.error(f"Forecast API request failed: {e}")
         raise RuntimeError(f"Forecast API request failed: {e}")
 
-    data = resp.json()
-    if "list" not in data:
-        logger.error(f"Unexpected payload from forecast API: {data}")
-        raise ValueError(f"Unexpected payload from forecast API: {data}")
+    return check_forecast_payload(_decode_json(resp, "Forecast"))
+
+
+def check_forecast_payload(data: dict) -> dict:
+    """
+    Validates a forecast payload.
+
+    Returns:
+        dict: The payload, unchanged.
+
+    Raises:
+        ValueError: If the "list" section is missing.
+    """
+    if not isinstance(data, dict) or "list" not in data:
+        payload = TruncatedPayload(data)
+        logger.error("Unexpected payload from forecast API: %s", payload)
+        raise ValueError(f"Unexpected payload from forecast API: {payload}")
 
-    logger.info(f"Received forecast payload: {data}")
+    logger.debug("Received forecast payload: %s", TruncatedPayload(data))
     return data
+
+
+def fetch_geocode(city: str) -> Optional[dict]:
+    """
+    Resolves a city name to coordinates with the OpenWeatherMap direct geocoding API.
+
+    Args:
+        city (str): City name, optionally with state and country code (e.g. "Boston,MA,US").
+
+    Returns:
+        Optional[dict]: The best match, with "name", "lat", "lon" and, when known,
+            "country" and "state"; None if the name did not match any place.
+
+    Raises:
+        RuntimeError: On network errors, non-200 responses or a body that is not JSON, or UpstreamUnavailableError if the
+            circuit breaker is open or the rate limit is exhausted.
+        ValueError: If the API returns unexpected data.
+    """
+    if not WEATHER_API_KEY:
+        raise RuntimeError("WEATHER_API_KEY is not set in environment")
+
+    url = f"{GEOCODING_API_BASE_URL}/direct"
+    params = {"q": city, "limit": 1, "appid": WEATHER_API_KEY}
+
+    logger.info("Requesting coordinates for %s → %s", city, url)
+    try:
+        resp = _guarded_get(url, params)
+        resp.raise_for_status()
+    except requests.exceptions.Timeout:
+        logger.error("Geocoding API request timed out.")
+        raise RuntimeError("Geocoding API request timed out.")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Geocoding API request failed: {e}")
+        raise RuntimeError(f"Geocoding API request failed: {e}")
+
+    data = _decode_json(resp, "Geocoding")
+    if not isinstance(data, list) or any("lat" not in match or "lon" not in match for match in data):
+        payload = TruncatedPayload(data)
+        logger.error("Unexpected payload from geocoding API: %s", payload)
+        raise ValueError(f"Unexpected payload from geocoding API: {payload}")
+
+    logger.debug("Received geocoding payload: %s", TruncatedPayload(data))
+    return data[0] if data else None
@@ -0,0 +1,324 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import aiohttp
+
+from weather.utils import api_utils
+from weather.utils.geo_utils import location_key
+from weather.utils.logger import configure_logger
+from weather.utils.resilience_utils import CircuitOpenError, RateLimitedError, UpstreamUnavailableError
+
+# Fetches in flight at once per client, and pooled connections kept open to the API host
+WEATHER_ASYNC_CONCURRENCY = int(os.getenv("WEATHER_ASYNC_CONCURRENCY", "100"))
+WEATHER_ASYNC_POOL_SIZE = int(os.getenv("WEATHER_ASYNC_POOL_SIZE", "100"))
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class AsyncWeatherClient:
+    """
+    asyncio client for the weather API, for fanning out to many locations from one thread.
+
+    It shares the synchronous client's settings and state: the base URLs and
+    key, payload validation, the current weather cache, the circuit breaker
+    and the rate limiter. One aiohttp session (and its keep-alive connection
+    pool) is reused for every call until the client is closed, a semaphore
+    bounds the calls in flight, and every call has its own timeout. Identical
+    concurrent calls on the same client share one upstream request, and stale
+    cache entries are served while a task on the loop refreshes them.
+
+    Use it as an async context manager, on a single event loop:
+
+        async with AsyncWeatherClient(concurrency=200) as client:
+            results = await client.get_current_weather_many(locations)
+    """
+
+    def __init__(self,
+                 concurrency: int = WEATHER_ASYNC_CONCURRENCY,
+                 pool_size: int = WEATHER_ASYNC_POOL_SIZE,
+                 timeout: float = api_utils.WEATHER_HTTP_TIMEOUT):
+        """Initializes the client. The session itself is created on first use.
+
+        Args:
+            concurrency (int): Maximum number of upstream calls in flight.
+            pool_size (int): Maximum number of pooled connections.
+            timeout (float): Per-call timeout, in seconds.
+        """
+        self.concurrency = concurrency
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._background: Set[asyncio.Future] = set()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Returns the shared session, creating it on first use. Must be called on the event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector, headers={"Connection": "keep-alive"})
+            logger.info(f"Created async weather API session (pool size {self.pool_size}, "
+                        f"concurrency {self.concurrency})")
+        return self._session
+
+    async def close(self) -> None:
+        """Cancels unfinished background refreshes, then closes the session and releases its pooled connections."""
+        for task in list(self._background):
+            task.cancel()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncWeatherClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    ##################################################
+    # Upstream Calls
+    ##################################################
+
+    async def _acquire_token(self) -> bool:
+        """Takes a rate limit token, sleeping on the loop for up to api_utils.rate_limit_wait() seconds."""
+        limiter = api_utils.rate_limiter
+        deadline = time.monotonic() + api_utils.rate_limit_wait()
+        while not limiter.try_acquire():
+            wait = limiter.wait_time()
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+        return True
+
+    async def _get_json(self, url: str, params: dict, api: str):
+        """
+        Issues a GET through the semaphore, the circuit breaker and the rate limiter.
+
+        Args:
+            url (str): Absolute URL to request.
+            params (dict): Query string parameters.
+            api (str): "Weather" or "Forecast", used in error messages.
+
+        Returns:
+            The JSON-decoded body.
+
+        Raises:
+            CircuitOpenError: If the breaker is open; upstream is not contacted.
+            RateLimitedError: If no token became available in time.
+            RuntimeError: On network errors, timeouts, non-200 responses or a body that is not JSON.
+        """
+        async with self._semaphore:
+            breaker = api_utils.breaker
+            if not breaker.allow():
+                raise CircuitOpenError("Weather API circuit breaker is open; upstream is failing or slow")
+            if not await self._acquire_token():
+                breaker.release()
+                raise RateLimitedError("Weather API rate limit reached")
+
+            started = time.monotonic()
+            recorded = False
+            try:
+                async with self.session.get(url, params=params,
+                                            timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
+                    status = resp.status
+                    if status == 429:
+                        api_utils.rate_limiter.penalize()
+                    breaker.record(status < 500 and status != 429, time.monotonic() - started)
+                    recorded = True
+                    resp.raise_for_status()
+                    try:
+                        return await resp.json(content_type=None)
+                    except ValueError as e:
+                        logger.error(f"{api} API returned invalid JSON: {e}")
+                        raise RuntimeError(f"{api} API returned invalid JSON: {e}")
+            except asyncio.TimeoutError:
+                if not recorded:
+                    breaker.record(False, time.monotonic() - started)
+                    recorded = True
+                logger.error(f"{api} API request timed out.")
+                raise RuntimeError(f"{api} API request timed out.")
+            except aiohttp.ClientResponseError as e:
+                logger.error(f"{api} API request failed: {e.status} {e.message}")
+                raise RuntimeError(f"{api} API request failed: {e.status} {e.message}")
+            except aiohttp.ClientError as e:
+                if not recorded:
+                    breaker.record(False, time.monotonic() - started)
+                    recorded = True
+                logger.error(f"{api} API request failed: {e}")
+                raise RuntimeError(f"{api} API request failed: {e}")
+            finally:
+                # Cancelled by a batch deadline or failed some other way: free a half-open probe slot
+                if not recorded:
+                    breaker.release()
+
+    async def _shared(self, key: Hashable, coro_fn):
+        """Runs coro_fn once for concurrent callers with the same key and gives each the result."""
+        future = self._in_flight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(coro_fn())
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Retrieve the outcome even if every waiter was cancelled, so it is not reported as unhandled
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return await asyncio.shield(future)
+
+    async def fetch_current_weather(self, city: str, units: str = "metric",
+                                    latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
+        """
+        Fetches current weather for a location directly from the API; see api_utils.fetch_current_weather.
+
+        Raises:
+            RuntimeError: On network errors, timeouts or non-200 responses, or UpstreamUnavailableError if the
+                circuit breaker is open or the rate limit is exhausted.
+            ValueError: If the API returns unexpected data.
+        """
+        if not api_utils.WEATHER_API_KEY:
+            raise RuntimeError("WEATHER_API_KEY is not set in environment")
+        _, query = api_utils.location_query(city, latitude, longitude)
+        params = {**query, "appid": api_utils.WEATHER_API_KEY, "units": units}
+        logger.info(f"Requesting current weather for {city} {query} (async)")
+        data = await self._get_json(f"{api_utils.WEATHER_API_BASE_URL}/weather", params, "Weather")
+        return api_utils.check_weather_payload(data)
+
+    async def fetch_forecast(self, city: str, cnt: int = 5, units: str = "metric",
+                             latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
+        """
+        Fetches a forecast for a location directly from the API; see api_utils.fetch_forecast.
+
+        Raises:
+            RuntimeError: On network errors, timeouts or non-200 responses, or UpstreamUnavailableError if the
+                circuit breaker is open or the rate limit is exhausted.
+            ValueError: If the API returns unexpected data.
+        """
+        if not api_utils.WEATHER_API_KEY:
+            raise RuntimeError("WEATHER_API_KEY is not set in environment")
+        _, query = api_utils.location_query(city, latitude, longitude)
+        params = {**query, "cnt": cnt, "appid": api_utils.WEATHER_API_KEY, "units": units}
+        logger.info(f"Requesting forecast for {city} {query} (cnt {cnt}, async)")
+        data = await self._get_json(f"{api_utils.WEATHER_API_BASE_URL}/forecast", params, "Forecast")
+        return api_utils.check_forecast_payload(data)
+
+    ##################################################
+    # Cached Lookups
+    ##################################################
+
+    async def get_current_weather(self, city: str, units: str = "metric",
+                                  latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
+        """
+        Returns current weather for a location from the shared cache, fetching it on a miss.
+
+        As in api_utils.get_current_weather, fresh entries are returned without
+        contacting the API, and stale entries are returned immediately while a
+        task on the loop refreshes them. While upstream calls are refused, the
+        last cached payload is returned with "stale": True.
+
+        Raises:
+            RuntimeError: On network errors, timeouts or non-200 responses, or UpstreamUnavailableError
+                if upstream calls are refused and nothing is cached.
+            ValueError: If the API returns unexpected data.
+        """
+        location, _ = api_utils.location_query(city, latitude, longitude)
+        key = (location, units)
+        cache = api_utils.weather_cache
+        entry = cache.peek(key)
+        if entry is not None:
+            data, age = entry
+            if age <= cache.ttl:
+                return data
+            if age <= cache.ttl + cache.stale_ttl:
+                self._refresh_in_background(city, units, latitude, longitude)
+                return data
+        try:
+            return await self.refresh_current_weather(city, units, latitude, longitude)
+        except UpstreamUnavailableError as e:
+            return api_utils.serve_stale(key, e)
+
+    async def refresh_current_weather(self, city: str, units: str = "metric",
+                                      latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
+        """Fetches current weather for a location upstream and stores it in the shared cache."""
+        location, _ = api_utils.location_query(city, latitude, longitude)
+        key = (location, units)
+
+        async def load() -> dict:
+            data = await self.fetch_current_weather(city, units, latitude, longitude)
+            api_utils.weather_cache.set(key, data)
+            return data
+
+        return await self._shared(("weather", *key, None), load)
+
+    def _refresh_in_background(self, city: str, units: str,
+                               latitude: Optional[float], longitude: Optional[float]) -> None:
+        """Starts refresh_current_weather without waiting for it; a failure keeps the stale entry."""
+        task = asyncio.ensure_future(self.refresh_current_weather(city, units, latitude, longitude))
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Future) -> None:
+        """Forgets a finished background refresh and logs its failure."""
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background refresh of current weather failed: {task.exception()}")
+
+    async def get_forecast(self, city: str, cnt: int = 5, units: str = "metric",
+                           latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
+        """Fetches a forecast for a location, sharing identical in-flight requests."""
+        location, _ = api_utils.location_query(city, latitude, longitude)
+        return await self._shared(("forecast", location, units, cnt),
+                                  lambda: self.fetch_forecast(city, cnt, units, latitude, longitude))
+
+    async def get_current_weather_many(self, locations: List[Tuple[str, float, float]], units: str = "metric",
+                                       deadline: float = api_utils.WEATHER_BATCH_DEADLINE) -> List[dict]:
+        """
+        Fetches current weather for many locations concurrently, by coordinates.
+
+        Returns the same results as api_utils.get_current_weather_many: one per
+        location, in input order, with a "status" of "success" or "error".
+        Locations still pending when the deadline passes are reported as timed out.
+
+        Args:
+            locations (List[Tuple[str, float, float]]): (city_name, latitude, longitude) tuples.
+            units (str): Units of measurement.
+            deadline (float): Seconds to wait for the whole batch.
+
+        Returns:
+            List[dict]: One result per location.
+        """
+        locations = [location_key(*location) for location in locations]
+        results = [
+            {"city_name": city, "latitude": lat, "longitude": lon, "status": "error", "error": "Deadline exceeded"}
+            for city, lat, lon in locations
+        ]
+        if not locations:
+            return results
+
+        logger.info(f"Fetching current weather for {len(locations)} locations (async, concurrency {self.concurrency})")
+        # Tasks inherit the deadline, so they wait for rate limit tokens until the batch gives up on them
+        with api_utils.upstream_deadline(time.monotonic() + deadline):
+            tasks = [asyncio.ensure_future(self.get_current_weather(city, units, lat, lon))
+                     for city, lat, lon in locations]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"Batch deadline exceeded with {len(pending)} fetches still in flight")
+
+        for index, task in enumerate(tasks):
+            if task not in done:
+                continue
+            error = task.exception()
+            if error is None:
+                results[index].update(status="success", weather=task.result())
+                results[index].pop("error")
+            else:
+                logger.warning(f"Weather fetch failed for {locations[index][0]}: {error}")
+                results[index]["error"] = str(error)
+        return results
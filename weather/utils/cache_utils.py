@@ -0,0 +1,283 @@
+from collections import OrderedDict
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from weather.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class TTLCache:
+    """
+    A thread-safe, bounded LRU cache whose entries expire after a TTL.
+
+    Entries older than ``ttl`` but younger than ``ttl + stale_ttl`` are still
+    served (stale-while-revalidate) while a background thread refreshes them.
+    Entries older than that are treated as a miss.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0, stale_ttl: float = 0.0):
+        """Initializes the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries held before LRU eviction.
+            ttl (float): Seconds an entry is considered fresh.
+            stale_ttl (float): Extra seconds a stale entry may be served while it is refreshed.
+
+        Raises:
+            ValueError: If maxsize is not positive or a TTL is negative.
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer")
+        if ttl < 0 or stale_ttl < 0:
+            raise ValueError("ttl and stale_ttl must be non-negative")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    ##################################################
+    # Basic Operations
+    ##################################################
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the fresh value for key, or default if it is missing or expired.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any): Value returned on a miss.
+
+        Returns:
+            Any: The cached value or default.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores value under key, evicting the least recently used entry if full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self.evictions += 1
+                logger.debug(f"Evicted cache entry {evicted}")
+
+    def peek(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Returns the value for key and its age in seconds, even if expired, without counting a hit or miss.
+
+        Expired entries stay in the cache until they are evicted or replaced, so
+        this is the last known value, for use when it cannot be reloaded.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Optional[Tuple[Any, float]]: (value, age) or None if the key was never cached or was evicted.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            return entry[1], time.monotonic() - entry[0]
+
+    def delete(self, key: Hashable) -> None:
+        """Removes key from the cache if present.
+
+        Args:
+            key (Hashable): The cache key.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            self._data.clear()
+            self._refreshing.clear()
+            self.hits = self.stale_hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    ##################################################
+    # Stale-While-Revalidate
+    ##################################################
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value for key, loading it on a miss.
+
+        A fresh entry is returned directly. A stale entry (within ``stale_ttl``)
+        is returned immediately and refreshed by a background thread. Anything
+        else calls loader synchronously and caches its result.
+
+        Args:
+            key (Hashable): The cache key.
+            loader (Callable[[], Any]): Zero-argument function producing the value.
+
+        Returns:
+            Any: The cached or freshly loaded value.
+
+        Raises:
+            Exception: Whatever loader raises on a synchronous load.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age <= self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                if age <= self.ttl + self.stale_ttl:
+                    self._data.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(
+                            target=self._refresh, args=(key, loader), daemon=True
+                        ).start()
+                    return entry[1]
+            self.misses += 1
+
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        """Reloads key in the background, keeping the stale value on failure."""
+        try:
+            self.set(key, loader())
+            logger.debug(f"Refreshed stale cache entry {key}")
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    ##################################################
+    # Metrics
+    ##################################################
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss/eviction counters and current size.
+
+        Returns:
+            Dict[str, int]: Counters suitable for sizing the cache.
+        """
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class _Call:
+    """An in-flight call whose result is shared with every waiting caller."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for it and receive the same result or exception.
+    """
+
+    def __init__(self):
+        """Initializes an empty registry of in-flight calls."""
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Runs fn once for all concurrent callers sharing key.
+
+        Args:
+            key (Hashable): Identifies identical requests.
+            fn (Callable[[], Any]): Zero-argument function to execute.
+
+        Returns:
+            Any: The result of the shared execution.
+
+        Raises:
+            Exception: Whatever the shared execution raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            logger.debug(f"Coalesced call for {key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns how many calls executed and how many were coalesced onto them.
+
+        Returns:
+            Dict[str, int]: Execution, coalesced and in-flight counts.
+        """
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+    def reset(self) -> None:
+        """Resets the counters. In-flight calls are left untouched."""
+        with self._lock:
+            self.executions = self.coalesced = 0
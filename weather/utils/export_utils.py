@@ -0,0 +1,95 @@
+import csv
+from datetime import datetime
+import io
+import json
+from typing import Iterable, Iterator, Sequence
+
+# Serialized rows are joined into chunks of roughly this many bytes before being written
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _chunked(lines: Iterable[str], chunk_bytes: int) -> Iterator[str]:
+    """Joins lines into chunks of about chunk_bytes so each write carries many rows."""
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def to_ndjson(rows: Iterable[dict], chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[str]:
+    """Serializes rows as newline-delimited JSON, one object per line.
+
+    Args:
+        rows (Iterable[dict]): Rows to serialize; consumed lazily.
+        chunk_bytes (int): Approximate size of each yielded chunk.
+
+    Yields:
+        str: Chunks of complete lines.
+    """
+    lines = (json.dumps({key: _serialize(value) for key, value in row.items()}) + "\n" for row in rows)
+    return _chunked(lines, chunk_bytes)
+
+
+def to_csv(rows: Iterable[dict], columns: Sequence[str], chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[str]:
+    """Serializes rows as CSV with a header line.
+
+    Args:
+        rows (Iterable[dict]): Rows to serialize; consumed lazily.
+        columns (Sequence[str]): Column names, in output order.
+        chunk_bytes (int): Approximate size of each yielded chunk.
+
+    Yields:
+        str: Chunks of complete lines.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def lines():
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([_serialize(row[column]) for column in columns])
+            if buffer.tell() >= chunk_bytes:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return lines()
+
+
+def serialize(rows: Iterable[dict], fmt: str, columns: Sequence[str]) -> Iterator[str]:
+    """Serializes rows in one of EXPORT_FORMATS.
+
+    Args:
+        rows (Iterable[dict]): Rows to serialize; consumed lazily.
+        fmt (str): "ndjson" or "csv".
+        columns (Sequence[str]): Column names, in output order (used by CSV).
+
+    Yields:
+        str: Chunks of complete lines.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if fmt == "ndjson":
+        return to_ndjson(rows)
+    if fmt == "csv":
+        return to_csv(rows, columns)
+    raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
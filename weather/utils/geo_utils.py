@@ -0,0 +1,230 @@
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from weather.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Decimal places kept in every stored and looked-up coordinate (4 is about 11 m); empty disables quantization
+_precision = os.getenv("COORD_PRECISION", "4").strip()
+COORD_PRECISION: Optional[int] = int(_precision) if _precision else None
+
+Location = Tuple[str, float, float]
+Cell = Tuple[int, int]
+
+
+def quantize(value: float, precision: Optional[int] = None) -> float:
+    """
+    Rounds a coordinate to COORD_PRECISION (or the given) decimal places.
+
+    Args:
+        value (float): Latitude or longitude in degrees.
+        precision (int, optional): Decimal places; defaults to COORD_PRECISION.
+
+    Returns:
+        float: The quantized coordinate, always a float and never -0.0.
+    """
+    precision = COORD_PRECISION if precision is None else precision
+    if precision is None:
+        return float(value)
+    return round(float(value), precision) + 0.0
+
+
+def location_key(city_name: str, latitude: float, longitude: float) -> Location:
+    """
+    Normalizes a (city_name, latitude, longitude) key the way every cache and table stores it.
+
+    Nearby lookups such as 40.7128 and 40.71281 share one key, so they hit the
+    same cache entries and the same weather_data location.
+
+    Returns:
+        Location: (stripped city_name, quantized latitude, quantized longitude).
+    """
+    return city_name.strip(), quantize(latitude), quantize(longitude)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points, in kilometres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    A thread-safe grid-bucket index of (city_name, latitude, longitude) locations.
+
+    Locations are bucketed into cells of cell_degrees × cell_degrees. A radius
+    query only measures the locations in the cells the radius can reach, so its
+    cost depends on local density rather than on the total number of locations.
+    Cells wrap around the antimeridian.
+    """
+
+    def __init__(self, cell_degrees: float = 0.05):
+        """Initializes an empty index.
+
+        Args:
+            cell_degrees (float): Width and height of a grid cell, in degrees.
+
+        Raises:
+            ValueError: If cell_degrees is not in (0, 180].
+        """
+        if not 0 < cell_degrees <= 180:
+            raise ValueError("cell_degrees must be in (0, 180]")
+        self.cell_degrees = cell_degrees
+        self._columns = math.ceil(360 / cell_degrees)
+        self._cells: Dict[Cell, Dict[Location, None]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.built_at: Optional[float] = None
+
+    def _cell(self, latitude: float, longitude: float) -> Cell:
+        row = math.floor((latitude + 90) / self.cell_degrees)
+        column = math.floor((longitude + 180) / self.cell_degrees) % self._columns
+        return row, column
+
+    ##################################################
+    # Updates
+    ##################################################
+
+    def add(self, location: Location) -> None:
+        """Adds a location; adding one that is already indexed does nothing."""
+        cell = self._cell(location[1], location[2])
+        with self._lock:
+            bucket = self._cells.setdefault(cell, {})
+            if location not in bucket:
+                bucket[location] = None
+                self._size += 1
+
+    def add_many(self, locations: Iterable[Location]) -> None:
+        """Adds several locations."""
+        for location in locations:
+            self.add(location)
+
+    def discard(self, location: Location) -> None:
+        """Removes a location if it is indexed."""
+        cell = self._cell(location[1], location[2])
+        with self._lock:
+            bucket = self._cells.get(cell)
+            if bucket is not None and location in bucket:
+                del bucket[location]
+                self._size -= 1
+                if not bucket:
+                    del self._cells[cell]
+
+    def replace(self, locations: Iterable[Location]) -> None:
+        """Replaces the whole index with the given locations and marks it as built now."""
+        cells: Dict[Cell, Dict[Location, None]] = {}
+        for location in locations:
+            cells.setdefault(self._cell(location[1], location[2]), {})[location] = None
+        with self._lock:
+            self._cells = cells
+            self._size = sum(len(bucket) for bucket in cells.values())
+            self.built_at = time.monotonic()
+        logger.info(f"Location index rebuilt with {self._size} locations")
+
+    def clear(self) -> None:
+        """Empties the index and marks it as not built."""
+        with self._lock:
+            self._cells = {}
+            self._size = 0
+            self.built_at = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    ##################################################
+    # Queries
+    ##################################################
+
+    def _candidates(self, latitude: float, longitude: float, radius_km: float) -> List[Location]:
+        """Returns the locations in every cell the radius around the point can reach."""
+        radius_degrees = radius_km / KM_PER_DEGREE
+        row, column = self._cell(latitude, longitude)
+        rows = math.ceil(radius_degrees / self.cell_degrees)
+
+        # A degree of longitude shrinks with cos(latitude); widen the search at the band's highest latitude
+        highest = min(90.0, abs(latitude) + radius_degrees)
+        cos_highest = math.cos(math.radians(highest))
+        if cos_highest < 1e-9:
+            columns = range(self._columns)
+        else:
+            span = math.ceil(radius_degrees / cos_highest / self.cell_degrees)
+            if 2 * span + 1 >= self._columns:
+                columns = range(self._columns)
+            else:
+                columns = [(column + offset) % self._columns for offset in range(-span, span + 1)]
+
+        candidates = []
+        with self._lock:
+            cells = self._cells
+            for r in range(row - rows, row + rows + 1):
+                for c in columns:
+                    bucket = cells.get((r, c))
+                    if bucket:
+                        candidates.extend(bucket)
+        return candidates
+
+    def _in_box(self, latitude: float, longitude: float, radius_km: float,
+                city_name: Optional[str]) -> Iterable[Location]:
+        """Yields candidates inside the radius' bounding box, a cheap filter ahead of the exact distance."""
+        radius_degrees = radius_km / KM_PER_DEGREE
+        cos_highest = math.cos(math.radians(min(90.0, abs(latitude) + radius_degrees)))
+        lon_degrees = radius_degrees / cos_highest if cos_highest > 1e-9 else 360.0
+        for location in self._candidates(latitude, longitude, radius_km):
+            if abs(location[1] - latitude) > radius_degrees:
+                continue
+            delta = abs(location[2] - longitude)
+            if min(delta, 360 - delta) > lon_degrees:
+                continue
+            if city_name is not None and location[0] != city_name:
+                continue
+            yield location
+
+    def within(self, latitude: float, longitude: float, radius_km: float,
+               city_name: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[Location, float]]:
+        """
+        Finds the indexed locations within a radius of a point, nearest first.
+
+        Args:
+            latitude (float): Latitude of the point.
+            longitude (float): Longitude of the point.
+            radius_km (float): Search radius in kilometres.
+            city_name (str, optional): Only match locations with this city name.
+            limit (int, optional): Maximum number of matches returned.
+
+        Returns:
+            List[Tuple[Location, float]]: (location, distance_km) pairs, ascending by distance.
+        """
+        matches = []
+        for location in self._in_box(latitude, longitude, radius_km, city_name):
+            distance = haversine_km(latitude, longitude, location[1], location[2])
+            if distance <= radius_km:
+                matches.append((location, distance))
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches[:limit] if limit is not None else matches
+
+    def nearest(self, latitude: float, longitude: float, radius_km: float,
+                city_name: Optional[str] = None) -> Optional[Tuple[Location, float]]:
+        """
+        Finds the indexed location closest to a point, within a radius.
+
+        Returns:
+            Optional[Tuple[Location, float]]: (location, distance_km), or None if nothing is in range.
+        """
+        best = None
+        for location in self._in_box(latitude, longitude, radius_km, city_name):
+            distance = haversine_km(latitude, longitude, location[1], location[2])
+            if distance <= radius_km and (best is None or (distance, location) < (best[1], best[0])):
+                best = (location, distance)
+        return best
@@ -1,27 +1,102 @@
+import atexit
+from datetime import datetime, timezone
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
 
-from flask import current_app, has_request_context
+from flask.logging import default_handler
 
+# Level per environment: LOG_LEVEL wins, otherwise DEBUG in development and INFO elsewhere
+APP_ENV = os.getenv("APP_ENV", os.getenv("FLASK_ENV", "production")).lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if APP_ENV == "development" else "INFO").upper()
+# "text" or "json" (one JSON object per line)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Upstream payloads are cut to this many characters when logged
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500"))
 
-def configure_logger(logger):
-    logger.setLevel(logging.DEBUG)
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class TruncatedPayload:
+    """Defers rendering a payload for logging until a handler actually emits it, then truncates it."""
+
+    def __init__(self, payload, limit: int = None):
+        self.payload = payload
+        self.limit = LOG_PAYLOAD_MAX_CHARS if limit is None else limit
+
+    def __str__(self) -> str:
+        text = json.dumps(self.payload, default=str) if isinstance(self.payload, (dict, list)) else str(self.payload)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... ({len(text) - self.limit} more chars)"
 
-    # Create a console handler that logs to stderr
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
 
-    # Create a formatter with a timestamp
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+def setup_logging() -> None:
+    """Route all logging through a single queue drained by a background listener.
 
-    # Add the formatter to the handler
-    handler.setFormatter(formatter)
+    Safe to call any number of times; only the first call installs the handlers.
+    Request threads only enqueue records; formatting and writing to stderr happen
+    on the listener thread.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
 
-    # Add the handler to the logger
-    logger.addHandler(handler)
+        if LOG_FORMAT == "json":
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        root.setLevel(LOG_LEVEL)
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def configure_logger(logger):
+    """Prepare a module or Flask logger to log through the shared queue.
 
-    # We also need to add the handler to the Flask logger
-    if has_request_context():
-        app_logger = current_app.logger
-        for handler in app_logger.handlers:
-            logger.addHandler(handler)
\ No newline at end of file
+    Records propagate to the root logger's queue handler, so no handler is
+    attached here and calling this repeatedly does not duplicate output.
+    """
+    setup_logging()
+    logger.setLevel(LOG_LEVEL)
+    # Flask installs its own stderr handler on app.logger; drop it so lines are written once
+    logger.removeHandler(default_handler)
@@ -0,0 +1,280 @@
+from collections import deque
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from weather.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class UpstreamUnavailableError(RuntimeError):
+    """Raised instead of calling upstream when a guard refuses the call."""
+
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """Raised when the circuit breaker is open and the call was not attempted."""
+
+
+class RateLimitedError(UpstreamUnavailableError):
+    """Raised when no rate limit token became available in time."""
+
+
+class CircuitBreaker:
+    """
+    A thread-safe, count-based circuit breaker.
+
+    The outcomes of the last ``window`` calls are kept; a call fails if it
+    raised, returned a server error, or took longer than ``slow_call_seconds``.
+    Once at least ``min_calls`` outcomes are recorded and the failure rate
+    reaches ``failure_rate``, the breaker opens and refuses calls for
+    ``reset_timeout`` seconds. It then lets ``half_open_calls`` probes through:
+    if they all succeed it closes again, and any failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 failure_rate: float = 0.5,
+                 window: int = 20,
+                 min_calls: int = 5,
+                 slow_call_seconds: float = 2.0,
+                 reset_timeout: float = 30.0,
+                 half_open_calls: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initializes a closed breaker.
+
+        Args:
+            failure_rate (float): Fraction of failed calls in the window that opens the breaker.
+            window (int): Number of recent outcomes considered.
+            min_calls (int): Outcomes needed in the window before the breaker can open.
+            slow_call_seconds (float): Calls slower than this count as failures.
+            reset_timeout (float): Seconds the breaker stays open before probing.
+            half_open_calls (int): Probes allowed, and needed to succeed, while half-open.
+            clock (Callable[[], float]): Monotonic clock; replaceable in tests.
+
+        Raises:
+            ValueError: If a setting is out of range.
+        """
+        if not 0 < failure_rate <= 1:
+            raise ValueError("failure_rate must be in (0, 1]")
+        if window <= 0 or half_open_calls <= 0 or not 0 < min_calls <= window:
+            raise ValueError("window and half_open_calls must be positive and min_calls within [1, window]")
+        if slow_call_seconds <= 0 or reset_timeout < 0:
+            raise ValueError("slow_call_seconds must be positive and reset_timeout non-negative")
+
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.clock = clock
+        self.state = self.CLOSED
+        self._outcomes: deque = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    ##################################################
+    # Calls
+    ##################################################
+
+    def allow(self) -> bool:
+        """Returns whether a call may go upstream now, reserving a probe slot when half-open."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probes = self._probe_successes = 0
+                logger.info("Circuit breaker half-open; probing upstream")
+            if self.state == self.HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def release(self) -> None:
+        """Returns a probe slot reserved by allow when the call was not made after all."""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record(self, success: bool, elapsed: float) -> None:
+        """Records the outcome of a call that allow let through.
+
+        Args:
+            success (bool): Whether upstream answered without a transport or server error.
+            elapsed (float): Seconds the call took; slow calls count as failures.
+        """
+        failed = not success or elapsed > self.slow_call_seconds
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                if failed:
+                    self._open(f"probe failed after {elapsed:.2f}s")
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self.state = self.CLOSED
+                        self._outcomes.clear()
+                        logger.info("Circuit breaker closed; upstream recovered")
+                return
+            if self.state == self.OPEN:
+                return
+
+            self._outcomes.append(failed)
+            failures = sum(self._outcomes)
+            if len(self._outcomes) >= self.min_calls and failures >= self.failure_rate * len(self._outcomes):
+                self._open(f"{failures} of the last {len(self._outcomes)} calls failed or were slow")
+
+    def _open(self, reason: str) -> None:
+        """Opens the breaker. Caller holds the lock."""
+        self.state = self.OPEN
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+        self.opened += 1
+        logger.warning(f"Circuit breaker opened for {self.reset_timeout:g}s: {reason}")
+
+    def reset(self) -> None:
+        """Closes the breaker and forgets every outcome and counter."""
+        with self._lock:
+            self.state = self.CLOSED
+            self._outcomes.clear()
+            self._probes = self._probe_successes = 0
+            self.opened = self.rejected = 0
+
+    ##################################################
+    # Metrics
+    ##################################################
+
+    def stats(self) -> Dict[str, object]:
+        """Returns the state and the open/reject counters."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": sum(self._outcomes),
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class TokenBucket:
+    """
+    A thread-safe token-bucket rate limiter that backs off when upstream throttles.
+
+    Tokens refill at ``rate`` per second up to ``capacity``. penalize halves the
+    current rate (down to ``min_rate``) after a 429, and every granted token
+    then recovers it additively until it is back at ``rate``.
+    """
+
+    def __init__(self, rate: float, capacity: float, min_rate: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """Initializes a full bucket.
+
+        Args:
+            rate (float): Tokens added per second, i.e. the sustained call rate of the API plan.
+            capacity (float): Largest burst allowed.
+            min_rate (float, optional): Floor for the backed-off rate; defaults to rate / 16.
+            clock (Callable[[], float]): Monotonic clock; replaceable in tests.
+            sleep (Callable[[float], None]): Sleep function; replaceable in tests.
+
+        Raises:
+            ValueError: If rate or capacity is not positive.
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.current_rate = rate
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.throttled = 0
+
+    def _refill(self) -> None:
+        """Adds the tokens earned since the last update. Caller holds the lock."""
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.current_rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Takes a token if one is available, without waiting."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.granted += 1
+                # Additive recovery: back to the full rate after about `capacity` granted calls
+                self.current_rate = min(self.rate, self.current_rate + self.rate / max(self.capacity, 1))
+                return True
+            return False
+
+    def wait_time(self) -> float:
+        """Returns the seconds until the next token is available (0 if one is available now)."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self._tokens) / self.current_rate)
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Takes a token, waiting up to timeout seconds for one.
+
+        Args:
+            timeout (float): Longest wait, in seconds.
+
+        Returns:
+            bool: True if a token was taken, False if none became available in time.
+        """
+        deadline = self.clock() + timeout
+        while True:
+            if self.try_acquire():
+                return True
+            wait = self.wait_time()
+            remaining = deadline - self.clock()
+            if wait > remaining:
+                with self._lock:
+                    self.throttled += 1
+                return False
+            self.sleep(wait)
+
+    def penalize(self) -> None:
+        """Halves the refill rate after upstream reported it is throttling us, and drops any saved burst."""
+        with self._lock:
+            self._refill()
+            self.current_rate = max(self.min_rate, self.current_rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            logger.warning(f"Upstream throttled; rate limit reduced to {self.current_rate:.3g}/s")
+
+    def reset(self) -> None:
+        """Refills the bucket, restores the full rate and clears the counters."""
+        with self._lock:
+            self.current_rate = self.rate
+            self._tokens = float(self.capacity)
+            self._updated = self.clock()
+            self.granted = self.throttled = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the current rate, available tokens and grant/throttle counters."""
+        with self._lock:
+            self._refill()
+            return {
+                "rate_per_second": round(self.current_rate, 4),
+                "configured_rate_per_second": round(self.rate, 4),
+                "tokens": round(self._tokens, 2),
+                "granted": self.granted,
+                "throttled": self.throttled,
+            }
@@ -0,0 +1,194 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from weather.models.forecast_model import FORECAST_CNT, ForecastModel
+from weather.models.locations_model import Locations
+from weather.utils import api_utils
+from weather.utils.async_api_utils import AsyncWeatherClient
+from weather.utils.geo_utils import location_key
+from weather.utils.logger import configure_logger
+
+# Refresh cadence and fan-out, overridable from .env
+WEATHER_REFRESH_INTERVAL = float(os.getenv("WEATHER_REFRESH_INTERVAL", "600"))
+WEATHER_REFRESH_JITTER = float(os.getenv("WEATHER_REFRESH_JITTER", "30"))
+WEATHER_REFRESH_CONCURRENCY = int(os.getenv("WEATHER_REFRESH_CONCURRENCY", "8"))
+# Fetch each cycle on one asyncio event loop instead of a thread pool
+WEATHER_REFRESH_ASYNC = os.getenv("WEATHER_REFRESH_ASYNC", "false").lower() == "true"
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+Location = Tuple[str, float, float]
+
+
+class RefreshScheduler:
+    """
+    Periodically refreshes current weather and forecasts for every favorited location.
+
+    Each cycle asks the provider for the favorited locations, fetches them
+    upstream with bounded concurrency and a random start delay, primes the
+    current weather cache and writes the observed snapshots into 'weather_data'
+    in one bulk transaction, skipping observations that are already stored.
+    Given a forecast_model, it also fills that model's store for the current
+    forecast cycle; forecasts are never written to 'weather_data'. Locations
+    that are no longer favorited are dropped from the cache and from the
+    refresh set. With use_async, a cycle's fetches run on one event loop
+    through AsyncWeatherClient instead of a thread pool.
+    """
+
+    def __init__(self, app, locations_provider: Callable[[], Iterable[Location]],
+                 interval: float = WEATHER_REFRESH_INTERVAL,
+                 jitter: float = WEATHER_REFRESH_JITTER,
+                 concurrency: int = WEATHER_REFRESH_CONCURRENCY,
+                 forecast_model: Optional[ForecastModel] = None,
+                 units: str = "metric",
+                 use_async: bool = WEATHER_REFRESH_ASYNC):
+        """Initializes the scheduler.
+
+        Args:
+            app (Flask): The application whose database receives the snapshots.
+            locations_provider (Callable[[], Iterable[Location]]): Returns the favorited
+                (city_name, latitude, longitude) tuples. Called inside an app context.
+            interval (float): Seconds between the start of two cycles.
+            jitter (float): Maximum random delay, in seconds, before each location is fetched.
+            concurrency (int): Maximum number of locations fetched at once.
+            forecast_model (ForecastModel, optional): Forecast store to warm; None skips forecasts.
+            units (str): Units of measurement.
+            use_async (bool): Fetch on an asyncio event loop rather than a thread pool.
+        """
+        self.app = app
+        self.locations_provider = locations_provider
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.forecast_model = forecast_model
+        self.units = units
+        self.use_async = use_async
+        self.tracked: Set[Location] = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    ##################################################
+    # Refresh Cycle
+    ##################################################
+
+    def run_once(self) -> int:
+        """Runs a single refresh cycle.
+
+        Returns:
+            int: The number of snapshots written.
+        """
+        with self.app.app_context():
+            locations = {location_key(city, lat, lon) for city, lat, lon in self.locations_provider()}
+
+            for city, lat, lon in self.tracked - locations:
+                logger.info(f"Dropping {city} ({lat}, {lon}) from refresh; no longer favorited")
+                api_utils.evict_current_weather(city, self.units, lat, lon)
+            self.tracked = locations
+
+            if not locations:
+                logger.info("No favorited locations to refresh")
+                return 0
+
+            logger.info(f"Refreshing weather for {len(locations)} favorited locations")
+            # Fetches are paced by the rate limiter until the next cycle is due rather than failing after its short wait
+            deadline = time.monotonic() + self.interval
+            if self.use_async:
+                batches = asyncio.run(self._fetch_all_async(sorted(locations), deadline))
+            else:
+                with ThreadPoolExecutor(max_workers=max(1, self.concurrency),
+                                        thread_name_prefix="weather-refresh") as pool:
+                    batches = list(pool.map(lambda location: self._fetch(location, deadline), sorted(locations)))
+
+            rows = [row for batch in batches for row in batch]
+            try:
+                written = Locations.ingest_rows(rows, skip_existing=True)
+            except Exception as e:
+                logger.error(f"Failed to store refreshed weather: {e}")
+                return 0
+            logger.info(f"Refresh cycle stored {written} snapshots")
+            return written
+
+    def _fetch(self, location: Location, deadline: float) -> List[dict]:
+        """Fetches one location after a random delay and returns its rows. Errors are logged."""
+        city, lat, lon = location
+        if self.jitter > 0 and self._stop.wait(random.uniform(0, self.jitter)):
+            return []
+
+        rows = []
+        try:
+            with api_utils.upstream_deadline(deadline):
+                payload = api_utils.refresh_current_weather(city, self.units, lat, lon)
+                rows.extend(Locations.rows_from_weather_payload(payload, city, lat, lon))
+                if self.forecast_model is not None:
+                    self.forecast_model.get_forecast(city, lat, lon, self.units)
+        except Exception as e:
+            logger.warning(f"Refresh failed for {city} ({lat}, {lon}): {e}")
+        return rows
+
+    async def _fetch_all_async(self, locations: List[Location], deadline: float) -> List[List[dict]]:
+        """Fetches every location on this event loop, at most concurrency at once, over one session."""
+        async with AsyncWeatherClient(concurrency=max(1, self.concurrency)) as client:
+            with api_utils.upstream_deadline(deadline):
+                return await asyncio.gather(*(self._fetch_async(client, location) for location in locations))
+
+    async def _fetch_async(self, client: AsyncWeatherClient, location: Location) -> List[dict]:
+        """Async counterpart of _fetch."""
+        city, lat, lon = location
+        if self.jitter > 0:
+            await asyncio.sleep(random.uniform(0, self.jitter))
+            if self._stop.is_set():
+                return []
+
+        rows = []
+        try:
+            payload = await client.refresh_current_weather(city, self.units, lat, lon)
+            rows.extend(Locations.rows_from_weather_payload(payload, city, lat, lon))
+            if self.forecast_model is not None and not self.forecast_model.has_current(city, lat, lon, self.units):
+                forecast = await client.get_forecast(city, cnt=FORECAST_CNT, units=self.units,
+                                                     latitude=lat, longitude=lon)
+                self.forecast_model.put(city, lat, lon, forecast, self.units)
+        except Exception as e:
+            logger.warning(f"Refresh failed for {city} ({lat}, {lon}): {e}")
+        return rows
+
+    ##################################################
+    # Lifecycle
+    ##################################################
+
+    def run_forever(self) -> None:
+        """Runs refresh cycles every interval until stop is called."""
+        logger.info(f"Weather refresh scheduler started (interval {self.interval}s, concurrency {self.concurrency})")
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Refresh cycle failed: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+        logger.info("Weather refresh scheduler stopped")
+
+    def start(self) -> None:
+        """Starts run_forever on a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="weather-refresh-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Signals the scheduler to stop and waits for the current cycle to finish.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the scheduler thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
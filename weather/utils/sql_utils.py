@@ -1,7 +1,10 @@
 from contextlib import contextmanager
 import logging
 import os
+import queue
 import sqlite3
+import threading
+from typing import Dict, Optional
 
 from weather.utils.logger import configure_logger
 
@@ -11,6 +14,193 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/weather.db")
 
+# Pragma profile applied to every SQLite connection (raw sqlite3 and SQLAlchemy).
+# Set any of these to an empty string to leave SQLite's default in place.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")
+SQLITE_MMAP_SIZE = os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))
+# Negative values are KiB, so -65536 is a 64 MiB page cache per connection
+SQLITE_CACHE_SIZE = os.getenv("SQLITE_CACHE_SIZE", "-65536")
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+
+# Connections kept by the raw sqlite3 pool
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "5"))
+SQLITE_POOL_TIMEOUT = float(os.getenv("SQLITE_POOL_TIMEOUT", "30"))
+
+
+def pragma_profile() -> Dict[str, str]:
+    """Returns the configured pragmas, in the order they are applied.
+
+    busy_timeout comes first so the journal_mode switch itself waits for locks.
+    """
+    pragmas = {
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "journal_mode": SQLITE_JOURNAL_MODE,
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "mmap_size": SQLITE_MMAP_SIZE,
+        "cache_size": SQLITE_CACHE_SIZE,
+        "temp_store": SQLITE_TEMP_STORE,
+    }
+    return {name: value for name, value in pragmas.items() if value}
+
+
+def apply_pragmas(conn) -> None:
+    """
+    Applies the pragma profile to an open DB-API SQLite connection.
+
+    Args:
+        conn: A sqlite3.Connection, or the DB-API connection SQLAlchemy hands to "connect" listeners.
+    """
+    cursor = conn.cursor()
+    try:
+        for name, value in pragma_profile().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Opens a sqlite3 connection with the pragma profile applied.
+
+    The connection may be used from any thread, one at a time.
+
+    Args:
+        db_path (str, optional): Database file; defaults to DB_PATH.
+
+    Returns:
+        sqlite3.Connection: The configured connection.
+
+    Raises:
+        sqlite3.Error: If the database cannot be opened.
+    """
+    timeout = int(SQLITE_BUSY_TIMEOUT_MS) / 1000 if SQLITE_BUSY_TIMEOUT_MS else 5.0
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=timeout, check_same_thread=False)
+    apply_pragmas(conn)
+    return conn
+
+
+class SQLiteConnectionPool:
+    """
+    A bounded pool of configured sqlite3 connections to one database file.
+
+    Connections are opened on demand up to size, handed out one caller at a
+    time, and rolled back before being returned so no transaction leaks
+    between callers.
+    """
+
+    def __init__(self, db_path: str, size: int = SQLITE_POOL_SIZE, timeout: float = SQLITE_POOL_TIMEOUT):
+        """
+        Args:
+            db_path (str): Database file.
+            size (int): Maximum number of open connections.
+            timeout (float): Seconds to wait for a free connection before raising.
+        """
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                open_new = True
+            else:
+                open_new = False
+        if open_new:
+            try:
+                logger.info(f"Opening pooled database connection to {self.db_path}...")
+                return connect(self.db_path)
+            except sqlite3.Error:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"Timed out after {self.timeout}s waiting for a pooled connection")
+
+    def _checkin(self, conn: sqlite3.Connection, broken: bool) -> None:
+        if not broken:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put(conn)
+                return
+            except sqlite3.Error:
+                pass
+        conn.close()
+        with self._lock:
+            self._opened -= 1
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of the block.
+
+        Yields:
+            sqlite3.Connection: A configured connection. Commit explicitly; uncommitted work is rolled back.
+        """
+        conn = self._checkout()
+        broken = False
+        try:
+            yield conn
+        except sqlite3.DatabaseError:
+            broken = not _is_alive(conn)
+            raise
+        finally:
+            self._checkin(conn, broken)
+
+    def close(self) -> None:
+        """Closes every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+def _is_alive(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("SELECT 1")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+_pools: Dict[str, SQLiteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Optional[str] = None) -> SQLiteConnectionPool:
+    """Returns the process-wide pool for a database file, creating it on first use."""
+    db_path = db_path or DB_PATH
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = SQLiteConnectionPool(db_path)
+        return pool
+
+
+def close_pools() -> None:
+    """Closes the idle connections of every pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
 
 def check_database_connection():
     """
@@ -23,12 +213,9 @@ def check_database_connection():
     try:
         logger.info(f"Checking database connection to {DB_PATH}...")
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # Execute a simple query to verify the connection is active
-        cursor.execute("SELECT 1;")
-        conn.close()
+        with get_db_connection() as conn:
+            # Execute a simple query to verify the connection is active
+            conn.execute("SELECT 1;")
 
         logger.info("Database connection is healthy.")
 
@@ -52,17 +239,12 @@ def check_table_exists(tablename: str):
     try:
         logger.info(f"Checking if table '{tablename}' exists in {DB_PATH}...")
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # Use parameterized query to avoid SQL injection
-        cursor.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name=?;",
-            (tablename,),
-        )
-        result = cursor.fetchone()
-
-        conn.close()
+        with get_db_connection() as conn:
+            # Use parameterized query to avoid SQL injection
+            result = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name=?;",
+                (tablename,),
+            ).fetchone()
 
         if result is None:
             error_message = f"Table '{tablename}' does not exist."
@@ -78,27 +260,21 @@ def check_table_exists(tablename: str):
 
 
 @contextmanager
-
 def get_db_connection():
     """
-    Context manager for SQLite database connection.
+    Context manager for a pooled, configured SQLite database connection.
 
     Yields:
-        sqlite3.Connection: The SQLite connection object.
+        sqlite3.Connection: The SQLite connection object. It is returned to the
+            pool afterwards; uncommitted changes are rolled back.
 
     Raises:
         sqlite3.Error: If there is an issue connecting to the database.
 
     """
-    conn = None
     try:
-        logger.info(f"Opening database connection to {DB_PATH}...")
-        conn = sqlite3.connect(DB_PATH)
-        yield conn
+        with get_pool().connection() as conn:
+            yield conn
     except sqlite3.Error as e:
         logger.error(f"Database connection error: {e}")
         raise e
-    finally:
-        if conn:
-            conn.close()
-            logger.info("Database connection closed.")
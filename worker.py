@@ -0,0 +1,29 @@
+import signal
+
+from dotenv import load_dotenv
+
+from app import create_app
+from weather.models.favoriteslist_model import FavoriteslistModel
+from weather.utils.scheduler import RefreshScheduler
+
+load_dotenv()
+
+
+def main() -> None:
+    """Run the weather refresh scheduler in its own process until SIGINT/SIGTERM."""
+    app = create_app()
+    scheduler = RefreshScheduler(app, FavoriteslistModel.get_all_favorited_locations)
+
+    def shutdown(signum, frame):
+        app.logger.info(f"Received signal {signum}, stopping refresh worker...")
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    app.logger.info("Starting weather refresh worker...")
+    scheduler.run_forever()
+
+
+if __name__ == '__main__':
+    main()